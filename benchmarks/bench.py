@@ -0,0 +1,427 @@
+"""Benchmark the Rdio-Scanner integration's hot paths against a database.
+
+    python benchmarks/generate_db.py /tmp/rdio-bench --calls 2000000
+    python benchmarks/bench.py /tmp/rdio-bench --json baseline.json
+    python benchmarks/bench.py /tmp/rdio-bench --compare baseline.json
+
+Each benchmark runs in its own process so its peak RSS is its own. Runs
+fully offline: the audio view is served from a local aiohttp server.
+Needs homeassistant and aiosqlite installed. The update benchmark appends
+calls to the database and deletes them again when it finishes, so it only
+runs against databases generate_db.py created.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import importlib.util
+import json
+import os
+import random
+import resource
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List
+
+from generate_db import INSERT_CALL, CallFactory, is_generated
+
+COMPONENT = Path(__file__).resolve().parent.parent / "custom_components" / "rdio-scanner"
+BENCHMARKS = ["update", "catalog", "audio", "validate"]
+
+
+def load_component():
+    """Import the integration as the rdio_scanner package."""
+    if "rdio_scanner" in sys.modules:
+        return sys.modules["rdio_scanner"]
+    spec = importlib.util.spec_from_file_location(
+        "rdio_scanner",
+        COMPONENT / "__init__.py",
+        submodule_search_locations=[str(COMPONENT)],
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["rdio_scanner"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def summarize(samples: List[float], elapsed: float | None = None) -> Dict[str, float]:
+    """Return latency percentiles (ms) and throughput for samples in seconds."""
+    ordered = sorted(samples)
+    
+    def percentile(fraction: float) -> float:
+        index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+        return round(ordered[index] * 1000, 3)
+    
+    if elapsed is None:
+        elapsed = sum(samples)
+    return {
+        "count": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        "p50_ms": percentile(0.5),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        "ops_per_s": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+async def timed(func: Callable[[], Awaitable[Any]], iterations: int) -> Dict[str, float]:
+    """Await func() iterations times and summarize the latencies."""
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples, time.perf_counter() - started)
+
+
+def peak_rss_mb() -> float:
+    """Return the process's peak resident set size in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    if sys.platform == "darwin":
+        peak //= 1024
+    return round(peak / 1024, 1)
+
+
+async def start_hass(config_dir: str):
+    """Return a minimal Home Assistant instance for the integration's classes."""
+    from homeassistant.core import HomeAssistant
+    
+    hass = HomeAssistant(config_dir)
+    hass.config.config_dir = config_dir
+    return hass
+
+
+def make_entry(args, entry_id: str = "bench"):
+    """Return a stand-in config entry for the benchmark database."""
+    const = importlib.import_module("rdio_scanner.const")
+    return SimpleNamespace(
+        entry_id=entry_id,
+        data={"name": "Bench", "path": args.path},
+        options={
+            const.CONF_CALL_WINDOW: args.window,
+            const.CONF_CHANGE_DETECTION: False,
+            const.CONF_SIDECAR: args.sidecar,
+        },
+    )
+
+
+async def setup_coordinator(hass, args):
+    """Create the backend and coordinator for the benchmark database."""
+    component = load_component()
+    backend_module = importlib.import_module("rdio_scanner.backend")
+    
+    entry = make_entry(args)
+    backend = await backend_module.async_get_backend(hass, entry)
+    if backend.db.sidecar:
+        # Time queries against the finished index, not the build
+        while not backend.db.sidecar.ready:
+            await asyncio.sleep(0.5)
+    
+    coordinator = component.RdioScannerDataCoordinator(hass, entry, backend)
+    return coordinator
+
+
+async def bench_update(hass, args) -> Dict[str, Any]:
+    """Time coordinator refreshes: first load, idle polls and polls with new calls."""
+    coordinator = await setup_coordinator(hass, args)
+    results: Dict[str, Any] = {}
+    
+    start = time.perf_counter()
+    coordinator.data = await coordinator._async_update_data()
+    results["first_refresh"] = summarize([time.perf_counter() - start])
+    
+    results["idle_refresh"] = await timed(coordinator._async_update_data, args.iterations)
+    
+    # A writer commits new calls between refreshes, as Rdio-Scanner does
+    db_path = os.path.join(args.path, "rdio-scanner.db")
+    writer = sqlite3.connect(db_path, isolation_level=None)
+    factory = CallFactory(seed=args.seed)
+    first_id = writer.execute("SELECT IFNULL(MAX(id), 0) FROM rdio_scanner_calls").fetchone()[0]
+    samples = []
+    try:
+        for _ in range(args.iterations):
+            now = int(time.time() * 1000)
+            writer.execute("BEGIN")
+            writer.executemany(
+                INSERT_CALL, [factory.call(now + index) for index in range(args.new_calls)]
+            )
+            writer.execute("COMMIT")
+            
+            start = time.perf_counter()
+            coordinator.data = await coordinator._async_update_data()
+            samples.append(time.perf_counter() - start)
+    finally:
+        writer.execute("DELETE FROM rdio_scanner_calls WHERE id > ?", (first_id,))
+        writer.close()
+    results[f"refresh_{args.new_calls}_new_calls"] = summarize(samples)
+    
+    coordinator.active_calls.async_stop()
+    await coordinator.backend.async_close()
+    return results
+
+
+async def bench_catalog(hass, args) -> Dict[str, Any]:
+    """Time the systems and talkgroups queries."""
+    coordinator = await setup_coordinator(hass, args)
+    db = coordinator.db
+    await db.connect()
+    
+    systems = await db.get_systems()
+    system_id = systems[0]['id'] if systems else None
+    results = {
+        "get_systems": await timed(db.get_systems, args.iterations),
+        "get_talkgroups": await timed(db.get_talkgroups, args.iterations),
+        "get_talkgroups_one_system": await timed(
+            lambda: db.get_talkgroups(system_id), args.iterations
+        ),
+        "get_catalog": await timed(db.get_catalog, args.iterations),
+    }
+    
+    await coordinator.backend.async_close()
+    return results
+
+
+async def bench_audio(hass, args) -> Dict[str, Any]:
+    """Fetch call audio through the audio view at increasing concurrency."""
+    import aiohttp
+    from aiohttp import web
+    
+    audio_handler = importlib.import_module("rdio_scanner.audio_handler")
+    const = importlib.import_module("rdio_scanner.const")
+    
+    coordinator = await setup_coordinator(hass, args)
+    coordinator.data = await coordinator._async_update_data()
+    entry_id = coordinator.entry.entry_id
+    hass.data[const.DOMAIN] = {entry_id: coordinator}
+    db = coordinator.db
+    
+    # Most plays are of recent calls, the rest are scattered over the history
+    recent = [call['id'] for call in coordinator.calls]
+    history = await db.get_recent_calls(limit=args.history_calls)
+    older = [call['id'] for call in history]
+    rand = random.Random(args.seed)
+    
+    def pick_call() -> int:
+        if recent and rand.random() < 0.8:
+            return rand.choice(recent[:50])
+        return rand.choice(older)
+    
+    # Authentication is Home Assistant's; call the view directly
+    view = audio_handler.RdioScannerAudioView()
+    
+    async def handle(request: web.Request) -> web.StreamResponse:
+        return await view.get(
+            request, request.match_info["call_id"], request.match_info["entry_id"]
+        )
+    
+    app = web.Application()
+    app["hass"] = hass
+    app.router.add_get(audio_handler.AUDIO_URL, handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    base = f"http://127.0.0.1:{port}"
+    
+    results: Dict[str, Any] = {}
+    for concurrency in args.concurrency:
+        requests = [pick_call() for _ in range(args.requests)]
+        samples: List[float] = []
+        received = 0
+        errors = 0
+        
+        async def client(session: aiohttp.ClientSession) -> None:
+            nonlocal received, errors
+            while requests:
+                call_id = requests.pop()
+                # Cast devices and browsers often ask for the first chunk only
+                headers = {"Range": "bytes=0-65535"} if rand.random() < 0.2 else {}
+                start = time.perf_counter()
+                async with session.get(
+                    base + audio_handler.audio_url(entry_id, call_id), headers=headers
+                ) as response:
+                    body = await response.read()
+                    if response.status not in (200, 206):
+                        errors += 1
+                samples.append(time.perf_counter() - start)
+                received += len(body)
+        
+        stats_before = db.audio_cache.stats()
+        connector = aiohttp.TCPConnector(limit=concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            started = time.perf_counter()
+            await asyncio.gather(*(client(session) for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+        stats_after = db.audio_cache.stats()
+        
+        result = summarize(samples, elapsed)
+        result["mb_per_s"] = round(received / elapsed / 1024 / 1024, 2)
+        result["errors"] = errors
+        hits = stats_after["hits"] - stats_before["hits"]
+        misses = stats_after["misses"] - stats_before["misses"]
+        result["cache_hit_rate"] = round(hits / (hits + misses), 3) if hits + misses else None
+        results[f"concurrency_{concurrency}"] = result
+    
+    await runner.cleanup()
+    coordinator.active_calls.async_stop()
+    await coordinator.backend.async_close()
+    return results
+
+
+async def bench_validate(hass, args) -> Dict[str, Any]:
+    """Time the config flow's database check."""
+    load_component()
+    config_flow = importlib.import_module("rdio_scanner.config_flow")
+    data = {"name": "Bench", "path": args.path}
+    return {
+        "validate_input": await timed(
+            lambda: config_flow.validate_input(hass, data), args.validate_iterations
+        )
+    }
+
+
+async def run_child(name: str, args) -> Dict[str, Any]:
+    """Run one benchmark in this process."""
+    load_component()
+    rss_before = peak_rss_mb()
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await start_hass(config_dir)
+        started = time.perf_counter()
+        results = await globals()[f"bench_{name}"](hass, args)
+        elapsed = time.perf_counter() - started
+        await hass.async_stop(force=True)
+    return {
+        "results": results,
+        "seconds": round(elapsed, 2),
+        "peak_rss_mb": peak_rss_mb(),
+        "import_rss_mb": rss_before,
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """Return the metrics that got worse than the baseline by more than threshold."""
+    regressions = []
+    for name, run in current.items():
+        base_run = baseline.get(name)
+        if not base_run:
+            continue
+        
+        metrics = [("peak_rss_mb", base_run.get("peak_rss_mb"), run["peak_rss_mb"], False)]
+        for case, values in run["results"].items():
+            base_values = base_run["results"].get(case, {})
+            for key in ("p50_ms", "p95_ms", "ops_per_s"):
+                if key in values and base_values.get(key):
+                    metrics.append(
+                        (f"{case}.{key}", base_values[key], values[key], key == "ops_per_s")
+                    )
+        
+        for metric, before, after, higher_is_better in metrics:
+            if not before:
+                continue
+            change = (after - before) / before
+            if higher_is_better:
+                change = -change
+            if change > threshold:
+                regressions.append(f"{name}.{metric}: {before} -> {after} ({change:+.0%})")
+    return regressions
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    """Print a table of the results."""
+    columns = ("p50_ms", "p95_ms", "p99_ms", "ops_per_s")
+    print(f"{'benchmark':<44}" + "".join(f"{column:>12}" for column in columns))
+    for name, run in results.items():
+        for case, values in run["results"].items():
+            row = f"{name}.{case}"[:43]
+            print(f"{row:<44}" + "".join(f"{values.get(column, ''):>12}" for column in columns))
+            extra = {
+                key: values[key] for key in ("mb_per_s", "cache_hit_rate", "errors") if key in values
+            }
+            if extra:
+                print(f"{'':<44}" + ", ".join(f"{key}={value}" for key, value in extra.items()))
+        print(f"{name + ' peak RSS':<44}{run['peak_rss_mb']:>11} MB ({run['seconds']} s)")
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="directory holding rdio-scanner.db")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=BENCHMARKS)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--validate-iterations", type=int, default=5)
+    parser.add_argument("--window", type=int, default=100, help="call window option")
+    parser.add_argument("--sidecar", action="store_true", help="use the call index")
+    parser.add_argument("--new-calls", type=int, default=5, help="calls added per refresh")
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 8, 32], help="audio clients"
+    )
+    parser.add_argument("--requests", type=int, default=1000, help="audio requests per level")
+    parser.add_argument(
+        "--history-calls", type=int, default=20000, help="older calls audio is picked from"
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="baseline results to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown")
+    parser.add_argument("--child", choices=BENCHMARKS, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Run each benchmark in a child process and report."""
+    args = parse_args()
+    db_path = os.path.join(args.path, "rdio-scanner.db")
+    if not os.path.exists(db_path):
+        sys.exit(f"No rdio-scanner.db in {args.path}; create one with generate_db.py")
+    if "update" in args.only and not is_generated(db_path):
+        sys.exit(
+            f"{db_path} was not created by generate_db.py and the update benchmark "
+            "writes to it; leave update out of --only to benchmark it read-only"
+        )
+    
+    if args.child:
+        result = asyncio.run(run_child(args.child, args))
+        print(json.dumps(result))
+        sys.stdout.flush()
+        # Worker threads of the stopped instance must not hold up the exit
+        os._exit(0)
+    
+    results = {}
+    for name in args.only:
+        print(f"Running {name}...", file=sys.stderr)
+        completed = subprocess.run(
+            [sys.executable, __file__, *sys.argv[1:], "--child", name],
+            stdout=subprocess.PIPE,
+            check=True,
+            text=True,
+        )
+        results[name] = json.loads(completed.stdout.strip().splitlines()[-1])
+    
+    print_report(results)
+    
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            regressions = compare(json.load(file), results, args.threshold)
+        if regressions:
+            print("\nRegressions:", *regressions, sep="\n  ")
+            sys.exit(1)
+        print("\nNo regressions against", args.compare)
+
+
+if __name__ == "__main__":
+    main()
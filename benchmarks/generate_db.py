@@ -0,0 +1,370 @@
+"""Generate a synthetic rdio-scanner.db for benchmarking.
+
+    python benchmarks/generate_db.py /tmp/rdio-bench --calls 2000000
+
+Calls follow a day/night cycle, with a few busy talkgroups carrying most
+of the traffic. Each call has talkgroupData, sources and frequencies JSON
+shaped like Rdio-Scanner's, and an MP3-like audio BLOB sized from its
+length and the bitrate. At the default 16 kbps a million calls take
+roughly 17 GB; pass a lower --bitrate for a smaller file.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+MARKER_TABLE = "rdio_scanner_benchmark"
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS rdio_scanner_calls (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        audio BLOB NOT NULL,
+        audioName TEXT,
+        audioType TEXT,
+        dateTime INTEGER NOT NULL,
+        frequencies TEXT,
+        frequency INTEGER,
+        patches TEXT,
+        source INTEGER,
+        sources TEXT,
+        system INTEGER NOT NULL,
+        talkgroup INTEGER NOT NULL,
+        talkgroupData TEXT,
+        len INTEGER
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS rdio_scanner_calls_idx1
+    ON rdio_scanner_calls (dateTime, system, talkgroup)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rdio_scanner_systems (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        systemId INTEGER NOT NULL,
+        label TEXT,
+        "order" INTEGER
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rdio_scanner_talkgroups (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        systemId INTEGER NOT NULL,
+        talkgroupId INTEGER NOT NULL,
+        label TEXT,
+        name TEXT,
+        tag TEXT,
+        "group" TEXT
+    )
+    """,
+    # Marks a database as synthetic, so benchmarks may write to it
+    f"CREATE TABLE IF NOT EXISTS {MARKER_TABLE} (created INTEGER)",
+]
+
+INSERT_CALL = """
+    INSERT INTO rdio_scanner_calls (
+        audio, audioName, audioType, dateTime, frequencies, frequency,
+        patches, source, sources, system, talkgroup, talkgroupData, len
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# (group, tag, label prefix)
+SERVICES = [
+    ("Police", "Law Dispatch", "PD Dispatch"),
+    ("Police", "Law Tac", "PD Tac"),
+    ("Fire", "Fire Dispatch", "FD Dispatch"),
+    ("Fire", "Fire-Tac", "FD Fireground"),
+    ("EMS", "EMS Dispatch", "EMS"),
+    ("EMS", "Hospital", "Hospital"),
+    ("Public Works", "Public Works", "DPW"),
+    ("Schools", "Schools", "School Bus"),
+    ("Interop", "Interop", "Mutual Aid"),
+]
+
+# Relative traffic per hour of the day, quietest before dawn
+HOURLY_TRAFFIC = [
+    0.35, 0.3, 0.25, 0.22, 0.22, 0.3, 0.55, 0.8, 0.95, 1.0, 1.0, 1.0,
+    1.0, 1.0, 1.0, 1.0, 1.05, 1.1, 1.05, 0.95, 0.85, 0.7, 0.55, 0.45,
+]
+
+BATCH_SIZE = 2000
+HOUR_MS = 3600 * 1000
+# Random bytes that audio BLOBs are cut from
+NOISE_SIZE = 4 * 1024 * 1024
+# MPEG-2 Layer III, 16 kbps, 22.05 kHz frame header
+MP3_FRAME_HEADER = b"\xff\xf3\x14\xc4"
+MP3_FRAME_SIZE = 144
+# Short ID3v2.4 tag with one TSSE frame
+ID3_TAG = b"ID3\x04\x00\x00\x00\x00\x00\x16TSSE\x00\x00\x00\x0c\x00\x00\x03rdio-bench\x00"
+
+
+class CallFactory:
+    """Build rows for rdio_scanner_calls."""
+    
+    def __init__(
+        self,
+        systems: int = 4,
+        talkgroups: int = 400,
+        bitrate: int = 16,
+        seed: Optional[int] = None,
+    ) -> None:
+        """Initialize the factory with a fixed set of systems and talkgroups."""
+        self.random = random.Random(seed)
+        self.bytes_per_second = bitrate * 1000 // 8
+        # Noise with a frame header every MP3_FRAME_SIZE bytes
+        noise = bytearray(self.random.randbytes(NOISE_SIZE))
+        for start in range(0, NOISE_SIZE, MP3_FRAME_SIZE):
+            noise[start:start + 4] = MP3_FRAME_HEADER
+        self.noise = bytes(noise)
+        
+        self.systems = [
+            (system_id, f"County Trunked {system_id}") for system_id in range(1, systems + 1)
+        ]
+        # (system, talkgroup id, talkgroupData), busiest first
+        self.talkgroups: List[Tuple[int, int, str]] = []
+        for index in range(talkgroups):
+            system_id = index % systems + 1
+            group, tag, label = SERVICES[index % len(SERVICES)]
+            talkgroup_id = 1000 + index * 7
+            self.talkgroups.append(
+                (
+                    system_id,
+                    talkgroup_id,
+                    json.dumps(
+                        {
+                            "id": talkgroup_id,
+                            "label": f"{label} {index // len(SERVICES) + 1}",
+                            "name": f"{group} {label} {index // len(SERVICES) + 1}",
+                            "tag": tag,
+                            "group": group,
+                            "frequency": None,
+                            "led": None,
+                        }
+                    ),
+                )
+            )
+        # Zipf-like talkgroup popularity
+        self.weights = list(
+            _cumulative(1 / (rank + 1) ** 0.9 for rank in range(talkgroups))
+        )
+        self.units = [self.random.randint(100000, 9999999) for _ in range(talkgroups * 20)]
+        self.frequencies = [851_000_000 + 12_500 * index for index in range(200)]
+    
+    def call(self, date_time: int) -> tuple:
+        """Return one call row at date_time (ms since the epoch)."""
+        rand = self.random
+        system_id, talkgroup_id, talkgroup_data = rand.choices(
+            self.talkgroups, cum_weights=self.weights
+        )[0]
+        
+        # Mostly short transmissions with a long tail
+        length = max(1, min(120, round(rand.lognormvariate(1.6, 0.8))))
+        
+        position = 0.0
+        sources = []
+        for _ in range(rand.choice((1, 1, 1, 2, 2, 3, 4))):
+            sources.append({"pos": round(position, 2), "src": rand.choice(self.units)})
+            position += rand.uniform(0.5, length)
+            if position >= length:
+                break
+        
+        frequency = rand.choice(self.frequencies)
+        frequencies = [
+            {
+                "errorCount": rand.choice((0, 0, 0, 1, 2)),
+                "freq": frequency,
+                "len": length,
+                "pos": 0,
+                "spikeCount": 0,
+            }
+        ]
+        patches = "[]" if rand.random() > 0.03 else json.dumps(
+            [rand.choice(self.talkgroups)[1]]
+        )
+        
+        # Most systems record MP3; a few calls are AAC as with some recorders
+        if rand.random() < 0.95:
+            audio_name, audio_type = f"{talkgroup_id}-{date_time}.mp3", "audio/mpeg"
+        else:
+            audio_name, audio_type = f"{talkgroup_id}-{date_time}.m4a", "audio/mp4"
+        
+        return (
+            self.audio(length),
+            audio_name,
+            audio_type,
+            date_time,
+            json.dumps(frequencies),
+            frequency,
+            patches,
+            sources[0]["src"],
+            json.dumps(sources),
+            system_id,
+            talkgroup_id,
+            talkgroup_data,
+            length,
+        )
+    
+    def audio(self, length: int) -> bytes:
+        """Return an MP3-like BLOB for a call of length seconds."""
+        size = int(length * self.bytes_per_second * self.random.uniform(0.9, 1.1))
+        size = min(max(size, MP3_FRAME_SIZE), NOISE_SIZE)
+        # Start on a frame header
+        offset = self.random.randrange((NOISE_SIZE - size) // MP3_FRAME_SIZE + 1) * MP3_FRAME_SIZE
+        return ID3_TAG + self.noise[offset:offset + size]
+    
+    def times(self, count: int, end: int, days: float) -> Iterator[int]:
+        """Yield count call times (ms) over the days before end, oldest first."""
+        hours = max(1, int(days * 24))
+        start = end - hours * HOUR_MS
+        weights = [
+            HOURLY_TRAFFIC[time.localtime((start + hour * HOUR_MS) / 1000).tm_hour]
+            for hour in range(hours)
+        ]
+        
+        # Share the calls out by each hour's traffic, carrying the remainders
+        per_weight = count / sum(weights)
+        expected = 0.0
+        produced = 0
+        for hour, weight in enumerate(weights):
+            expected += weight * per_weight
+            calls = round(expected) - produced
+            produced += calls
+            hour_start = start + hour * HOUR_MS
+            for offset in sorted(self.random.randrange(HOUR_MS) for _ in range(calls)):
+                yield hour_start + offset
+
+
+def _cumulative(values) -> Iterator[float]:
+    """Yield running totals."""
+    total = 0.0
+    for value in values:
+        total += value
+        yield total
+
+
+def create_schema(conn: sqlite3.Connection, factory: CallFactory) -> None:
+    """Create Rdio-Scanner's tables and fill the systems and talkgroups tables."""
+    for statement in SCHEMA:
+        conn.execute(statement)
+    
+    if conn.execute("SELECT COUNT(*) FROM rdio_scanner_systems").fetchone()[0]:
+        return
+    conn.executemany(
+        'INSERT INTO rdio_scanner_systems (systemId, label, "order") VALUES (?, ?, ?)',
+        [(system_id, label, system_id) for system_id, label in factory.systems],
+    )
+    rows = []
+    for system_id, talkgroup_id, raw in factory.talkgroups:
+        data = json.loads(raw)
+        rows.append(
+            (system_id, talkgroup_id, data["label"], data["name"], data["tag"], data["group"])
+        )
+    conn.executemany(
+        "INSERT INTO rdio_scanner_talkgroups "
+        '(systemId, talkgroupId, label, name, tag, "group") VALUES (?, ?, ?, ?, ?, ?)',
+        rows,
+    )
+
+
+def is_generated(db_path: str) -> bool:
+    """Return True if a database was created by this script."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return bool(
+            conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (MARKER_TABLE,),
+            ).fetchone()
+        )
+    finally:
+        conn.close()
+
+
+def generate(
+    path: str,
+    calls: int,
+    days: float = 30,
+    systems: int = 4,
+    talkgroups: int = 400,
+    bitrate: int = 16,
+    seed: Optional[int] = 1,
+    progress: bool = True,
+) -> Dict[str, Any]:
+    """Write calls to <path>/rdio-scanner.db, appending if it exists."""
+    os.makedirs(path, exist_ok=True)
+    db_path = os.path.join(path, "rdio-scanner.db")
+    factory = CallFactory(systems, talkgroups, bitrate, seed)
+    
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    create_schema(conn, factory)
+    
+    started = time.monotonic()
+    end = int(time.time() * 1000)
+    batch = []
+    written = 0
+    for date_time in factory.times(calls, end, days):
+        batch.append(factory.call(date_time))
+        if len(batch) == BATCH_SIZE:
+            written += _write_batch(conn, batch)
+            batch = []
+            if progress and written % (BATCH_SIZE * 50) == 0:
+                print(f"\r{written}/{calls} calls", end="", file=sys.stderr, flush=True)
+    written += _write_batch(conn, batch)
+    if progress:
+        print(f"\r{written}/{calls} calls", file=sys.stderr)
+    
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    
+    return {
+        "path": db_path,
+        "calls": written,
+        "size_mb": round(os.path.getsize(db_path) / 1024 / 1024, 1),
+        "seconds": round(time.monotonic() - started, 1),
+    }
+
+
+def _write_batch(conn: sqlite3.Connection, batch: List[tuple]) -> int:
+    """Insert a batch of calls in one transaction."""
+    if not batch:
+        return 0
+    conn.execute("BEGIN")
+    conn.executemany(INSERT_CALL, batch)
+    conn.execute("COMMIT")
+    return len(batch)
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="directory to write rdio-scanner.db to")
+    parser.add_argument("--calls", type=int, default=1_000_000)
+    parser.add_argument("--days", type=float, default=30, help="history the calls span")
+    parser.add_argument("--systems", type=int, default=4)
+    parser.add_argument("--talkgroups", type=int, default=400)
+    parser.add_argument("--bitrate", type=int, default=16, help="audio kbps; sets BLOB sizes")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    
+    result = generate(
+        args.path,
+        args.calls,
+        days=args.days,
+        systems=args.systems,
+        talkgroups=args.talkgroups,
+        bitrate=args.bitrate,
+        seed=args.seed,
+    )
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,25 +2,78 @@
 from __future__ import annotations
 
 import logging
+import os
+import time
+from collections import defaultdict, deque
 from datetime import timedelta
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_SCAN_INTERVAL, Platform
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .const import DOMAIN
-from .rdio_db import RdioScannerDB
+from .active_calls import ActiveCallTracker
+from .backend import (
+    RdioScannerBackend,
+    async_get_backend,
+    async_release_backend,
+    database_path,
+    disk_cache_path,
+    sidecar_path,
+)
+from .catalog import RdioScannerCatalog
+from .const import (
+    ACTIVE_CALL_HANG_TIME,
+    CATALOG_RECONCILE_INTERVAL,
+    CONF_CALL_WINDOW,
+    CONF_CHANGE_DETECTION,
+    CONF_EVENTS,
+    CONF_STATISTICS,
+    CONF_SURGE,
+    CONF_VIEW_TALKGROUPS,
+    DEFAULT_CALL_WINDOW,
+    DEFAULT_CHANGE_DETECTION,
+    DEFAULT_EVENTS,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_STATISTICS,
+    DEFAULT_SURGE,
+    DOMAIN,
+    FALLBACK_SCAN_INTERVAL,
+    REFRESH_COOLDOWN,
+    SIGNAL_CATALOG_UPDATED,
+    SIGNAL_NEW_CALLS,
+    SIGNAL_TALKGROUP_ACTIVE,
+    SIGNAL_TALKGROUP_SURGE,
+    SNAPSHOT_RECONCILE_DELAY,
+    SNAPSHOT_SAVE_DELAY,
+)
+from .entity import talkgroup_signal
+from .events import parse_talkgroup_selection, selection_filter
+from .metrics import RefreshStats
 
 _LOGGER = logging.getLogger(__name__)
 
-PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.MEDIA_PLAYER]
+PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BINARY_SENSOR, Platform.MEDIA_PLAYER]
+
+SNAPSHOT_STORAGE_VERSION = 1
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Rdio-Scanner from a config entry."""
-    coordinator = RdioScannerDataCoordinator(hass, entry)
-    await coordinator.async_config_entry_first_refresh()
+    backend = await async_get_backend(hass, entry)
+    coordinator = RdioScannerDataCoordinator(hass, entry, backend)
+    try:
+        warm_start = await coordinator.async_restore_snapshot()
+        if coordinator.surges:
+            await coordinator.surges.async_load()
+        await coordinator.async_config_entry_first_refresh()
+    except Exception:
+        await async_release_backend(hass, backend, entry.entry_id)
+        raise
     
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = coordinator
@@ -29,16 +82,98 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     from .audio_handler import setup_audio_endpoint
     setup_audio_endpoint(hass)
     
+    # Setup live call feed and services
+    from .websocket_api import setup_websocket_api
+    setup_websocket_api(hass)
+    from .services import setup_services
+    setup_services(hass)
+    
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     
+    entry.async_on_unload(coordinator.active_calls.async_stop)
+    if coordinator.events:
+        entry.async_on_unload(coordinator.events.async_stop)
+    if coordinator.surges:
+        entry.async_on_unload(coordinator.surges.async_stop)
+    if coordinator.change_detection:
+        entry.async_on_unload(backend.async_watch(coordinator))
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass, coordinator.async_reconcile_catalog, CATALOG_RECONCILE_INTERVAL
+        )
+    )
+    if warm_start:
+        # Calls may have been added or pruned while Home Assistant was stopped
+        entry.async_on_unload(
+            async_call_later(hass, SNAPSHOT_RECONCILE_DELAY, coordinator.async_reconcile_catalog)
+        )
+    
+    if entry.options.get(CONF_STATISTICS, DEFAULT_STATISTICS):
+        if "recorder" in hass.config.components:
+            from .statistics import RdioScannerStatistics
+            statistics = RdioScannerStatistics(hass, entry, coordinator)
+            entry.async_on_unload(await statistics.async_start())
+        else:
+            _LOGGER.warning("Long-term call statistics need the recorder integration")
+    
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+    
     return True
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the call index, audio disk cache, snapshot, surge baselines and statistics position when a config entry is removed."""
+    
+    def remove_index() -> str | None:
+        """Delete the entry's files; return the database path if no other entry uses it."""
+        paths = [hass.config.path(DOMAIN, f"{entry.entry_id}.db")]
+        # The call index is shared, keep it while another entry uses the database
+        db_path = os.path.realpath(database_path(entry))
+        unshared = not any(
+            os.path.realpath(database_path(other)) == db_path
+            for other in hass.config_entries.async_entries(DOMAIN)
+            if other.entry_id != entry.entry_id
+        )
+        if unshared:
+            paths.append(sidecar_path(hass, db_path))
+        
+        for path in paths:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+        return db_path if unshared else None
+    
+    if db_path := await hass.async_add_executor_job(remove_index):
+        from .disk_cache import async_remove_disk_cache
+        await async_remove_disk_cache(hass, disk_cache_path(hass, db_path))
+    
+    from .statistics import STORAGE_VERSION
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.statistics.{entry.entry_id}").async_remove()
+    await Store(
+        hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.snapshot.{entry.entry_id}"
+    ).async_remove()
+    from .surge import STORAGE_VERSION as SURGE_STORAGE_VERSION
+    await Store(hass, SURGE_STORAGE_VERSION, f"{DOMAIN}.surge.{entry.entry_id}").async_remove()
+
+
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload a config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         coordinator = hass.data[DOMAIN].pop(entry.entry_id)
-        await coordinator.db.close()
+        for cancel in coordinator.exports:
+            cancel.set()
+        await coordinator.async_save_snapshot()
+        if coordinator.surges:
+            await coordinator.surges.async_save()
+        await async_release_backend(hass, coordinator.backend, entry.entry_id)
+        
+        from .services import remove_services
+        remove_services(hass)
     
     return unload_ok
 
@@ -46,41 +181,146 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 class RdioScannerDataCoordinator(DataUpdateCoordinator):
     """Class to manage fetching Rdio-Scanner data."""
     
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+    def __init__(
+        self, hass: HomeAssistant, entry: ConfigEntry, backend: RdioScannerBackend
+    ) -> None:
         """Initialize."""
         self.entry = entry
-        self.db = RdioScannerDB(entry.data)
+        self.backend = backend
+        self.db = backend.db
+        # Talkgroups this entry shows, empty for all
+        self.view_systems, self.view_talkgroups = parse_talkgroup_selection(
+            entry.options.get(CONF_VIEW_TALKGROUPS)
+        )
+        self.window = entry.options.get(CONF_CALL_WINDOW, DEFAULT_CALL_WINDOW)
+        # Ring buffer of the newest calls, newest first
+        self._recent = deque(maxlen=self.window)
+        # (dateTime, id) of the newest call seen so far
+        self._last_seen = None
+        # call id -> call for everything in the ring buffer
+        self.calls_by_id = {}
         self.calls = []
+        # Cancel events of running exports, set on unload
+        self.exports = set()
+        self.catalog = RdioScannerCatalog()
+        self.active_calls = ActiveCallTracker(
+            hass, ACTIVE_CALL_HANG_TIME.total_seconds(), self._async_active_calls_changed
+        )
+        self.events = None
+        if entry.options.get(CONF_EVENTS, DEFAULT_EVENTS):
+            from .events import RdioScannerCallEvents
+            self.events = RdioScannerCallEvents(hass, entry, self)
+        self.surges = None
+        if entry.options.get(CONF_SURGE, DEFAULT_SURGE):
+            from .surge import SurgeDetector
+            self.surges = SurgeDetector(hass, entry, self, self._async_surges_changed)
         self.systems = []
         self.talkgroups = []
+        self.refresh_stats = RefreshStats()
+        # Catalog and high-water mark saved for the next start
+        self._store = Store(
+            hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.snapshot.{entry.entry_id}"
+        )
+        self._snapshot_mark = None
+        self._snapshot_scheduled = False
+        self.change_detection = entry.options.get(
+            CONF_CHANGE_DETECTION, DEFAULT_CHANGE_DETECTION
+        )
+        
+        # With change detection the poll is only a fallback
+        if self.change_detection:
+            update_interval = FALLBACK_SCAN_INTERVAL
+        else:
+            update_interval = timedelta(
+                seconds=entry.options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+            )
         
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(seconds=10),
+            update_interval=update_interval,
+            request_refresh_debouncer=Debouncer(
+                hass, _LOGGER, cooldown=REFRESH_COOLDOWN, immediate=True
+            ),
+        )
+    
+    @property
+    def view(self) -> tuple:
+        """Return the talkgroups this entry shows as a call filter selection."""
+        return self.view_systems, self.view_talkgroups
+    
+    def in_view(self, system_id: int, talkgroup_id: int) -> bool:
+        """Return True if the talkgroup is one this entry shows."""
+        if not self.view_systems and not self.view_talkgroups:
+            return True
+        return (
+            system_id in self.view_systems
+            or (system_id, talkgroup_id) in self.view_talkgroups
+            or (None, talkgroup_id) in self.view_talkgroups
         )
     
     async def _async_update_data(self):
         """Fetch data from Rdio-Scanner database."""
+        started = time.monotonic()
         try:
             await self.db.connect()
             
-            # Get recent calls
-            self.calls = await self.db.get_recent_calls(limit=100)
+            # Get calls newer than the high-water mark
+            fetched = await self._fetch_new_calls()
+            new_calls = [
+                call for call in fetched if self.in_view(call['system'], call['talkgroup'])
+            ]
             
-            # Get systems and talkgroups
-            self.systems = await self.db.get_systems()
-            self.talkgroups = await self.db.get_talkgroups()
+            catalog_changed = False
+            catalog_loaded = not self.catalog.loaded
+            if catalog_loaded:
+                await self._async_load_catalog(new_calls)
+            elif new_calls:
+                counted = new_calls
+                if self._snapshot_mark is not None:
+                    # A restored catalog already counts the calls up to its mark
+                    counted = [
+                        call for call in new_calls
+                        if (call['dateTime'], call['id']) > self._snapshot_mark
+                    ]
+                catalog_changed = self.catalog.add_calls(counted)
+            self._snapshot_mark = None
             
-            # Get active/live calls (calls from last 30 seconds)
-            active_calls = [
-                call for call in self.calls
-                if call.get('dateTime') and self._is_recent(call['dateTime'])
-            ]
+            if new_calls or self._last_seen is None:
+                self._add_calls(new_calls)
+                self.calls = list(self._recent)
+                self.active_calls.async_add_calls(new_calls)
+            
+            # Baselines skip calls counted before a restart, history included
+            if self.surges and new_calls:
+                self.surges.async_add_calls(new_calls)
+            
+            # Entities for new talkgroups are seeded from the calls above
+            if catalog_changed:
+                self._async_catalog_updated()
             
+            # The first fetch is history, not new calls
+            if new_calls and self._last_seen is not None:
+                self._dispatch_calls(new_calls)
+                if self.events:
+                    self.events.async_add_calls(new_calls)
+            
+            self.systems = self.catalog.systems
+            self.talkgroups = self.catalog.talkgroups
+            
+            # Calls outside the view move the mark too, so they aren't fetched again
+            if fetched:
+                self._last_seen = (fetched[-1]['dateTime'], fetched[-1]['id'])
+            elif self._last_seen is None:
+                self._last_seen = (0, 0)
+            
+            if fetched or catalog_loaded:
+                self._async_schedule_snapshot()
+            
+            self.refresh_stats.record(time.monotonic() - started, len(fetched))
             return {
-                "active_calls": len(active_calls),
+                "active_calls": self.active_calls.count,
                 "total_calls": len(self.calls),
                 "calls": self.calls,
                 "systems": self.systems,
@@ -88,15 +328,151 @@ class RdioScannerDataCoordinator(DataUpdateCoordinator):
                 "connected": True,
             }
         except Exception as err:
+            self.refresh_stats.record(time.monotonic() - started, 0, failed=True)
             _LOGGER.error("Error fetching data: %s", err)
             raise UpdateFailed(f"Error communicating with database: {err}")
     
-    def _is_recent(self, timestamp, seconds=30):
-        """Check if timestamp is within last N seconds."""
-        from datetime import datetime, timezone
+    async def async_reconcile_catalog(self, now=None) -> None:
+        """Rebuild the catalog from the database to correct any drift."""
         try:
-            call_time = datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc)
-            now = datetime.now(timezone.utc)
-            return (now - call_time).total_seconds() < seconds
-        except:
+            if self.db.use_sidecar:
+                await self.db.prune_sidecar()
+            await self._async_load_catalog()
+            self._async_catalog_updated()
+            self._async_schedule_snapshot()
+        except Exception as err:
+            _LOGGER.warning("Error reconciling talkgroup catalog: %s", err)
+    
+    async def async_restore_snapshot(self) -> bool:
+        """Restore the catalog saved by the last run, so setup doesn't wait for a full scan."""
+        data = await self._store.async_load()
+        if not data:
             return False
+        
+        try:
+            # A snapshot of another database or view can't be reused
+            if data["path"] != self.db.db_path or data["view"] != self.entry.options.get(
+                CONF_VIEW_TALKGROUPS, ""
+            ):
+                return False
+            self.catalog.restore(data["catalog"])
+            self._snapshot_mark = tuple(data["last_seen"])
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring invalid catalog snapshot: %s", err)
+            self.catalog = RdioScannerCatalog()
+            return False
+        
+        _LOGGER.debug(
+            "Restored %s talkgroups from the catalog snapshot", len(self.catalog.talkgroups)
+        )
+        return True
+    
+    async def async_save_snapshot(self) -> None:
+        """Save the catalog and high-water mark now."""
+        if self.catalog.loaded and self._last_seen is not None:
+            await self._store.async_save(self._snapshot_data())
+    
+    @callback
+    def _async_schedule_snapshot(self) -> None:
+        """Save the snapshot within SNAPSHOT_SAVE_DELAY, without postponing a pending save."""
+        if not self._snapshot_scheduled:
+            self._snapshot_scheduled = True
+            self._store.async_delay_save(self._snapshot_data, SNAPSHOT_SAVE_DELAY)
+    
+    def _snapshot_data(self) -> dict:
+        """Return the snapshot to save."""
+        self._snapshot_scheduled = False
+        return {
+            "path": self.db.db_path,
+            "view": self.entry.options.get(CONF_VIEW_TALKGROUPS, ""),
+            "last_seen": list(self._last_seen),
+            "catalog": self.catalog.snapshot(),
+        }
+    
+    async def _async_load_catalog(self, new_calls=()) -> None:
+        """Load the catalog with a single scan of the calls table, shared between entries.
+        
+        The scan counts calls up to an id and may be shared from a while
+        ago, so calls after that id that were already counted (those in the
+        ring buffer) or are about to be (new_calls) are added on top.
+        """
+        rows, system_labels, max_id = await self.backend.async_get_catalog()
+        self.catalog.load(
+            (row for row in rows if self.in_view(row['system'], row['talkgroup'])),
+            system_labels,
+        )
+        self.catalog.add_calls(
+            call for call in [*reversed(self._recent), *new_calls] if call['id'] > max_id
+        )
+    
+    @callback
+    def _async_active_calls_changed(self, talkgroups) -> None:
+        """Push the active call count, and activity changes to talkgroup entities."""
+        for system_id, talkgroup_id in talkgroups:
+            async_dispatcher_send(
+                self.hass,
+                talkgroup_signal(
+                    self.entry.entry_id, system_id, talkgroup_id, SIGNAL_TALKGROUP_ACTIVE
+                ),
+            )
+        
+        # Expiries happen between refreshes, so update the data in place
+        if self.data is not None:
+            self.data["active_calls"] = self.active_calls.count
+            self.async_update_listeners()
+    
+    @callback
+    def _async_surges_changed(self, talkgroups) -> None:
+        """Push surge changes to talkgroup entities and the surge sensor."""
+        for system_id, talkgroup_id in talkgroups:
+            async_dispatcher_send(
+                self.hass,
+                talkgroup_signal(
+                    self.entry.entry_id, system_id, talkgroup_id, SIGNAL_TALKGROUP_SURGE
+                ),
+            )
+        
+        # Surges also clear between refreshes
+        if self.data is not None:
+            self.async_update_listeners()
+    
+    @callback
+    def _async_catalog_updated(self) -> None:
+        """Let platforms add entities for new talkgroups."""
+        async_dispatcher_send(self.hass, SIGNAL_CATALOG_UPDATED.format(self.entry.entry_id))
+    
+    def _dispatch_calls(self, new_calls) -> None:
+        """Send new calls (oldest first) to feed subscribers, and to the entities of their talkgroups only."""
+        async_dispatcher_send(self.hass, SIGNAL_NEW_CALLS.format(self.entry.entry_id), new_calls)
+        
+        by_talkgroup = defaultdict(list)
+        for call in new_calls:
+            by_talkgroup[(call['system'], call['talkgroup'])].append(call)
+        
+        for (system_id, talkgroup_id), calls in by_talkgroup.items():
+            async_dispatcher_send(
+                self.hass, talkgroup_signal(self.entry.entry_id, system_id, talkgroup_id), calls
+            )
+    
+    def _add_calls(self, new_calls) -> None:
+        """Push calls (oldest first) into the ring buffer and call index."""
+        for call in new_calls:
+            if len(self._recent) == self.window:
+                self.calls_by_id.pop(self._recent.pop()['id'], None)
+            self._recent.appendleft(call)
+            self.calls_by_id[call['id']] = call
+    
+    async def _fetch_new_calls(self):
+        """Fetch calls newer than the high-water mark, oldest first."""
+        if self._last_seen is not None:
+            return await self.backend.async_get_calls_since(self._last_seen, self.window)
+        
+        if self.view_systems or self.view_talkgroups:
+            calls = await self.db.get_calls_page(
+                limit=self.window,
+                **selection_filter(self.view_systems, self.view_talkgroups),
+            )
+        else:
+            calls = await self.db.get_recent_calls(limit=self.window)
+        calls.reverse()
+        return calls
@@ -0,0 +1,117 @@
+"""Active call tracking for Rdio-Scanner."""
+from __future__ import annotations
+
+import heapq
+import logging
+import time
+from collections import Counter
+from typing import Any, Callable, Iterable, List, Optional, Set, Tuple
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ActiveCallTracker:
+    """Track calls in progress and expire each one exactly when it ends.
+    
+    A call ends at dateTime + len plus the hang time. Ends are kept in a
+    min-heap with a single timer for the earliest one, so nothing is
+    recomputed between calls and no polling is needed.
+    """
+    
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        hang_time: float,
+        on_change: Callable[[Set[Tuple[int, int]]], None],
+    ) -> None:
+        """Initialize the tracker.
+        
+        on_change is called whenever the count changes, with the
+        (system, talkgroup) keys that became active or idle.
+        """
+        self.hass = hass
+        self._hang_time = int(hang_time * 1000)
+        self._on_change = on_change
+        # (ends, call id, (system, talkgroup)), earliest end first
+        self._heap: List[Tuple[int, int, Tuple[int, int]]] = []
+        # (system, talkgroup) -> active calls
+        self._talkgroups: Counter = Counter()
+        self._unsub_timer: Optional[CALLBACK_TYPE] = None
+        self._timer_at: Optional[int] = None
+    
+    @property
+    def count(self) -> int:
+        """Return the number of calls in progress."""
+        return len(self._heap)
+    
+    @property
+    def talkgroups(self) -> List[Tuple[int, int]]:
+        """Return the (system, talkgroup) keys with a call in progress."""
+        return list(self._talkgroups)
+    
+    def is_active(self, key: Tuple[int, int]) -> bool:
+        """Return True if the talkgroup has a call in progress."""
+        return key in self._talkgroups
+    
+    @callback
+    def async_add_calls(self, calls: Iterable[Any]) -> None:
+        """Track new calls; those that already ended are ignored."""
+        now = int(time.time() * 1000)
+        count = len(self._heap)
+        changed = set()
+        for call in calls:
+            ends = call['dateTime'] + int((call['call_length'] or 0) * 1000) + self._hang_time
+            if ends <= now:
+                continue
+            
+            key = (call['system'], call['talkgroup'])
+            heapq.heappush(self._heap, (ends, call['id'], key))
+            if not self._talkgroups[key]:
+                changed.add(key)
+            self._talkgroups[key] += 1
+        
+        if len(self._heap) == count:
+            return
+        
+        if self._timer_at is None or self._heap[0][0] < self._timer_at:
+            self._schedule(now)
+        self._on_change(changed)
+    
+    @callback
+    def async_stop(self) -> None:
+        """Cancel the expiry timer."""
+        if self._unsub_timer:
+            self._unsub_timer()
+            self._unsub_timer = None
+            self._timer_at = None
+    
+    @callback
+    def _async_expire(self, _now) -> None:
+        """Expire every call that has ended and schedule the next expiry."""
+        self._unsub_timer = None
+        self._timer_at = None
+        now = int(time.time() * 1000)
+        count = len(self._heap)
+        changed = set()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, key = heapq.heappop(self._heap)
+            self._talkgroups[key] -= 1
+            if not self._talkgroups[key]:
+                del self._talkgroups[key]
+                changed.add(key)
+        
+        if self._heap:
+            self._schedule(now)
+        if len(self._heap) != count:
+            self._on_change(changed)
+    
+    def _schedule(self, now: int) -> None:
+        """Schedule the timer for the earliest end."""
+        self.async_stop()
+        self._timer_at = self._heap[0][0]
+        self._unsub_timer = async_call_later(
+            self.hass, max(self._timer_at - now, 0) / 1000, self._async_expire
+        )
@@ -0,0 +1,131 @@
+"""In-memory audio cache for Rdio-Scanner."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AudioCache:
+    """Byte-budgeted LRU cache with optional TTL and single-flight loading."""
+    
+    def __init__(
+        self, max_bytes: int, max_item_bytes: int, ttl: float | None = None
+    ) -> None:
+        """Initialize the cache."""
+        self.max_bytes = max_bytes
+        self.max_item_bytes = min(max_item_bytes, max_bytes)
+        self.ttl = ttl or None
+        # key -> (value, size, expires), least recently used first
+        self._entries: OrderedDict[Hashable, tuple[Any, int, float | None]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+    
+    def fits(self, size: int) -> bool:
+        """Return True if an item of this size may be cached."""
+        return 0 < size <= self.max_item_bytes
+    
+    def get(self, key: Hashable) -> Any | None:
+        """Return a cached value and mark it as recently used."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        value, size, expires = entry
+        if expires is not None and expires < time.monotonic():
+            self._remove(key)
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def put(self, key: Hashable, value: Any, size: int) -> None:
+        """Cache a value, evicting least recently used entries to make room."""
+        if not self.fits(size):
+            return
+        
+        if key in self._entries:
+            self._remove(key)
+        
+        while self._entries and self.size + size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+        
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        self._entries[key] = (value, size, expires)
+        self.size += size
+    
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        size_of: Callable[[Any], int] = len,
+    ) -> Any | None:
+        """Return a cached value, loading it at most once for concurrent callers.
+        
+        The load runs in its own task, so a caller that is cancelled, such as
+        a request whose client went away, doesn't fail the others.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        
+        if (task := self._inflight.get(key)) is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task)
+        
+        self.misses += 1
+        task = asyncio.get_running_loop().create_task(self._load(key, loader, size_of))
+        # Everyone may have gone; don't warn about an unretrieved exception
+        task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        self._inflight[key] = task
+        return await asyncio.shield(task)
+    
+    async def _load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        size_of: Callable[[Any], int],
+    ) -> Any | None:
+        """Load a value and cache it."""
+        try:
+            value = await loader()
+        finally:
+            del self._inflight[key]
+        
+        if value is not None:
+            self.put(key, value, size_of(value))
+        return value
+    
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        self._entries.clear()
+        self.size = 0
+    
+    def stats(self) -> dict[str, Any]:
+        """Return cache counters."""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "size": self.size,
+            "max_size": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else None,
+        }
+    
+    def _remove(self, key: Hashable) -> None:
+        """Remove an entry and release its bytes."""
+        _, size, _ = self._entries.pop(key)
+        self.size -= size
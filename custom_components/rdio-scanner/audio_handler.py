@@ -1,47 +1,248 @@
 """Audio handler for serving database BLOBs."""
+from __future__ import annotations
+
+import asyncio
 import logging
+from datetime import datetime, timezone
+from email.utils import format_datetime
 
-from aiohttp import web
+from aiohttp import hdrs, web
 from homeassistant.components.http import HomeAssistantView
 from homeassistant.core import HomeAssistant
 
-from .const import DOMAIN
+from .const import DATA_VIEWS, DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
 
+AUDIO_URL = "/api/rdio_scanner/audio/{entry_id}/{call_id}"
+
+
+def audio_url(entry_id: str, call_id: int) -> str:
+    """Return the audio URL for a call."""
+    return AUDIO_URL.format(entry_id=entry_id, call_id=call_id)
+
 
 class RdioScannerAudioView(HomeAssistantView):
     """Serve audio files from database BLOBs."""
     
-    url = "/api/rdio_scanner/audio/{call_id}"
+    url = AUDIO_URL
+    # Legacy URL without the config entry, resolved through the call index
+    extra_urls = ["/api/rdio_scanner/audio/{call_id}"]
     name = "api:rdio_scanner:audio"
     requires_auth = True
     
-    async def get(self, request: web.Request, call_id: str) -> web.Response:
+    async def get(
+        self, request: web.Request, call_id: str, entry_id: str | None = None
+    ) -> web.StreamResponse:
         """Serve audio file."""
         hass = request.app["hass"]
         
-        # Find the coordinator
-        for entry_id, coordinator in hass.data[DOMAIN].items():
+        try:
+            call_id_int = int(call_id)
+        except ValueError:
+            return web.Response(status=404, text="Audio not found")
+        
+        candidates = self._candidates(hass, entry_id, call_id_int)
+        for coordinator in candidates:
+            # Only a call whose time is known can be told apart from one
+            # that reused its id; anything else is checked against the database
+            disk_cache = coordinator.backend.disk_cache
+            call = coordinator.calls_by_id.get(call_id_int)
+            if disk_cache and call and (
+                cached := disk_cache.lookup(call_id_int, call['dateTime'])
+            ):
+                path, audio_info = cached
+                return await self._stream_audio(
+                    request, coordinator.backend, call_id_int, audio_info, path
+                )
+        
+        for coordinator in candidates:
             try:
-                call_id_int = int(call_id)
-                audio_data = await coordinator.db.get_call_audio(call_id_int)
-                
-                if audio_data:
-                    return web.Response(
-                        body=audio_data['data'],
-                        content_type=audio_data['type'],
-                        headers={
-                            'Content-Disposition': f'inline; filename="{audio_data["name"]}"',
-                            'Cache-Control': 'public, max-age=3600',
-                        }
-                    )
+                audio_info = await coordinator.db.get_call_audio_info(call_id_int)
             except Exception as err:
                 _LOGGER.error("Error getting audio: %s", err)
+                continue
+            
+            if audio_info:
+                return await self._stream_audio(
+                    request, coordinator.backend, call_id_int, audio_info
+                )
         
         return web.Response(status=404, text="Audio not found")
+    
+    @staticmethod
+    def _candidates(hass: HomeAssistant, entry_id: str | None, call_id: int):
+        """Return the coordinators that may hold a call, most likely first."""
+        coordinators = hass.data.get(DOMAIN, {})
+        if entry_id is not None:
+            coordinator = coordinators.get(entry_id)
+            return [coordinator] if coordinator else []
+        
+        # Calls still in a ring buffer route straight to their entry
+        for coordinator in coordinators.values():
+            if call_id in coordinator.calls_by_id:
+                return [coordinator]
+        
+        # Entries on the same database would find the same call
+        return list({id(coordinator.db): coordinator for coordinator in coordinators.values()}.values())
+    
+    async def _stream_audio(
+        self,
+        request: web.Request,
+        backend,
+        call_id: int,
+        audio_info: dict,
+        path: str | None = None,
+    ) -> web.StreamResponse:
+        """Stream the requested byte range of a call's audio.
+        
+        Calls in the disk cache, at path if already looked up, are sent
+        from their file with sendfile, everything else is read from the
+        database, which adds them to the disk cache for the next request.
+        Either way the response carries the same validators.
+        """
+        hass = request.app["hass"]
+        db = backend.db
+        served = db.audio_served
+        served.requests += 1
+        size = audio_info['size']
+        modified = datetime.fromtimestamp(
+            audio_info['dateTime'] // 1000, tz=timezone.utc
+        )
+        # Recordings never change once imported, so the call is its own validator
+        etag = f'"{call_id}-{audio_info["dateTime"]}-{size}"'
+        headers = {
+            hdrs.ACCEPT_RANGES: 'bytes',
+            hdrs.CONTENT_DISPOSITION: f'inline; filename="{audio_info["name"]}"',
+            hdrs.CACHE_CONTROL: 'private, max-age=31536000, immutable',
+            hdrs.ETAG: etag,
+            hdrs.LAST_MODIFIED: format_datetime(modified, usegmt=True),
+        }
+        
+        if _not_modified(request, etag, modified):
+            served.not_modified += 1
+            return web.Response(status=304, headers=headers)
+        
+        start, end = 0, size
+        status = 200
+        
+        # A stale If-Range validator means the client gets the whole file
+        if_range = request.headers.get(hdrs.IF_RANGE)
+        if hdrs.RANGE in request.headers and if_range in (
+            None, etag, headers[hdrs.LAST_MODIFIED]
+        ):
+            try:
+                byte_range = request.http_range
+            except ValueError:
+                byte_range = None
+            
+            byte_range = _resolve_range(byte_range, size)
+            if byte_range is None:
+                headers[hdrs.CONTENT_RANGE] = f'bytes */{size}'
+                return web.Response(status=416, headers=headers)
+            
+            start, end = byte_range
+            if (start, end) != (0, size):
+                served.partial += 1
+                status = 206
+                headers[hdrs.CONTENT_RANGE] = f'bytes {start}-{end - 1}/{size}'
+        
+        if path is None and backend.disk_cache:
+            path = backend.disk_cache.get(call_id, audio_info['dateTime'])
+            if path is None:
+                backend.async_spill(call_id, audio_info['dateTime'])
+        # sendfile can't send nothing
+        if path is not None and end > start:
+            try:
+                file = await hass.async_add_executor_job(open, path, "rb")
+            except FileNotFoundError:
+                # Evicted since the lookup
+                pass
+            else:
+                served.bytes += end - start
+                return _CachedFileResponse(
+                    file, start, end, audio_info['type'], status, headers
+                )
+        
+        response = web.StreamResponse(status=status, headers=headers)
+        response.content_type = audio_info['type']
+        response.content_length = end - start
+        await response.prepare(request)
+        
+        async for chunk in db.iter_call_audio(call_id, start, end, size=size):
+            await response.write(chunk)
+            served.bytes += len(chunk)
+        
+        await response.write_eof()
+        return response
+
+
+class _CachedFileResponse(web.FileResponse):
+    """Send a byte range of an open disk cached file with sendfile.
+    
+    The view has already answered conditional and range requests with the
+    call's own validators, so FileResponse's checks, which would derive
+    new ones from the file, are skipped.
+    """
+    
+    def __init__(
+        self, file, start: int, end: int, content_type: str, status: int, headers: dict
+    ) -> None:
+        """Initialize the response; it takes ownership of file."""
+        super().__init__(file.name, status=status, headers=headers)
+        self._file = file
+        self._range = (start, end)
+        self.content_type = content_type
+        self.content_length = end - start
+    
+    async def prepare(self, request: web.BaseRequest):
+        """Send the range, then close the file."""
+        start, end = self._range
+        loop = asyncio.get_running_loop()
+        try:
+            return await self._sendfile(request, self._file, start, end - start)
+        finally:
+            await asyncio.shield(loop.run_in_executor(None, self._file.close))
+
+
+def _not_modified(request: web.Request, etag: str, modified: datetime) -> bool:
+    """Return True if the client's cached copy is still valid."""
+    if_none_match = request.headers.get(hdrs.IF_NONE_MATCH)
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return '*' in tags or etag in tags
+    
+    if_modified_since = request.if_modified_since
+    return if_modified_since is not None and modified <= if_modified_since
+
+
+def _resolve_range(byte_range, size: int):
+    """Turn a parsed Range header into (start, end), or None if unsatisfiable."""
+    if byte_range is None:
+        return None
+    
+    start, end = byte_range.start, byte_range.stop
+    if start is None and end is None:
+        return 0, size
+    
+    if start is not None and start < 0:
+        # Suffix range: the last N bytes
+        start, end = max(size + start, 0), size
+    
+    start = start or 0
+    end = size if end is None else min(end, size)
+    if start >= end:
+        return None
+    
+    return start, end
 
 
 def setup_audio_endpoint(hass: HomeAssistant):
-    """Set up audio endpoint."""
-    hass.http.register_view(RdioScannerAudioView())
+    """Set up audio endpoint and the call stream."""
+    from .stream import RdioScannerStreamView
+    
+    views = hass.data.setdefault(DATA_VIEWS, set())
+    for view in (RdioScannerAudioView, RdioScannerStreamView):
+        if view.name not in views:
+            hass.http.register_view(view())
+            views.add(view.name)
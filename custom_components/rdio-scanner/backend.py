@@ -0,0 +1,296 @@
+"""Database backend shared by config entries for Rdio-Scanner."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PATH
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import (
+    BACKEND_RECENT_CALLS,
+    CATALOG_SHARE_TIME,
+    CHANGE_CHECK_INTERVAL,
+    CONF_DISK_CACHE_SIZE,
+    CONF_DISK_CACHE_TALKGROUPS,
+    CONF_SIDECAR,
+    DATA_BACKENDS,
+    DEFAULT_DISK_CACHE_SIZE,
+    DEFAULT_SIDECAR,
+    DOMAIN,
+    SIDECAR_SYNC_BATCH,
+)
+from .disk_cache import AudioDiskCache
+from .events import parse_talkgroup_selection
+from .rdio_db import RdioScannerDB
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def database_path(entry: ConfigEntry) -> str:
+    """Return the path of an entry's rdio-scanner.db."""
+    return os.path.join(entry.data[CONF_PATH], "rdio-scanner.db")
+
+
+def sidecar_path(hass: HomeAssistant, db_path: str) -> str:
+    """Return the call index path for a resolved database path."""
+    digest = hashlib.sha1(db_path.encode()).hexdigest()[:16]
+    return hass.config.path(DOMAIN, f"index_{digest}.db")
+
+
+def disk_cache_path(hass: HomeAssistant, db_path: str) -> str:
+    """Return the audio disk cache directory for a resolved database path."""
+    digest = hashlib.sha1(db_path.encode()).hexdigest()[:16]
+    return hass.config.path(DOMAIN, f"audio_{digest}")
+
+
+async def async_get_backend(hass: HomeAssistant, entry: ConfigEntry) -> RdioScannerBackend:
+    """Return the backend for an entry's database, creating it for the first entry."""
+    path = await hass.async_add_executor_job(os.path.realpath, database_path(entry))
+    backends: Dict[str, RdioScannerBackend] = hass.data.setdefault(DATA_BACKENDS, {})
+    
+    backend = backends.get(path)
+    if backend is None:
+        backend = backends[path] = RdioScannerBackend(hass, path, entry)
+        if backend.disk_cache:
+            await backend.disk_cache.async_load()
+    backend.entries.add(entry.entry_id)
+    return backend
+
+
+async def async_release_backend(
+    hass: HomeAssistant, backend: RdioScannerBackend, entry_id: str
+) -> None:
+    """Release an entry's hold on a backend, closing it after the last entry."""
+    backend.entries.discard(entry_id)
+    if backend.entries:
+        return
+    
+    hass.data[DATA_BACKENDS].pop(backend.path, None)
+    await backend.async_close()
+
+
+class RdioScannerBackend:
+    """One database's connections, audio cache, call index and change detection.
+    
+    Config entries on the same rdio-scanner.db share a backend, so another
+    entry costs no extra connections or cache memory. New calls are read
+    once per change into a short buffer that every entry's coordinator
+    takes its own new calls from, and entries loading their catalogs
+    together share one scan. The options of the entry that created the
+    backend set its audio caches and call index.
+    """
+    
+    def __init__(self, hass: HomeAssistant, path: str, entry: ConfigEntry) -> None:
+        """Initialize the backend."""
+        self.hass = hass
+        self.path = path
+        self.entries: Set[str] = set()
+        index = None
+        if entry.options.get(CONF_SIDECAR, DEFAULT_SIDECAR):
+            index = sidecar_path(hass, path)
+        self.db = RdioScannerDB({**entry.data, **entry.options}, index)
+        
+        self.disk_cache: Optional[AudioDiskCache] = None
+        disk_cache_size = entry.options.get(CONF_DISK_CACHE_SIZE, DEFAULT_DISK_CACHE_SIZE)
+        if disk_cache_size:
+            self.disk_cache = AudioDiskCache(
+                hass, disk_cache_path(hass, path), disk_cache_size * 1024 * 1024
+            )
+        # Talkgroups extracted to the disk cache as their calls arrive
+        selection = entry.options.get(CONF_DISK_CACHE_TALKGROUPS)
+        self._spill_all = selection == "all"
+        self._spill_systems, self._spill_talkgroups = parse_talkgroup_selection(selection)
+        
+        # Newest calls read, oldest first. Every call newer than _floor is in it
+        self._recent: deque = deque()
+        self._floor: Optional[Tuple[int, int]] = None
+        self._last_seen: Optional[Tuple[int, int]] = None
+        self._fetch_lock = asyncio.Lock()
+        
+        self._catalog: Optional[Tuple[List[Any], Dict[int, str], int]] = None
+        self._catalog_loaded = 0.0
+        self._catalog_lock = asyncio.Lock()
+        
+        self._watchers: Set[Any] = set()
+        self._unsub_watch: Optional[CALLBACK_TYPE] = None
+        self._data_version = None
+        self._checking = False
+        
+        self._build_task: Optional[asyncio.Task] = None
+        if self.db.sidecar:
+            self._build_task = hass.async_create_background_task(
+                self._async_build_sidecar(), f"{DOMAIN} call index build"
+            )
+    
+    async def async_close(self) -> None:
+        """Stop background work and close the database."""
+        if self._unsub_watch:
+            self._unsub_watch()
+            self._unsub_watch = None
+        if self._build_task:
+            self._build_task.cancel()
+        if self.disk_cache:
+            await self.disk_cache.async_close()
+        await self.db.close()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return what the backend is shared by and holds."""
+        return {
+            "entries": len(self.entries),
+            "watchers": len(self._watchers),
+            "buffered_calls": len(self._recent),
+            "catalog_age": (
+                round(time.monotonic() - self._catalog_loaded) if self._catalog else None
+            ),
+        }
+    
+    @callback
+    def async_spill(self, call_id: int, date_time: int) -> None:
+        """Extract a played call to the disk cache, if there is one."""
+        if self.disk_cache:
+            self.disk_cache.async_add(self.db, call_id, date_time)
+    
+    async def async_get_calls_since(
+        self, last_seen: Tuple[int, int], limit: int
+    ) -> List[Any]:
+        """Get calls newer than the (dateTime, id) mark, oldest first, at most the newest limit.
+        
+        Served from the shared buffer when it reaches back to last_seen,
+        otherwise from the database.
+        """
+        async with self._fetch_lock:
+            await self._async_read_new_calls()
+        
+        if self._floor is not None and last_seen >= self._floor:
+            calls = [
+                call for call in self._recent if (call['dateTime'], call['id']) > last_seen
+            ]
+            return calls[-limit:]
+        
+        calls = []
+        date_time, call_id = last_seen
+        while True:
+            batch = await self.db.get_calls_since(date_time, call_id, limit=limit)
+            if batch:
+                date_time, call_id = batch[-1]['dateTime'], batch[-1]['id']
+                # Only the newest calls fit in the window
+                calls = (calls + batch)[-limit:]
+            if len(batch) < limit:
+                return calls
+    
+    async def async_get_catalog(self) -> Tuple[List[Any], Dict[int, str], int]:
+        """Get per-talkgroup catalog rows, system labels and the last call id they count.
+        
+        The calls table is scanned at most once per CATALOG_SHARE_TIME.
+        """
+        async with self._catalog_lock:
+            if (
+                self._catalog is None
+                or time.monotonic() - self._catalog_loaded > CATALOG_SHARE_TIME
+            ):
+                system_labels = await self.db.get_system_labels()
+                # Bound the scan so calls written while it runs are known to be left out
+                max_id = await self.db.get_max_call_id()
+                rows = await self.db.get_catalog(max_id)
+                self._catalog = (rows, system_labels, max_id)
+                self._catalog_loaded = time.monotonic()
+            return self._catalog
+    
+    @callback
+    def async_watch(self, coordinator) -> CALLBACK_TYPE:
+        """Refresh a coordinator whenever the database changes."""
+        self._watchers.add(coordinator)
+        if self._unsub_watch is None:
+            self._unsub_watch = async_track_time_interval(
+                self.hass, self._async_check_database, CHANGE_CHECK_INTERVAL
+            )
+        
+        @callback
+        def async_unwatch() -> None:
+            self._watchers.discard(coordinator)
+            if not self._watchers and self._unsub_watch:
+                self._unsub_watch()
+                self._unsub_watch = None
+                self._data_version = None
+        
+        return async_unwatch
+    
+    async def _async_check_database(self, now=None) -> None:
+        """Request a refresh if another connection committed since the last check."""
+        if self._checking:
+            return
+        
+        self._checking = True
+        try:
+            version = await self.db.get_data_version()
+        except Exception as err:
+            _LOGGER.debug("Error checking database version: %s", err)
+            return
+        finally:
+            self._checking = False
+        
+        if self._data_version is not None and version != self._data_version:
+            for coordinator in list(self._watchers):
+                await coordinator.async_request_refresh()
+        self._data_version = version
+    
+    async def _async_read_new_calls(self) -> None:
+        """Read calls committed since the last read into the shared buffer."""
+        db = self.db
+        await db.connect()
+        if db.use_sidecar:
+            await db.sync_sidecar()
+        
+        if self._last_seen is None:
+            # Start from the newest call; entries load their history themselves
+            newest = await db.get_recent_calls(limit=1)
+            self._last_seen = (newest[0]['dateTime'], newest[0]['id']) if newest else (0, 0)
+            self._floor = self._last_seen
+            return
+        
+        while True:
+            batch = await db.get_calls_since(*self._last_seen, limit=BACKEND_RECENT_CALLS)
+            for call in batch:
+                if len(self._recent) == BACKEND_RECENT_CALLS:
+                    evicted = self._recent.popleft()
+                    self._floor = (evicted['dateTime'], evicted['id'])
+                self._recent.append(call)
+            if self.disk_cache and batch:
+                self.disk_cache.async_add_calls(
+                    self.db, [call for call in batch if self._spill_new(call)]
+                )
+            if batch:
+                self._last_seen = (batch[-1]['dateTime'], batch[-1]['id'])
+            if len(batch) < BACKEND_RECENT_CALLS:
+                return
+    
+    def _spill_new(self, call: Any) -> bool:
+        """Return True if a new call is on a talkgroup extracted on arrival."""
+        return (
+            self._spill_all
+            or call['system'] in self._spill_systems
+            or (call['system'], call['talkgroup']) in self._spill_talkgroups
+            or (None, call['talkgroup']) in self._spill_talkgroups
+        )
+    
+    async def _async_build_sidecar(self) -> None:
+        """Build the sidecar index in bounded batches, then switch queries to it."""
+        sidecar = self.db.sidecar
+        while not sidecar.ready:
+            try:
+                await self.db.sync_sidecar(max_rows=SIDECAR_SYNC_BATCH)
+            except Exception as err:
+                _LOGGER.error("Error building call index %s: %s", sidecar.path, err)
+                return
+            # Let coordinator refreshes in between batches
+            await asyncio.sleep(0)
+        
+        _LOGGER.debug("Call index %s is up to date", sidecar.path)
@@ -0,0 +1,164 @@
+"""Binary sensor platform for Rdio-Scanner."""
+from __future__ import annotations
+
+import logging
+
+from homeassistant.components.binary_sensor import BinarySensorEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_NAME
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import (
+    CONF_TALKGROUP_ENTITIES,
+    DEFAULT_TALKGROUP_ENTITIES,
+    DOMAIN,
+    SIGNAL_TALKGROUP_ACTIVE,
+    SIGNAL_TALKGROUP_SURGE,
+)
+from .entity import (
+    RdioScannerTalkgroupEntity,
+    async_add_talkgroup_entities,
+    talkgroup_signal,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up Rdio-Scanner binary sensors."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    
+    if coordinator.surges:
+        async_add_entities([RdioScannerSurge(coordinator, config_entry)])
+    
+    if not config_entry.options.get(CONF_TALKGROUP_ENTITIES, DEFAULT_TALKGROUP_ENTITIES):
+        return
+    
+    def talkgroup_binary_sensors(talkgroup, calls):
+        entities = [RdioScannerTalkgroupActive(coordinator, config_entry, talkgroup, calls)]
+        if coordinator.surges:
+            entities.append(
+                RdioScannerTalkgroupSurge(coordinator, config_entry, talkgroup, calls)
+            )
+        return entities
+    
+    async_add_talkgroup_entities(
+        hass, config_entry, coordinator, async_add_entities, talkgroup_binary_sensors
+    )
+
+
+class RdioScannerSurge(CoordinatorEntity, BinarySensorEntity):
+    """Binary sensor that is on while any talkgroup is surging."""
+    
+    _attr_icon = "mdi:chart-bell-curve-cumulative"
+    
+    def __init__(self, coordinator, config_entry: ConfigEntry) -> None:
+        """Initialize the binary sensor."""
+        super().__init__(coordinator)
+        self._attr_name = f"{config_entry.data.get(CONF_NAME)} Surge"
+        self._attr_unique_id = f"{config_entry.entry_id}_surge"
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, config_entry.entry_id)},
+            "name": config_entry.data.get(CONF_NAME, "Rdio-Scanner"),
+            "manufacturer": "Rdio-Scanner",
+            "model": "Radio Scanner",
+        }
+    
+    @property
+    def is_on(self) -> bool:
+        """Return True while a talkgroup is surging."""
+        return bool(self.coordinator.surges.talkgroups)
+    
+    @property
+    def extra_state_attributes(self):
+        """Return the surging talkgroups."""
+        talkgroups = []
+        for system_id, talkgroup_id in self.coordinator.surges.talkgroups:
+            talkgroup = self.coordinator.catalog.get_talkgroup(system_id, talkgroup_id)
+            talkgroups.append(talkgroup['name'] if talkgroup else f"TG {talkgroup_id}")
+        return {"surging_talkgroups": sorted(talkgroups)}
+
+
+class RdioScannerTalkgroupActive(RdioScannerTalkgroupEntity, BinarySensorEntity):
+    """Binary sensor that is on while a talkgroup has a call in progress."""
+    
+    _attr_icon = "mdi:radio-tower"
+    
+    def __init__(self, coordinator, config_entry: ConfigEntry, talkgroup, calls) -> None:
+        """Initialize the binary sensor."""
+        super().__init__(coordinator, config_entry, talkgroup, calls, "active", "Active")
+    
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to activity changes from the active call tracker."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                talkgroup_signal(
+                    self.config_entry.entry_id,
+                    self.system_id,
+                    self.talkgroup_id,
+                    SIGNAL_TALKGROUP_ACTIVE,
+                ),
+                self.async_write_ha_state,
+            )
+        )
+    
+    @property
+    def is_on(self) -> bool:
+        """Return True while a call is in progress."""
+        return self.coordinator.active_calls.is_active((self.system_id, self.talkgroup_id))
+    
+    def _update_from_calls(self, calls) -> bool:
+        """Activity comes from the tracker, not from new calls."""
+        return False
+
+
+class RdioScannerTalkgroupSurge(RdioScannerTalkgroupEntity, BinarySensorEntity):
+    """Binary sensor that is on while a talkgroup is much busier than usual."""
+    
+    _attr_icon = "mdi:chart-bell-curve-cumulative"
+    
+    def __init__(self, coordinator, config_entry: ConfigEntry, talkgroup, calls) -> None:
+        """Initialize the binary sensor."""
+        super().__init__(coordinator, config_entry, talkgroup, calls, "surge", "Surge")
+    
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to surge changes from the detector."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                talkgroup_signal(
+                    self.config_entry.entry_id,
+                    self.system_id,
+                    self.talkgroup_id,
+                    SIGNAL_TALKGROUP_SURGE,
+                ),
+                self.async_write_ha_state,
+            )
+        )
+    
+    @property
+    def is_on(self) -> bool:
+        """Return True while the talkgroup is surging."""
+        return self.coordinator.surges.is_surging((self.system_id, self.talkgroup_id))
+    
+    @property
+    def extra_state_attributes(self):
+        """Return the recent and usual rates with the talkgroup attributes."""
+        return {
+            **self._attr_extra_state_attributes,
+            **self.coordinator.surges.activity((self.system_id, self.talkgroup_id)),
+        }
+    
+    def _update_from_calls(self, calls) -> bool:
+        """Surges come from the detector, not from new calls."""
+        return False
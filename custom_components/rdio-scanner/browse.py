@@ -0,0 +1,236 @@
+"""Media browsing for Rdio-Scanner."""
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from homeassistant.components.media_player import BrowseMedia, MediaClass, MediaType
+from homeassistant.components.media_player.errors import BrowseError
+from homeassistant.util import dt as dt_util
+
+from .const import BROWSE_CACHED_TALKGROUPS, BROWSE_PAGE_SIZE, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+# Content types of the directory levels
+TYPE_SYSTEM = f"{DOMAIN}_system"
+TYPE_TALKGROUP = f"{DOMAIN}_talkgroup"
+TYPE_DAY = f"{DOMAIN}_day"
+
+
+class RdioScannerBrowser:
+    """Browse calls by system, talkgroup and day.
+    
+    Each level is built only when it is opened. Systems and talkgroups come
+    from the coordinator's catalog, limited to the entry's talkgroups. Calls
+    per day are counted with one grouped query per talkgroup when it is
+    opened, kept for the most recently opened talkgroups and incremented
+    from new calls. A day lists its calls a page at a time, each page
+    seeking from the last call of the previous one.
+    """
+    
+    def __init__(self, coordinator) -> None:
+        """Initialize the browser."""
+        self.coordinator = coordinator
+        # (system, talkgroup) -> {local date: calls}, least recently opened first
+        self._days: OrderedDict[Tuple[int, int], Dict[date, int]] = OrderedDict()
+    
+    def add_calls(self, calls: Iterable[Any]) -> None:
+        """Count new calls in the days of talkgroups that are loaded."""
+        for call in calls:
+            days = self._days.get((call['system'], call['talkgroup']))
+            if days is not None:
+                day = _local_date(call['dateTime'])
+                days[day] = days.get(day, 0) + 1
+    
+    async def async_browse(
+        self, media_content_type: Optional[str], media_content_id: Optional[str]
+    ) -> BrowseMedia:
+        """Return the directory for a media content id."""
+        try:
+            if media_content_type == TYPE_SYSTEM:
+                return self._browse_system(int(media_content_id))
+            if media_content_type == TYPE_TALKGROUP:
+                system_id, talkgroup_id = map(int, media_content_id.split("/"))
+                return await self._async_browse_talkgroup(system_id, talkgroup_id)
+            if media_content_type == TYPE_DAY:
+                return await self._async_browse_day(media_content_id)
+        except ValueError as err:
+            raise BrowseError(f"Invalid media id: {media_content_id}") from err
+        
+        return self._browse_root()
+    
+    def _browse_root(self) -> BrowseMedia:
+        """Return the systems."""
+        calls: Dict[int, int] = {}
+        for talkgroup in self.coordinator.catalog.talkgroups:
+            calls[talkgroup['system']] = calls.get(talkgroup['system'], 0) + talkgroup['calls']
+        
+        return BrowseMedia(
+            media_class=MediaClass.DIRECTORY,
+            media_content_id="",
+            media_content_type=DOMAIN,
+            title="Rdio-Scanner",
+            can_play=False,
+            can_expand=True,
+            children_media_class=MediaClass.DIRECTORY,
+            children=[
+                _directory(
+                    TYPE_SYSTEM,
+                    str(system['id']),
+                    _with_count(system['name'], calls.get(system['id'], 0)),
+                )
+                for system in self.coordinator.catalog.systems
+            ],
+        )
+    
+    def _browse_system(self, system_id: int) -> BrowseMedia:
+        """Return the talkgroups of a system."""
+        system = self.coordinator.catalog.get_system(system_id)
+        if system is None:
+            raise BrowseError(f"System {system_id} not found")
+        
+        talkgroups = sorted(
+            (
+                talkgroup
+                for talkgroup in self.coordinator.catalog.talkgroups
+                if talkgroup['system'] == system_id
+            ),
+            key=lambda talkgroup: talkgroup['name'].lower(),
+        )
+        return _directory(
+            TYPE_SYSTEM,
+            str(system_id),
+            system['name'],
+            [
+                _directory(
+                    TYPE_TALKGROUP,
+                    f"{system_id}/{talkgroup['id']}",
+                    _with_count(talkgroup['name'], talkgroup['calls']),
+                )
+                for talkgroup in talkgroups
+            ],
+        )
+    
+    def _get_talkgroup(self, system_id: int, talkgroup_id: int) -> Dict[str, Any]:
+        """Return a talkgroup of the entry's view from the catalog."""
+        talkgroup = self.coordinator.catalog.get_talkgroup(system_id, talkgroup_id)
+        if talkgroup is None or not self.coordinator.in_view(system_id, talkgroup_id):
+            raise BrowseError(f"Talkgroup {talkgroup_id} not found")
+        return talkgroup
+    
+    async def _async_browse_talkgroup(self, system_id: int, talkgroup_id: int) -> BrowseMedia:
+        """Return the days with calls on a talkgroup, newest first."""
+        talkgroup = self._get_talkgroup(system_id, talkgroup_id)
+        days = await self._async_get_days(system_id, talkgroup_id)
+        return _directory(
+            TYPE_TALKGROUP,
+            f"{system_id}/{talkgroup_id}",
+            talkgroup['name'],
+            [
+                _directory(
+                    TYPE_DAY,
+                    f"{system_id}/{talkgroup_id}/{day.isoformat()}",
+                    _with_count(day.strftime("%a %d %b %Y"), days[day]),
+                )
+                for day in sorted(days, reverse=True)
+            ],
+        )
+    
+    async def _async_browse_day(self, media_content_id: str) -> BrowseMedia:
+        """Return one page of a day's calls on a talkgroup, newest first."""
+        system_id, talkgroup_id, day, *cursor = media_content_id.split("/")
+        if len(cursor) not in (0, 2):
+            raise ValueError(media_content_id)
+        system_id, talkgroup_id = int(system_id), int(talkgroup_id)
+        talkgroup = self._get_talkgroup(system_id, talkgroup_id)
+        day = date.fromisoformat(day)
+        before = (int(cursor[0]), int(cursor[1])) if cursor else None
+        
+        start = dt_util.start_of_local_day(day)
+        end = dt_util.start_of_local_day(day + timedelta(days=1))
+        calls = await self.coordinator.db.get_calls_page(
+            before,
+            BROWSE_PAGE_SIZE + 1,
+            systems=[system_id],
+            talkgroups=[talkgroup_id],
+            start=int(start.timestamp() * 1000),
+            end=int(end.timestamp() * 1000),
+        )
+        
+        more = len(calls) > BROWSE_PAGE_SIZE
+        calls = calls[:BROWSE_PAGE_SIZE]
+        children = [_call(call) for call in calls]
+        if more:
+            last = calls[-1]
+            children.append(
+                _directory(
+                    TYPE_DAY,
+                    f"{system_id}/{talkgroup_id}/{day.isoformat()}/{last['dateTime']}/{last['id']}",
+                    "Older calls",
+                )
+            )
+        
+        return _directory(
+            TYPE_DAY,
+            media_content_id,
+            f"{talkgroup['name']} {day.strftime('%a %d %b %Y')}",
+            children,
+        )
+    
+    async def _async_get_days(self, system_id: int, talkgroup_id: int) -> Dict[date, int]:
+        """Return calls per local day on a talkgroup, counting them on first use."""
+        key = (system_id, talkgroup_id)
+        if (days := self._days.get(key)) is not None:
+            self._days.move_to_end(key)
+            return days
+        
+        days = {}
+        for row in await self.coordinator.db.get_talkgroup_quarter_hours(system_id, talkgroup_id):
+            day = _local_date(row['quarter'] * 900000)
+            days[day] = days.get(day, 0) + row['calls']
+        
+        self._days[key] = days
+        if len(self._days) > BROWSE_CACHED_TALKGROUPS:
+            self._days.popitem(last=False)
+        return days
+
+
+def _local_date(date_time: int) -> date:
+    """Return the local date of a dateTime in milliseconds."""
+    return dt_util.as_local(datetime.fromtimestamp(date_time / 1000, tz=timezone.utc)).date()
+
+
+def _with_count(title: str, calls: int) -> str:
+    """Append a call count to a title."""
+    return f"{title} ({calls:,} call{'' if calls == 1 else 's'})"
+
+
+def _directory(
+    media_content_type: str, media_content_id: str, title: str, children=None
+) -> BrowseMedia:
+    """Return a directory node, with its children if it is the one being browsed."""
+    return BrowseMedia(
+        media_class=MediaClass.DIRECTORY,
+        media_content_id=media_content_id,
+        media_content_type=media_content_type,
+        title=title,
+        can_play=False,
+        can_expand=True,
+        children=children,
+    )
+
+
+def _call(call) -> BrowseMedia:
+    """Return a playable call node."""
+    started = dt_util.as_local(datetime.fromtimestamp(call['dateTime'] / 1000, tz=timezone.utc))
+    return BrowseMedia(
+        media_class=MediaClass.TRACK,
+        media_content_id=str(call['id']),
+        media_content_type=MediaType.MUSIC,
+        title=f"{started:%H:%M:%S} ({call['call_length'] or 0:.0f}s)",
+        can_play=True,
+        can_expand=False,
+    )
@@ -0,0 +1,209 @@
+"""Call records for Rdio-Scanner."""
+from __future__ import annotations
+
+import json
+from collections.abc import Mapping
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Iterator, Optional
+
+# Columns selected for a call, in RdioScannerCall.from_row order
+CALL_COLUMNS = """
+    id,
+    dateTime,
+    system,
+    talkgroup,
+    frequency,
+    frequencies,
+    patches,
+    sources,
+    len as call_length,
+    talkgroupData
+"""
+
+
+@lru_cache(maxsize=4096)
+def parse_talkgroup_data(raw: Optional[str]) -> Optional[tuple]:
+    """Parse talkgroupData JSON into (label, tag, group).
+    
+    Thousands of calls share a few hundred distinct values, so results are
+    memoized by the raw string. Returns None if raw is not valid JSON.
+    """
+    try:
+        tg_data = json.loads(raw)
+    except (TypeError, ValueError):
+        return None
+    
+    if not isinstance(tg_data, dict):
+        return None
+    
+    return tg_data.get('label'), tg_data.get('tag', ''), tg_data.get('group', '')
+
+
+def _parse_list(raw: Any) -> list:
+    """Parse a JSON array column."""
+    if not raw:
+        return []
+    
+    try:
+        value = json.loads(raw)
+    except (TypeError, ValueError):
+        return []
+    
+    return value if isinstance(value, list) else []
+
+
+class RdioScannerCall(Mapping):
+    """A call row whose JSON columns are decoded on first access.
+    
+    Also behaves as a read-only mapping with the keys of the old call dicts,
+    so call['talkgroup_name'] and call.get('timestamp') keep working.
+    """
+    
+    __slots__ = (
+        "id",
+        "dateTime",
+        "system",
+        "talkgroup",
+        "frequency",
+        "call_length",
+        "_frequencies",
+        "_patches",
+        "_sources",
+        "talkgroupData",
+    )
+    
+    KEYS = (
+        "id",
+        "dateTime",
+        "system",
+        "talkgroup",
+        "frequency",
+        "frequencies",
+        "patches",
+        "sources",
+        "call_length",
+        "talkgroupData",
+        "talkgroup_name",
+        "talkgroup_tag",
+        "talkgroup_group",
+        "timestamp",
+    )
+    
+    def __init__(
+        self,
+        id: int,
+        dateTime: int,
+        system: int,
+        talkgroup: int,
+        frequency: Optional[int],
+        frequencies: Any,
+        patches: Any,
+        sources: Any,
+        call_length: Optional[int],
+        talkgroupData: Optional[str],
+    ) -> None:
+        """Initialize from raw column values."""
+        self.id = id
+        self.dateTime = dateTime
+        self.system = system
+        self.talkgroup = talkgroup
+        self.frequency = frequency
+        self.call_length = call_length
+        # JSON columns hold the raw string until first access
+        self._frequencies = frequencies
+        self._patches = patches
+        self._sources = sources
+        self.talkgroupData = talkgroupData
+    
+    @classmethod
+    def from_row(cls, cursor, row: tuple) -> RdioScannerCall:
+        """Row factory for queries selecting CALL_COLUMNS."""
+        return cls(*row)
+    
+    @property
+    def frequencies(self) -> list:
+        """Return the frequencies used during the call."""
+        if not isinstance(self._frequencies, list):
+            self._frequencies = _parse_list(self._frequencies)
+        return self._frequencies
+    
+    @property
+    def patches(self) -> list:
+        """Return the patched talkgroups."""
+        if not isinstance(self._patches, list):
+            self._patches = _parse_list(self._patches)
+        return self._patches
+    
+    @property
+    def sources(self) -> list:
+        """Return the unit sources."""
+        if not isinstance(self._sources, list):
+            self._sources = _parse_list(self._sources)
+        return self._sources
+    
+    @property
+    def talkgroup_name(self) -> Optional[str]:
+        """Return the talkgroup label, or None without talkgroupData."""
+        if not self.talkgroupData:
+            return None
+        tg_data = parse_talkgroup_data(self.talkgroupData)
+        if tg_data and tg_data[0]:
+            return tg_data[0]
+        return f"TG {self.talkgroup}"
+    
+    @property
+    def talkgroup_tag(self) -> Optional[str]:
+        """Return the talkgroup tag."""
+        tg_data = parse_talkgroup_data(self.talkgroupData) if self.talkgroupData else None
+        return tg_data[1] if tg_data else None
+    
+    @property
+    def talkgroup_group(self) -> Optional[str]:
+        """Return the talkgroup group."""
+        tg_data = parse_talkgroup_data(self.talkgroupData) if self.talkgroupData else None
+        return tg_data[2] if tg_data else None
+    
+    @property
+    def timestamp(self) -> Optional[str]:
+        """Return the call time as a local ISO timestamp."""
+        if not self.dateTime:
+            return None
+        return datetime.fromtimestamp(self.dateTime / 1000).isoformat()
+    
+    def __getitem__(self, key: str) -> Any:
+        """Return a field by its call dict key."""
+        if key not in self.KEYS:
+            raise KeyError(key)
+        value = getattr(self, key)
+        # Labels and the timestamp were only present in call dicts when known
+        if value is None and key in ("talkgroup_name", "talkgroup_tag", "talkgroup_group", "timestamp"):
+            raise KeyError(key)
+        return value
+    
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the keys that are present."""
+        return (key for key in self.KEYS if key in self)
+    
+    def __contains__(self, key: object) -> bool:
+        """Return True if the key is present."""
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+    
+    def __len__(self) -> int:
+        """Return the number of keys present."""
+        return sum(1 for _ in self)
+    
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON-serializable dict of all fields."""
+        return {key: self[key] for key in self}
+    
+    def __repr__(self) -> str:
+        """Return a short representation."""
+        return (
+            f"<RdioScannerCall id={self.id} system={self.system} "
+            f"talkgroup={self.talkgroup} dateTime={self.dateTime}>"
+        )
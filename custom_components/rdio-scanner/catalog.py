@@ -0,0 +1,149 @@
+"""Systems and talkgroups catalog for Rdio-Scanner."""
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from .calls import parse_talkgroup_data
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RdioScannerCatalog:
+    """Systems and talkgroups seen in the database, kept up to date from new calls."""
+    
+    def __init__(self) -> None:
+        """Initialize an empty catalog."""
+        self.loaded = False
+        self._system_labels: Dict[int, str] = {}
+        self._systems: Dict[int, Dict[str, Any]] = {}
+        self._talkgroups: Dict[tuple, Dict[str, Any]] = {}
+        self._systems_list: Optional[List[Dict[str, Any]]] = None
+        self._talkgroups_list: Optional[List[Dict[str, Any]]] = None
+    
+    @property
+    def systems(self) -> List[Dict[str, Any]]:
+        """Return all systems, ordered by id."""
+        if self._systems_list is None:
+            self._systems_list = [
+                self._systems[system_id] for system_id in sorted(self._systems)
+            ]
+        return self._systems_list
+    
+    @property
+    def talkgroups(self) -> List[Dict[str, Any]]:
+        """Return all talkgroups, ordered by talkgroup then system."""
+        if self._talkgroups_list is None:
+            self._talkgroups_list = [
+                self._talkgroups[key]
+                for key in sorted(self._talkgroups, key=lambda key: (key[1], key[0]))
+            ]
+        return self._talkgroups_list
+    
+    def get_system(self, system_id: int) -> Optional[Dict[str, Any]]:
+        """Return a system by id."""
+        return self._systems.get(system_id)
+    
+    def get_talkgroup(self, system_id: int, talkgroup_id: int) -> Optional[Dict[str, Any]]:
+        """Return a talkgroup by system and talkgroup id."""
+        return self._talkgroups.get((system_id, talkgroup_id))
+    
+    def load(self, rows: Iterable, system_labels: Dict[int, str]) -> None:
+        """Replace the catalog with per-talkgroup aggregates from a full scan."""
+        self._system_labels = system_labels
+        self._systems = {}
+        self._talkgroups = {}
+        
+        for row in rows:
+            talkgroup = self._add_talkgroup(row['system'], row['talkgroup'])
+            talkgroup.update(_talkgroup_labels(row['talkgroupData']))
+            talkgroup['calls'] = row['calls']
+            talkgroup['last_call'] = row['last_call']
+        
+        self.loaded = True
+        self._invalidate()
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the catalog as JSON serializable data."""
+        return {
+            "system_labels": {str(system_id): label for system_id, label in self._system_labels.items()},
+            "talkgroups": [dict(talkgroup) for talkgroup in self._talkgroups.values()],
+        }
+    
+    def restore(self, data: Dict[str, Any]) -> None:
+        """Replace the catalog with a snapshot."""
+        self._system_labels = {
+            int(system_id): label for system_id, label in data["system_labels"].items()
+        }
+        self._systems = {}
+        self._talkgroups = {}
+        
+        for saved in data["talkgroups"]:
+            self._add_talkgroup(saved['system'], saved['id']).update(saved)
+        
+        self.loaded = True
+        self._invalidate()
+    
+    def add_calls(self, calls: Iterable[Dict[str, Any]]) -> bool:
+        """Update the catalog from new calls. Return True if its membership changed."""
+        changed = False
+        for call in calls:
+            key = (call['system'], call['talkgroup'])
+            talkgroup = self._talkgroups.get(key)
+            if talkgroup is None:
+                talkgroup = self._add_talkgroup(*key)
+                changed = True
+            
+            if call.get('talkgroup_name'):
+                labels = {
+                    'name': call['talkgroup_name'],
+                    'tag': call.get('talkgroup_tag', ''),
+                    'group': call.get('talkgroup_group', ''),
+                }
+                if any(talkgroup.get(field) != value for field, value in labels.items()):
+                    talkgroup.update(labels)
+                    changed = True
+            
+            talkgroup['calls'] += 1
+            talkgroup['last_call'] = max(talkgroup['last_call'] or 0, call['dateTime'])
+        
+        if changed:
+            self._invalidate()
+        return changed
+    
+    def _add_talkgroup(self, system_id: int, talkgroup_id: int) -> Dict[str, Any]:
+        """Add an empty talkgroup, and its system if it is new."""
+        if system_id is not None and system_id not in self._systems:
+            self._systems[system_id] = {
+                'id': system_id,
+                'name': self._system_labels.get(system_id, f"System {system_id}"),
+            }
+        
+        talkgroup = self._talkgroups[(system_id, talkgroup_id)] = {
+            'id': talkgroup_id,
+            'system': system_id,
+            'name': f"TG {talkgroup_id}",
+            'tag': '',
+            'group': '',
+            'calls': 0,
+            'last_call': None,
+        }
+        return talkgroup
+    
+    def _invalidate(self) -> None:
+        """Drop the cached sorted lists."""
+        self._systems_list = None
+        self._talkgroups_list = None
+
+
+def _talkgroup_labels(raw: Optional[str]) -> Dict[str, Any]:
+    """Extract label, tag and group from talkgroupData JSON."""
+    tg_data = parse_talkgroup_data(raw) if raw else None
+    if tg_data is None:
+        return {}
+    
+    label, tag, group = tg_data
+    labels = {'tag': tag, 'group': group}
+    if label:
+        labels['name'] = label
+    return labels
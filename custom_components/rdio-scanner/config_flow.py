@@ -8,12 +8,49 @@ from typing import Any
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.const import CONF_NAME, CONF_PATH
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_NAME, CONF_PATH, CONF_SCAN_INTERVAL
+from homeassistant.core import HomeAssistant, callback, split_entity_id, valid_entity_id
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
 
-from .const import DEFAULT_NAME, DEFAULT_PATH, DOMAIN
+from .const import (
+    CONF_AUDIO_CACHE_SIZE,
+    CONF_AUDIO_CACHE_TTL,
+    CONF_CALL_WINDOW,
+    CONF_CHANGE_DETECTION,
+    CONF_DISK_CACHE_SIZE,
+    CONF_DISK_CACHE_TALKGROUPS,
+    CONF_EVENT_COALESCE,
+    CONF_EVENT_SYSTEMS,
+    CONF_EVENT_TAGS,
+    CONF_EVENT_TALKGROUPS,
+    CONF_EVENTS,
+    CONF_PLAYER_OUTPUT,
+    CONF_SIDECAR,
+    CONF_STATISTICS,
+    CONF_SURGE,
+    CONF_SURGE_MULTIPLE,
+    CONF_TALKGROUP_ENTITIES,
+    CONF_VIEW_TALKGROUPS,
+    DEFAULT_AUDIO_CACHE_SIZE,
+    DEFAULT_AUDIO_CACHE_TTL,
+    DEFAULT_CALL_WINDOW,
+    DEFAULT_CHANGE_DETECTION,
+    DEFAULT_DISK_CACHE_SIZE,
+    DEFAULT_EVENT_COALESCE,
+    DEFAULT_EVENTS,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SIDECAR,
+    DEFAULT_STATISTICS,
+    DEFAULT_SURGE,
+    DEFAULT_SURGE_MULTIPLE,
+    DEFAULT_TALKGROUP_ENTITIES,
+    DEFAULT_NAME,
+    DEFAULT_PATH,
+    DOMAIN,
+    RDIO_TABLES,
+    REQUIRED_CALL_COLUMNS,
+)
 from .rdio_db import RdioScannerDB
 
 _LOGGER = logging.getLogger(__name__)
@@ -23,28 +60,44 @@ class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
 
 
+class InvalidDatabase(HomeAssistantError):
+    """Error to indicate the database isn't an Rdio-Scanner database."""
+
+
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
-    """Validate the user input allows us to connect."""
+    """Validate the user input allows us to connect.
+    
+    Only the schema and the small systems table are read, so this is as
+    fast on a database of millions of calls as on an empty one.
+    """
     db_path = os.path.join(data[CONF_PATH], "rdio-scanner.db")
     
-    if not os.path.exists(db_path):
+    if not await hass.async_add_executor_job(os.path.exists, db_path):
         raise CannotConnect(f"Database not found at {db_path}")
     
     # Test connection
+    db = RdioScannerDB(data)
     try:
-        db = RdioScannerDB(data)
         await db.connect()
-        systems = await db.get_systems()
-        await db.close()
-        
-        title = data.get(CONF_NAME, DEFAULT_NAME)
-        if systems:
-            title = f"{title} ({len(systems)} systems)"
-        
-        return {"title": title}
+        schema = await db.get_schema()
+        systems = await db.get_system_count()
     except Exception as err:
         _LOGGER.error("Cannot connect to database: %s", err)
         raise CannotConnect(f"Database connection failed: {err}")
+    finally:
+        await db.close()
+    
+    missing = REQUIRED_CALL_COLUMNS - schema.get(RDIO_TABLES["calls"], set())
+    if missing:
+        raise InvalidDatabase(
+            f"{RDIO_TABLES['calls']} in {db_path} is missing {', '.join(sorted(missing))}"
+        )
+    
+    title = data.get(CONF_NAME, DEFAULT_NAME)
+    if systems:
+        title = f"{title} ({systems} systems)"
+    
+    return {"title": title}
 
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -52,6 +105,14 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     
     VERSION = 1
     
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> OptionsFlowHandler:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler()
+    
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -65,6 +126,9 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             except CannotConnect as err:
                 errors["base"] = "cannot_connect"
                 _LOGGER.error("Cannot connect: %s", err)
+            except InvalidDatabase as err:
+                errors["base"] = "invalid_database"
+                _LOGGER.error("Not an Rdio-Scanner database: %s", err)
             except Exception:  # pylint: disable=broad-except
                 _LOGGER.exception("Unexpected exception")
                 errors["base"] = "unknown"
@@ -84,3 +148,118 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 "default_path": DEFAULT_PATH,
             },
         )
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle Rdio-Scanner options."""
+    
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        errors: dict[str, str] = {}
+        
+        if user_input is not None:
+            from .events import parse_filter, parse_talkgroup_filter, parse_talkgroup_selection
+            try:
+                [int(system) for system in parse_filter(user_input.get(CONF_EVENT_SYSTEMS))]
+                parse_talkgroup_filter(user_input.get(CONF_EVENT_TALKGROUPS))
+                parse_talkgroup_selection(user_input.get(CONF_VIEW_TALKGROUPS))
+                parse_talkgroup_selection(user_input.get(CONF_DISK_CACHE_TALKGROUPS))
+            except ValueError:
+                errors["base"] = "invalid_filter"
+            
+            output = user_input.get(CONF_PLAYER_OUTPUT)
+            if output and not (
+                valid_entity_id(output) and split_entity_id(output)[0] == "media_player"
+            ):
+                errors[CONF_PLAYER_OUTPUT] = "invalid_player"
+            
+            if not errors:
+                return self.async_create_entry(title="", data=user_input)
+        
+        options = user_input or self.config_entry.options
+        data_schema = vol.Schema(
+            {
+                vol.Optional(
+                    CONF_VIEW_TALKGROUPS,
+                    default=options.get(CONF_VIEW_TALKGROUPS, ""),
+                ): str,
+                vol.Optional(
+                    CONF_CALL_WINDOW,
+                    default=options.get(CONF_CALL_WINDOW, DEFAULT_CALL_WINDOW),
+                ): vol.All(vol.Coerce(int), vol.Range(min=10, max=50000)),
+                vol.Optional(
+                    CONF_CHANGE_DETECTION,
+                    default=options.get(
+                        CONF_CHANGE_DETECTION, DEFAULT_CHANGE_DETECTION
+                    ),
+                ): bool,
+                vol.Optional(
+                    CONF_SCAN_INTERVAL,
+                    default=options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=3600)),
+                vol.Optional(
+                    CONF_AUDIO_CACHE_SIZE,
+                    default=options.get(CONF_AUDIO_CACHE_SIZE, DEFAULT_AUDIO_CACHE_SIZE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=4096)),
+                vol.Optional(
+                    CONF_AUDIO_CACHE_TTL,
+                    default=options.get(CONF_AUDIO_CACHE_TTL, DEFAULT_AUDIO_CACHE_TTL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_DISK_CACHE_SIZE,
+                    default=options.get(CONF_DISK_CACHE_SIZE, DEFAULT_DISK_CACHE_SIZE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=1048576)),
+                vol.Optional(
+                    CONF_DISK_CACHE_TALKGROUPS,
+                    default=options.get(CONF_DISK_CACHE_TALKGROUPS, ""),
+                ): str,
+                vol.Optional(
+                    CONF_SIDECAR,
+                    default=options.get(CONF_SIDECAR, DEFAULT_SIDECAR),
+                ): bool,
+                vol.Optional(
+                    CONF_STATISTICS,
+                    default=options.get(CONF_STATISTICS, DEFAULT_STATISTICS),
+                ): bool,
+                vol.Optional(
+                    CONF_TALKGROUP_ENTITIES,
+                    default=options.get(CONF_TALKGROUP_ENTITIES, DEFAULT_TALKGROUP_ENTITIES),
+                ): bool,
+                vol.Optional(
+                    CONF_EVENTS,
+                    default=options.get(CONF_EVENTS, DEFAULT_EVENTS),
+                ): bool,
+                vol.Optional(
+                    CONF_EVENT_SYSTEMS,
+                    default=options.get(CONF_EVENT_SYSTEMS, ""),
+                ): str,
+                vol.Optional(
+                    CONF_EVENT_TALKGROUPS,
+                    default=options.get(CONF_EVENT_TALKGROUPS, ""),
+                ): str,
+                vol.Optional(
+                    CONF_EVENT_TAGS,
+                    default=options.get(CONF_EVENT_TAGS, ""),
+                ): str,
+                vol.Optional(
+                    CONF_EVENT_COALESCE,
+                    default=options.get(CONF_EVENT_COALESCE, DEFAULT_EVENT_COALESCE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
+                vol.Optional(
+                    CONF_SURGE,
+                    default=options.get(CONF_SURGE, DEFAULT_SURGE),
+                ): bool,
+                vol.Optional(
+                    CONF_SURGE_MULTIPLE,
+                    default=options.get(CONF_SURGE_MULTIPLE, DEFAULT_SURGE_MULTIPLE),
+                ): vol.All(vol.Coerce(float), vol.Range(min=1.5, max=100)),
+                vol.Optional(
+                    CONF_PLAYER_OUTPUT,
+                    default=options.get(CONF_PLAYER_OUTPUT, ""),
+                ): str,
+            }
+        )
+        
+        return self.async_show_form(step_id="init", data_schema=data_schema, errors=errors)
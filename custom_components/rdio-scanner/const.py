@@ -1,11 +1,132 @@
 """Constants for the Rdio-Scanner integration."""
+from datetime import timedelta
 
 DOMAIN = "rdio_scanner"
 
+# hass.data keys shared by all config entries
+DATA_VIEWS = f"{DOMAIN}_views"
+DATA_WEBSOCKET = f"{DOMAIN}_websocket"
+DATA_BACKENDS = f"{DOMAIN}_backends"  # resolved database path -> shared backend
+
 # Configuration constants
 DEFAULT_NAME = "Rdio-Scanner"
 DEFAULT_PATH = "/opt/rdio-scanner/data"
 
+# Options
+CONF_CALL_WINDOW = "call_window"
+DEFAULT_CALL_WINDOW = 100
+CONF_CHANGE_DETECTION = "change_detection"
+DEFAULT_CHANGE_DETECTION = True
+DEFAULT_SCAN_INTERVAL = 10  # seconds
+CONF_AUDIO_CACHE_SIZE = "audio_cache_size"
+DEFAULT_AUDIO_CACHE_SIZE = 50  # MB
+CONF_AUDIO_CACHE_TTL = "audio_cache_ttl"
+DEFAULT_AUDIO_CACHE_TTL = 0  # seconds, 0 disables expiry
+CONF_DISK_CACHE_SIZE = "disk_cache_size"
+DEFAULT_DISK_CACHE_SIZE = 0  # MB, 0 disables the disk cache
+CONF_DISK_CACHE_TALKGROUPS = "disk_cache_talkgroups"
+CONF_SIDECAR = "sidecar_index"
+DEFAULT_SIDECAR = False
+CONF_STATISTICS = "long_term_statistics"
+DEFAULT_STATISTICS = False
+CONF_TALKGROUP_ENTITIES = "talkgroup_entities"
+DEFAULT_TALKGROUP_ENTITIES = False
+CONF_EVENTS = "new_call_events"
+DEFAULT_EVENTS = False
+CONF_EVENT_SYSTEMS = "event_systems"
+CONF_EVENT_TALKGROUPS = "event_talkgroups"
+CONF_EVENT_TAGS = "event_tags"
+CONF_EVENT_COALESCE = "event_coalesce"
+DEFAULT_EVENT_COALESCE = 0  # seconds, 0 fires an event per call
+CONF_PLAYER_OUTPUT = "player_output"
+CONF_SURGE = "surge_detection"
+DEFAULT_SURGE = False
+CONF_SURGE_MULTIPLE = "surge_multiple"
+DEFAULT_SURGE_MULTIPLE = 3.0  # times the usual activity for the time of day
+CONF_VIEW_TALKGROUPS = "view_talkgroups"
+
+# Change detection
+CHANGE_CHECK_INTERVAL = timedelta(milliseconds=500)
+FALLBACK_SCAN_INTERVAL = timedelta(minutes=5)
+REFRESH_COOLDOWN = 0.5  # seconds
+
+# Systems/talkgroups catalog
+CATALOG_RECONCILE_INTERVAL = timedelta(hours=6)
+CATALOG_SHARE_TIME = 60  # seconds a catalog scan is reused by other entries
+
+# Warm start snapshot
+SNAPSHOT_SAVE_DELAY = 60  # seconds changes are batched before the snapshot is saved
+SNAPSHOT_RECONCILE_DELAY = 30  # seconds after a warm start before the catalog is rescanned
+
+# Shared database backend
+BACKEND_RECENT_CALLS = 1000  # newest calls buffered for the entries on a database
+
+# Events
+EVENT_NEW_CALL = f"{DOMAIN}_new_call"
+EVENT_EXPORT_PROGRESS = f"{DOMAIN}_export_progress"
+EVENT_EXPORT_FINISHED = f"{DOMAIN}_export_finished"
+EVENT_SURGE = f"{DOMAIN}_surge"
+
+# Dispatcher signals, formatted with the config entry id
+SIGNAL_CATALOG_UPDATED = f"{DOMAIN}_catalog_updated_{{}}"
+SIGNAL_NEW_CALLS = f"{DOMAIN}_new_calls_{{}}"
+SIGNAL_TALKGROUP_CALLS = f"{DOMAIN}_talkgroup_calls_{{}}_{{}}_{{}}"  # + system, talkgroup
+SIGNAL_TALKGROUP_ACTIVE = f"{DOMAIN}_talkgroup_active_{{}}_{{}}_{{}}"  # + system, talkgroup
+SIGNAL_TALKGROUP_SURGE = f"{DOMAIN}_talkgroup_surge_{{}}_{{}}_{{}}"  # + system, talkgroup
+
+# Per-talkgroup entities
+CALL_RATE_WINDOW = timedelta(hours=1)
+
+# Active calls
+ACTIVE_CALL_HANG_TIME = timedelta(seconds=10)  # a call stays active this long after it ends
+
+# Surge detection
+SURGE_WINDOW = timedelta(minutes=15)  # recent activity decays over this
+SURGE_BASELINE_DAYS = 7  # span of the per-hour-of-day EWMA baselines
+SURGE_MIN_DAYS = 3  # days a talkgroup is learned before it can surge
+SURGE_MIN_CALLS = 5  # recent calls needed for a surge, so quiet talkgroups don't flap
+SURGE_MIN_AIRTIME = 60  # seconds per hour; smaller airtime baselines are raised to this
+SURGE_CLEAR_RATIO = 0.75  # a surge clears below this fraction of the multiple
+SURGE_CHECK_INTERVAL = timedelta(minutes=1)  # surges are re-checked while any is on
+SURGE_SAVE_DELAY = 300  # seconds baseline changes are batched before saving
+
+# Media player
+PLAYER_QUEUE_SIZE = 200  # queued calls before the oldest are dropped
+PLAYER_PREFETCH = 2  # queued calls whose audio is loaded ahead
+PLAYER_CALL_GAP = 0.5  # seconds between calls
+
+# Media browsing
+BROWSE_PAGE_SIZE = 100  # calls per page of a day
+BROWSE_CACHED_TALKGROUPS = 50  # talkgroups whose calls per day are kept
+
+# Continuous call stream
+STREAM_PAGE_SIZE = 50  # historical calls read per query
+STREAM_MAX_PENDING = 50  # new calls held per stream before the oldest are skipped
+STREAM_CHECK_INTERVAL = 60  # seconds between checks that an idle stream's entry is loaded
+
+# Call history queries
+QUERY_MAX_LIMIT = 1000  # calls per page
+QUERY_SEARCH_TALKGROUPS = 50  # talkgroups a search matches at most
+
+# Call export
+EXPORT_PAGE_SIZE = 500  # calls read per transaction
+EXPORT_PROGRESS_INTERVAL = 5  # seconds between progress events
+
+# WebSocket call feed
+WS_REPLAY_LIMIT = 500  # most calls replayed on subscribe
+WS_FLUSH_INTERVAL = 0.25  # seconds between messages to one subscriber
+WS_MAX_PENDING = 1000  # calls held per subscriber before the oldest are dropped
+WS_RECENT_CALLS = 1000  # call ids per subscriber remembered to skip repeats from entries on one database
+
+# Sidecar metadata index
+SIDECAR_SYNC_BATCH = 5000  # calls copied per transaction
+
+# Long-term statistics
+STATISTICS_BATCH_HOURS = 24 * 7  # hours imported per backfill batch
+STATISTICS_BATCH_DELAY = 1  # seconds between backfill batches
+STATISTICS_OPEN_HOURS = 2  # newest hours re-imported on every update, the current one included
+STATISTICS_UPDATE_INTERVAL = timedelta(minutes=5)
+
 # Rdio-Scanner database schema
 # Based on the database structure we explored in your webapp
 RDIO_TABLES = {
@@ -14,5 +135,30 @@ RDIO_TABLES = {
     "talkgroups": "rdio_scanner_talkgroups",
 }
 
+# Columns of rdio_scanner_calls the integration reads
+REQUIRED_CALL_COLUMNS = {
+    "id", "audio", "audioName", "audioType", "dateTime", "frequencies", "frequency",
+    "patches", "sources", "system", "talkgroup", "talkgroupData", "len",
+}
+
 # Audio format in database
 AUDIO_MIME_TYPE = "audio/mpeg"  # MP3 format after conversion
+AUDIO_CHUNK_SIZE = 64 * 1024  # bytes per incremental BLOB read
+AUDIO_CACHE_MAX_ITEM_SIZE = 10 * 1024 * 1024  # larger calls are streamed, not cached
+
+# Audio disk cache
+DISK_CACHE_SAVE_DELAY = 30  # seconds index changes are batched before saving
+DISK_CACHE_MAX_PENDING = 16  # extractions in flight; further calls are skipped
+
+# Diagnostics
+SLOW_QUERY_TIME = 0.25  # seconds; slower queries are logged with their plan at debug level
+
+# Database connections
+READER_CONNECTIONS = 2  # pooled readers for audio and background scans
+READER_PRAGMAS = (
+    "PRAGMA query_only = ON",
+    "PRAGMA mmap_size = 268435456",  # 256 MB
+    "PRAGMA cache_size = -16384",  # 16 MB
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
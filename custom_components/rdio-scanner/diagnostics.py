@@ -0,0 +1,52 @@
+"""Diagnostics support for Rdio-Scanner."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return timings, counters and file sizes for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    db = coordinator.db
+    
+    return {
+        "entry": {
+            "data": dict(entry.data),
+            "options": dict(entry.options),
+        },
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": str(coordinator.update_interval),
+            "change_detection": coordinator.change_detection,
+            "window": coordinator.window,
+            "calls": len(coordinator.calls),
+            "systems": len(coordinator.systems),
+            "talkgroups": len(coordinator.talkgroups),
+            "active_calls": coordinator.active_calls.count,
+            "refresh": coordinator.refresh_stats.stats(),
+        },
+        "backend": coordinator.backend.stats(),
+        "surges": coordinator.surges.stats() if coordinator.surges else None,
+        "database": {
+            "path": db.db_path,
+            "files": await hass.async_add_executor_job(db.file_sizes),
+            "readers": db.reader_stats(),
+            "index_ready": db.use_sidecar,
+            "queries": db.query_stats.stats(),
+        },
+        "audio": {
+            "cache": db.audio_cache.stats(),
+            "disk": (
+                coordinator.backend.disk_cache.stats()
+                if coordinator.backend.disk_cache else None
+            ),
+            "served": db.audio_served.stats(),
+        },
+    }
@@ -0,0 +1,297 @@
+"""On-disk audio cache for Rdio-Scanner."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import shutil
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DISK_CACHE_MAX_PENDING, DISK_CACHE_SAVE_DELAY, DOMAIN
+from .rdio_db import audio_info
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+
+async def async_remove_disk_cache(hass: HomeAssistant, directory: str) -> None:
+    """Delete a disk cache's files and index."""
+    await hass.async_add_executor_job(shutil.rmtree, directory, True)
+    await _store(hass, directory).async_remove()
+
+
+def call_key(call_id: int, date_time: int) -> str:
+    """Return the cache key of a call; the time guards against reused ids."""
+    return f"{call_id}-{date_time}"
+
+
+def _split_key(key: str) -> Tuple[int, int]:
+    """Return the call id and time of a cache key."""
+    call_id, date_time = key.split("-", 1)
+    return int(call_id), int(date_time)
+
+
+class AudioDiskCache:
+    """Size-bounded LRU of call audio extracted from the database to files.
+    
+    Files are named by the SHA-256 of their content, so calls with the same
+    audio share a file. Each file is written to a temporary name, synced and
+    renamed into place before the index refers to it; on load, index
+    entries without a file and files without an entry are dropped. The
+    index keeps each call's audio type and name, so a call whose time is
+    already known can be served without asking the database.
+    """
+    
+    def __init__(self, hass: HomeAssistant, directory: str, max_bytes: int) -> None:
+        """Initialize the cache."""
+        self.hass = hass
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._store = _store(hass, directory)
+        # call key -> digest, least recently used first
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        # digest -> [size, calls referring to it]
+        self._files: Dict[str, List[int]] = {}
+        # call key -> audio info of the cached call
+        self._calls: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._save_scheduled = False
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+    
+    async def async_load(self) -> None:
+        """Load the index and drop anything a crash left inconsistent."""
+        data = await self._store.async_load() or {}
+        entries = await self.hass.async_add_executor_job(
+            self._check_files, data.get("entries", [])
+        )
+        for key, digest, size, audio_type, name in entries:
+            call_id, date_time = _split_key(key)
+            self._link(key, digest, size, audio_info(call_id, size, audio_type, name, date_time))
+        
+        # Drop the oldest if the size option was lowered
+        await self._async_evict()
+        _LOGGER.debug(
+            "Audio disk cache %s holds %s calls in %s bytes",
+            self.directory, len(self._entries), self.size,
+        )
+    
+    def get(self, call_id: int, date_time: int) -> Optional[str]:
+        """Return the path of a cached call and mark it as recently used."""
+        key = call_key(call_id, date_time)
+        digest = self._entries.get(key)
+        if digest is None:
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self._async_schedule_save()
+        return self._path(digest)
+    
+    def lookup(self, call_id: int, date_time: int) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Return the path and audio info of a cached call and mark it as recently used."""
+        info = self._calls.get(call_key(call_id, date_time))
+        if info is None:
+            return None
+        return self.get(call_id, date_time), info
+    
+    @callback
+    def async_add(self, db, call_id: int, date_time: int) -> None:
+        """Extract a call's audio to the cache in the background."""
+        key = call_key(call_id, date_time)
+        if key in self._entries or key in self._pending:
+            return
+        # Keep up with live traffic rather than queue a backlog
+        if len(self._pending) >= DISK_CACHE_MAX_PENDING:
+            return
+        
+        self._pending[key] = self.hass.async_create_background_task(
+            self._async_extract(db, key, call_id, date_time),
+            f"{DOMAIN} audio extract {call_id}",
+        )
+    
+    @callback
+    def async_add_calls(self, db, calls: Iterable[Any]) -> None:
+        """Extract the audio of new calls in the background."""
+        for call in calls:
+            self.async_add(db, call['id'], call['dateTime'])
+    
+    async def async_close(self) -> None:
+        """Cancel pending extractions and save the index."""
+        for task in list(self._pending.values()):
+            task.cancel()
+        await self._store.async_save(self._data())
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "files": len(self._files),
+            "size": self.size,
+            "max_size": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "pending": len(self._pending),
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
+    
+    async def _async_extract(self, db, key: str, call_id: int, date_time: int) -> None:
+        """Copy a call's BLOB to a file, then add it to the index."""
+        temp_path = os.path.join(self.directory, "tmp", f"{key}.{uuid.uuid4().hex}")
+        try:
+            await self.hass.async_add_executor_job(
+                os.makedirs, os.path.dirname(temp_path), 0o755, True
+            )
+            result = await db.extract_call_audio(call_id, temp_path)
+            if result is None:
+                return
+            digest, info = result
+            size = info['size']
+            if size > self.max_bytes or info['dateTime'] != date_time:
+                await self.hass.async_add_executor_job(_remove, temp_path)
+                return
+            await self.hass.async_add_executor_job(
+                self._commit, temp_path, digest, date_time
+            )
+        except Exception as err:
+            _LOGGER.warning("Error caching audio of call %s: %s", call_id, err)
+            await self.hass.async_add_executor_job(_remove, temp_path)
+            return
+        finally:
+            self._pending.pop(key, None)
+        
+        self.writes += 1
+        self._link(key, digest, size, info)
+        await self._async_evict()
+        self._async_schedule_save()
+    
+    def _commit(self, temp_path: str, digest: str, date_time: int) -> None:
+        """Move a written file into place. Runs in the executor."""
+        path = self._path(digest)
+        if os.path.exists(path):
+            # Same audio as a cached call
+            os.remove(temp_path)
+            return
+        
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Files carry their call's time, in whole seconds like Last-Modified
+        os.utime(temp_path, (date_time // 1000, date_time // 1000))
+        os.replace(temp_path, path)
+        _fsync_directory(os.path.dirname(path))
+    
+    def _link(self, key: str, digest: str, size: int, info: Dict[str, Any]) -> None:
+        """Add a call to the index, counting a file's bytes once."""
+        if key in self._entries:
+            return
+        self._entries[key] = digest
+        self._calls[key] = info
+        if digest in self._files:
+            self._files[digest][1] += 1
+        else:
+            self._files[digest] = [size, 1]
+            self.size += size
+    
+    async def _async_evict(self) -> None:
+        """Drop least recently used calls until the cache fits, deleting unreferenced files."""
+        removed = []
+        while self._entries and self.size > self.max_bytes:
+            key, digest = self._entries.popitem(last=False)
+            del self._calls[key]
+            self.evictions += 1
+            file = self._files[digest]
+            file[1] -= 1
+            if not file[1]:
+                del self._files[digest]
+                self.size -= file[0]
+                removed.append(self._path(digest))
+        
+        if removed:
+            await self.hass.async_add_executor_job(_remove_all, removed)
+            self._async_schedule_save()
+    
+    @callback
+    def _async_schedule_save(self) -> None:
+        """Save the index within DISK_CACHE_SAVE_DELAY, without postponing a pending save."""
+        if not self._save_scheduled:
+            self._save_scheduled = True
+            self._store.async_delay_save(self._data, DISK_CACHE_SAVE_DELAY)
+    
+    def _data(self) -> Dict[str, Any]:
+        """Return the index to save, least recently used first."""
+        self._save_scheduled = False
+        entries = []
+        for key, digest in self._entries.items():
+            info = self._calls[key]
+            entries.append([key, digest, self._files[digest][0], info['type'], info['name']])
+        return {"entries": entries}
+    
+    def _path(self, digest: str) -> str:
+        """Return the path of a file by digest."""
+        return os.path.join(self.directory, digest[:2], digest)
+    
+    def _check_files(self, entries: List[List[Any]]) -> List[Tuple[str, str, int, str, str]]:
+        """Keep index entries whose file is intact and delete everything else. Runs in the executor."""
+        os.makedirs(self.directory, exist_ok=True)
+        # Writes interrupted by a crash
+        shutil.rmtree(os.path.join(self.directory, "tmp"), ignore_errors=True)
+        
+        present: Dict[str, int] = {}
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                present[path] = os.path.getsize(path)
+        
+        valid = []
+        referenced: Set[str] = set()
+        for key, digest, size, audio_type, name in entries:
+            path = self._path(digest)
+            if present.get(path) == size:
+                valid.append((key, digest, size, audio_type, name))
+                referenced.add(path)
+        
+        _remove_all(present.keys() - referenced)
+        for root, dirs, files in os.walk(self.directory, topdown=False):
+            if root != self.directory and not dirs and not files:
+                os.rmdir(root)
+        return valid
+
+
+def _store(hass: HomeAssistant, directory: str) -> Store:
+    """Return the Store holding a disk cache's index."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{os.path.basename(directory)}")
+
+
+def _remove(path: str) -> None:
+    """Delete a file if it exists."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _remove_all(paths: Iterable[str]) -> None:
+    """Delete files that exist."""
+    for path in paths:
+        _remove(path)
+
+
+def _fsync_directory(path: str) -> None:
+    """Make a rename in a directory durable."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1,147 @@
+"""Per-talkgroup entities for Rdio-Scanner."""
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_NAME
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN, SIGNAL_CATALOG_UPDATED, SIGNAL_TALKGROUP_CALLS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def talkgroup_signal(
+    entry_id: str, system_id: int, talkgroup_id: int, signal: str = SIGNAL_TALKGROUP_CALLS
+) -> str:
+    """Return a per-talkgroup dispatcher signal, by default the one carrying new calls."""
+    return signal.format(entry_id, system_id, talkgroup_id)
+
+
+@callback
+def async_add_talkgroup_entities(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    coordinator,
+    async_add_entities: AddEntitiesCallback,
+    factory: Callable[[Dict[str, Any], List[Any]], Iterable[Entity]],
+) -> None:
+    """Add entities for every talkgroup in the catalog, and for new ones as they appear.
+    
+    factory receives the catalog talkgroup and its calls in the call window,
+    oldest first, and returns the entities to add.
+    """
+    known = set()
+    
+    @callback
+    def add_new_talkgroups() -> None:
+        talkgroups = [
+            talkgroup
+            for talkgroup in coordinator.catalog.talkgroups
+            if (talkgroup['system'], talkgroup['id']) not in known
+        ]
+        if not talkgroups:
+            return
+        
+        recent = defaultdict(list)
+        for call in reversed(coordinator.calls):
+            recent[(call['system'], call['talkgroup'])].append(call)
+        
+        entities = []
+        for talkgroup in talkgroups:
+            key = (talkgroup['system'], talkgroup['id'])
+            known.add(key)
+            entities.extend(factory(talkgroup, recent.get(key, [])))
+        async_add_entities(entities)
+    
+    add_new_talkgroups()
+    config_entry.async_on_unload(
+        async_dispatcher_connect(
+            hass,
+            SIGNAL_CATALOG_UPDATED.format(config_entry.entry_id),
+            add_new_talkgroups,
+        )
+    )
+
+
+class RdioScannerTalkgroupEntity(Entity):
+    """Base class for entities of a single talkgroup.
+    
+    These don't listen to the coordinator. The coordinator dispatches each
+    refresh's new calls to the talkgroups they belong to, and state is only
+    written when it changed, so quiet talkgroups cost nothing.
+    """
+    
+    _attr_should_poll = False
+    
+    def __init__(
+        self,
+        coordinator,
+        config_entry: ConfigEntry,
+        talkgroup: Dict[str, Any],
+        calls: List[Any],
+        key: str,
+        name: str,
+    ) -> None:
+        """Initialize the entity."""
+        self.coordinator = coordinator
+        self.config_entry = config_entry
+        self.system_id = talkgroup['system']
+        self.talkgroup_id = talkgroup['id']
+        self._seed = calls
+        self._attr_name = f"{config_entry.data.get(CONF_NAME)} {talkgroup['name']} {name}"
+        self._attr_unique_id = (
+            f"{config_entry.entry_id}_talkgroup_{self.system_id}_{self.talkgroup_id}_{key}"
+        )
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, config_entry.entry_id)},
+            "name": config_entry.data.get(CONF_NAME, "Rdio-Scanner"),
+            "manufacturer": "Rdio-Scanner",
+            "model": "Radio Scanner",
+        }
+        self._attr_extra_state_attributes = {
+            "system": self.system_id,
+            "talkgroup": self.talkgroup_id,
+            "tag": talkgroup.get('tag', ''),
+            "group": talkgroup.get('group', ''),
+        }
+        self._unsub_timer: Optional[CALLBACK_TYPE] = None
+    
+    async def async_added_to_hass(self) -> None:
+        """Seed state from recent calls and subscribe to new ones."""
+        await super().async_added_to_hass()
+        self._update_from_calls(self._seed)
+        self._seed = []
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                talkgroup_signal(self.config_entry.entry_id, self.system_id, self.talkgroup_id),
+                self._async_handle_calls,
+            )
+        )
+    
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel any pending timer."""
+        self._cancel_timer()
+    
+    @callback
+    def _async_handle_calls(self, calls: List[Any]) -> None:
+        """Handle new calls for this talkgroup, oldest first."""
+        if self._update_from_calls(calls):
+            self.async_write_ha_state()
+    
+    def _update_from_calls(self, calls: Iterable[Any]) -> bool:
+        """Update from calls, oldest first. Return True if the state changed."""
+        raise NotImplementedError
+    
+    def _cancel_timer(self) -> None:
+        """Cancel the pending timer, if any."""
+        if self._unsub_timer:
+            self._unsub_timer()
+            self._unsub_timer = None
@@ -0,0 +1,175 @@
+"""New call events for Rdio-Scanner."""
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .audio_handler import audio_url
+from .const import (
+    CONF_EVENT_COALESCE,
+    CONF_EVENT_SYSTEMS,
+    CONF_EVENT_TAGS,
+    CONF_EVENT_TALKGROUPS,
+    DEFAULT_EVENT_COALESCE,
+    EVENT_NEW_CALL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def parse_filter(value: Optional[str]) -> List[str]:
+    """Split a comma separated filter option into its entries."""
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+def parse_talkgroup_filter(value: Optional[str]) -> Set[Tuple[Optional[int], int]]:
+    """Parse talkgroups given as "talkgroup" or "system:talkgroup".
+    
+    Raises ValueError for an entry that isn't numeric.
+    """
+    talkgroups = set()
+    for item in parse_filter(value):
+        system, _, talkgroup = item.rpartition(":")
+        talkgroups.add((int(system) if system else None, int(talkgroup)))
+    return talkgroups
+
+
+def parse_talkgroup_selection(
+    value: Optional[str],
+) -> Tuple[Set[int], Set[Tuple[Optional[int], int]]]:
+    """Parse talkgroups given as "talkgroup", "system:talkgroup" or "system:*".
+    
+    Returns (whole systems, talkgroups), both empty for "all" or nothing.
+    Raises ValueError for an entry that isn't numeric.
+    """
+    systems, talkgroups = set(), set()
+    if value == "all":
+        return systems, talkgroups
+    
+    for item in parse_filter(value):
+        system, _, talkgroup = item.rpartition(":")
+        if talkgroup == "*":
+            systems.add(int(system))
+        else:
+            talkgroups.add((int(system) if system else None, int(talkgroup)))
+    return systems, talkgroups
+
+
+def selection_filter(
+    systems: Set[int], talkgroups: Set[Tuple[Optional[int], int]]
+) -> Dict[str, List[int]]:
+    """Return call filter keywords that narrow a query to a talkgroup selection.
+    
+    A selection mixing whole systems and talkgroups can't be expressed this
+    way, so results still need checking against the selection.
+    """
+    if systems and not talkgroups:
+        return {"systems": sorted(systems)}
+    if talkgroups and not systems:
+        return {"talkgroups": sorted({talkgroup for _, talkgroup in talkgroups})}
+    return {}
+
+
+class RdioScannerCallEvents:
+    """Fire an event on the bus for each new call that passes the filters.
+    
+    With coalescing, the first call on a talkgroup fires right away and
+    further calls on it within the window fire as one event when the
+    window closes, so a busy talkgroup can't flood the bus or the recorder.
+    """
+    
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, coordinator) -> None:
+        """Initialize from the entry's filter options."""
+        self.hass = hass
+        self.entry = entry
+        self.coordinator = coordinator
+        options = entry.options
+        self._systems = {int(system) for system in parse_filter(options.get(CONF_EVENT_SYSTEMS))}
+        self._talkgroups = parse_talkgroup_filter(options.get(CONF_EVENT_TALKGROUPS))
+        self._tags = {tag.lower() for tag in parse_filter(options.get(CONF_EVENT_TAGS))}
+        self._coalesce = options.get(CONF_EVENT_COALESCE, DEFAULT_EVENT_COALESCE)
+        # (system, talkgroup) -> calls held back until the window closes
+        self._pending: Dict[Tuple[int, int], List[Any]] = {}
+        self._timers: Dict[Tuple[int, int], CALLBACK_TYPE] = {}
+    
+    @callback
+    def async_add_calls(self, calls: Iterable[Any]) -> None:
+        """Fire events for new calls, oldest first."""
+        for call in calls:
+            if not self._matches(call):
+                continue
+            
+            if not self._coalesce:
+                self._fire([call])
+                continue
+            
+            key = (call['system'], call['talkgroup'])
+            if key in self._timers:
+                self._pending[key].append(call)
+                continue
+            
+            self._fire([call])
+            self._pending[key] = []
+            self._timers[key] = async_call_later(
+                self.hass, self._coalesce, lambda now, key=key: self._async_flush(key)
+            )
+    
+    @callback
+    def async_stop(self) -> None:
+        """Cancel coalescing timers; held back calls are dropped."""
+        for unsub in self._timers.values():
+            unsub()
+        self._timers.clear()
+        self._pending.clear()
+    
+    @callback
+    def _async_flush(self, key: Tuple[int, int]) -> None:
+        """Fire the calls held back for a talkgroup as one event."""
+        del self._timers[key]
+        if calls := self._pending.pop(key, None):
+            self._fire(calls)
+    
+    def _matches(self, call) -> bool:
+        """Return True if the call passes the configured filters."""
+        if self._systems and call['system'] not in self._systems:
+            return False
+        if self._talkgroups and not (
+            (call['system'], call['talkgroup']) in self._talkgroups
+            or (None, call['talkgroup']) in self._talkgroups
+        ):
+            return False
+        if self._tags and (call.get('talkgroup_tag') or '').lower() not in self._tags:
+            return False
+        return True
+    
+    def _fire(self, calls: List[Any]) -> None:
+        """Fire one event for the newest of calls."""
+        call = calls[-1]
+        system = self.coordinator.catalog.get_system(call['system'])
+        talkgroup = self.coordinator.catalog.get_talkgroup(call['system'], call['talkgroup'])
+        data = {
+            "entry_id": self.entry.entry_id,
+            "call_id": call['id'],
+            "system": call['system'],
+            "system_label": system['name'] if system else None,
+            "talkgroup": call['talkgroup'],
+            "talkgroup_label": talkgroup['name'] if talkgroup else call.get('talkgroup_name'),
+            "talkgroup_tag": call.get('talkgroup_tag'),
+            "talkgroup_group": call.get('talkgroup_group'),
+            "timestamp": call.get('timestamp'),
+            "call_length": call['call_length'],
+            "frequency": call['frequency'],
+            "sources": [
+                source['src']
+                for source in call['sources']
+                if isinstance(source, dict) and 'src' in source
+            ],
+            "audio_url": audio_url(self.entry.entry_id, call['id']),
+        }
+        if len(calls) > 1:
+            data["coalesced_calls"] = [coalesced['id'] for coalesced in calls]
+        self.hass.bus.async_fire(EVENT_NEW_CALL, data)
@@ -0,0 +1,171 @@
+"""Call export for Rdio-Scanner."""
+from __future__ import annotations
+
+import json
+import logging
+import mimetypes
+import os
+import shutil
+import sqlite3
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+from typing import Any, Callable, Dict, List, Optional
+
+from .calls import CALL_COLUMNS, RdioScannerCall
+from .const import AUDIO_CHUNK_SIZE, EXPORT_PAGE_SIZE, EXPORT_PROGRESS_INTERVAL
+
+_LOGGER = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("zip", "tar")
+
+# CALL_COLUMNS first, so the leading values build an RdioScannerCall
+EXPORT_COLUMNS = f"{CALL_COLUMNS}, audioName, audioType, length(audio) AS audioSize"
+
+
+class ExportCancelled(Exception):
+    """Error to indicate an export was cancelled."""
+
+
+def write_export(
+    reader: sqlite3.Connection,
+    path: str,
+    archive_format: str,
+    where: List[str],
+    params: List[Any],
+    progress: Optional[Callable[[int, int], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Dict[str, int]:
+    """Write matching calls to an archive of calls.ndjson plus one audio file per call.
+    
+    Runs in the executor. Calls are read a page at a time, oldest first,
+    and audio is copied straight from the BLOB in chunks, so memory use
+    doesn't depend on the size of the export. The archive is written to
+    path.part and renamed when complete.
+    """
+    partial = f"{path}.part"
+    calls = 0
+    last_progress = time.monotonic()
+    
+    with tempfile.TemporaryFile() as metadata, _ArchiveWriter(partial, archive_format) as archive:
+        try:
+            for row in _iter_rows(reader, where, params):
+                if cancel is not None and cancel.is_set():
+                    raise ExportCancelled
+                
+                call = RdioScannerCall(*row[:10])
+                record = call.as_dict()
+                if row['audioSize']:
+                    record['audio_file'] = _audio_file(call.id, row['audioName'], row['audioType'])
+                    with reader.blobopen(
+                        "rdio_scanner_calls", "audio", call.id, readonly=True
+                    ) as blob:
+                        archive.add(record['audio_file'], blob, row['audioSize'], call.dateTime)
+                metadata.write(json.dumps(record).encode() + b"\n")
+                calls += 1
+                
+                if progress and time.monotonic() - last_progress >= EXPORT_PROGRESS_INTERVAL:
+                    last_progress = time.monotonic()
+                    progress(calls, archive.size)
+            
+            size = metadata.tell()
+            metadata.seek(0)
+            archive.add("calls.ndjson", metadata, size, int(time.time() * 1000))
+        except BaseException:
+            archive.abort()
+            raise
+    
+    os.replace(partial, path)
+    return {"calls": calls, "bytes": os.path.getsize(path)}
+
+
+def _iter_rows(reader: sqlite3.Connection, where: List[str], params: List[Any]):
+    """Yield matching rows, oldest first, reading one page per short transaction."""
+    after = None
+    while True:
+        page_where, page_params = list(where), list(params)
+        if after is not None:
+            page_where.append("dateTime >= ? AND (dateTime > ? OR id > ?)")
+            page_params.extend((after[0], after[0], after[1]))
+        
+        rows = reader.execute(
+            f"""
+            SELECT {EXPORT_COLUMNS}
+            FROM rdio_scanner_calls
+            WHERE {" AND ".join(page_where) or "1"}
+            ORDER BY dateTime ASC, id ASC
+            LIMIT ?
+            """,
+            (*page_params, EXPORT_PAGE_SIZE),
+        ).fetchall()
+        yield from rows
+        
+        if len(rows) < EXPORT_PAGE_SIZE:
+            return
+        after = (rows[-1]['dateTime'], rows[-1]['id'])
+
+
+def _audio_file(call_id: int, name: Optional[str], mime_type: Optional[str]) -> str:
+    """Return the archive path of a call's audio."""
+    extension = os.path.splitext(name or "")[1]
+    if not extension:
+        extension = mimetypes.guess_extension(mime_type or "") or ".mp3"
+    return f"audio/{call_id}{extension}"
+
+
+class _ArchiveWriter:
+    """Append streamed members to a zip or tar archive."""
+    
+    def __init__(self, path: str, archive_format: str) -> None:
+        """Open the archive for writing."""
+        self.path = path
+        if archive_format == "zip":
+            # Audio is already compressed
+            self._zip = zipfile.ZipFile(path, "w", zipfile.ZIP_STORED, allowZip64=True)
+            self._tar = None
+        else:
+            self._zip = None
+            self._tar = tarfile.open(path, "w")
+    
+    @property
+    def size(self) -> int:
+        """Return the bytes written so far."""
+        if self._zip is not None:
+            return self._zip.fp.tell()
+        return self._tar.fileobj.tell()
+    
+    def add(self, name: str, fileobj, size: int, date_time: int) -> None:
+        """Copy size bytes from fileobj into a new member."""
+        if self._zip is not None:
+            info = zipfile.ZipInfo(name, time.localtime(date_time / 1000)[:6])
+            info.file_size = size
+            with self._zip.open(info, "w", force_zip64=True) as member:
+                shutil.copyfileobj(fileobj, member, AUDIO_CHUNK_SIZE)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = size
+            info.mtime = date_time // 1000
+            self._tar.addfile(info, fileobj)
+    
+    def abort(self) -> None:
+        """Close and delete the incomplete archive."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+    
+    def close(self) -> None:
+        """Finish the archive."""
+        if self._zip is not None:
+            self._zip.close()
+        else:
+            self._tar.close()
+    
+    def __enter__(self) -> _ArchiveWriter:
+        """Enter the context."""
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        """Finish the archive."""
+        self.close()
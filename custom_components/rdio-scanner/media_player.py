@@ -1,22 +1,53 @@
 """Media player for Rdio-Scanner."""
+from __future__ import annotations
+
 import logging
+from collections import deque
+
+import voluptuous as vol
 
 from homeassistant.components.media_player import (
+    ATTR_MEDIA_ENQUEUE,
+    MediaPlayerEnqueue,
     MediaPlayerEntity,
     MediaPlayerEntityFeature,
     MediaPlayerState,
     MediaType,
 )
+from homeassistant.components.media_player.browse_media import (
+    async_process_play_media_url,
+)
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_NAME
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_platform
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN
+from .audio_handler import audio_url
+from .browse import RdioScannerBrowser
+from .const import (
+    CONF_PLAYER_OUTPUT,
+    DOMAIN,
+    PLAYER_CALL_GAP,
+    PLAYER_PREFETCH,
+    PLAYER_QUEUE_SIZE,
+    SIGNAL_NEW_CALLS,
+)
+from .events import parse_talkgroup_filter
 
 _LOGGER = logging.getLogger(__name__)
 
+SERVICE_FOLLOW = "follow"
+SERVICE_UNFOLLOW = "unfollow"
+
+ATTR_TALKGROUPS = "talkgroups"
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -26,10 +57,25 @@ async def async_setup_entry(
     """Set up Rdio-Scanner media player."""
     coordinator = hass.data[DOMAIN][config_entry.entry_id]
     async_add_entities([RdioScannerMediaPlayer(coordinator, config_entry)])
+    
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_FOLLOW,
+        {vol.Optional(ATTR_TALKGROUPS, default=[]): vol.All(cv.ensure_list, [cv.string])},
+        "async_follow",
+    )
+    platform.async_register_entity_service(SERVICE_UNFOLLOW, {}, "async_unfollow")
 
 
 class RdioScannerMediaPlayer(CoordinatorEntity, MediaPlayerEntity):
-    """Media player for Rdio-Scanner calls."""
+    """Media player for Rdio-Scanner calls.
+    
+    Calls play from a queue, each for its recorded length, on the output
+    media player if one is configured. In follow mode new calls on the
+    followed talkgroups are queued as they arrive, and the audio of the
+    next queued calls is loaded into the audio cache ahead of time so
+    back-to-back traffic plays without waiting on the database.
+    """
     
     def __init__(self, coordinator, config_entry: ConfigEntry) -> None:
         """Initialize media player."""
@@ -43,20 +89,64 @@ class RdioScannerMediaPlayer(CoordinatorEntity, MediaPlayerEntity):
             MediaPlayerEntityFeature.PLAY
             | MediaPlayerEntityFeature.PAUSE
             | MediaPlayerEntityFeature.STOP
+            | MediaPlayerEntityFeature.PLAY_MEDIA
+            | MediaPlayerEntityFeature.MEDIA_ENQUEUE
+            | MediaPlayerEntityFeature.NEXT_TRACK
+            | MediaPlayerEntityFeature.CLEAR_PLAYLIST
+            | MediaPlayerEntityFeature.BROWSE_MEDIA
         )
         self._attr_device_info = {
             "identifiers": {(DOMAIN, config_entry.entry_id)},
             "name": config_entry.data.get(CONF_NAME, "Rdio-Scanner"),
             "manufacturer": "Rdio-Scanner",
         }
+        self._output = config_entry.options.get(CONF_PLAYER_OUTPUT) or None
         self._current_call = None
         self._state = MediaPlayerState.IDLE
+        self._available = None
+        # Calls waiting to play, next first
+        self._queue = deque(maxlen=PLAYER_QUEUE_SIZE)
+        # None when not following, an empty set follows every talkgroup
+        self._follow = None
+        self._position = 0.0
+        self._position_updated_at = None
+        self._unsub_timer = None
+        self._browser = RdioScannerBrowser(coordinator)
+    
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to new calls for follow mode and browsing."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_NEW_CALLS.format(self.config_entry.entry_id),
+                self._async_handle_new_calls,
+            )
+        )
+    
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel the end of call timer."""
+        self._cancel_timer()
+    
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only when availability changed; nothing else follows refreshes."""
+        if self.available != self._available:
+            self._available = self.available
+            self.async_write_ha_state()
     
     @property
     def state(self):
         """Return the state of the player."""
         return self._state
     
+    @property
+    def media_content_id(self):
+        """Return the audio URL of the current call."""
+        if self._current_call:
+            return audio_url(self.config_entry.entry_id, self._current_call['id'])
+        return None
+    
     @property
     def media_title(self):
         """Return the title of current media."""
@@ -71,13 +161,242 @@ class RdioScannerMediaPlayer(CoordinatorEntity, MediaPlayerEntity):
             return f"System {self._current_call.get('system', 'Unknown')}"
         return None
     
+    @property
+    def media_duration(self):
+        """Return the length of the current call."""
+        if self._current_call:
+            return self._current_call['call_length']
+        return None
+    
+    @property
+    def media_position(self):
+        """Return the position in the current call."""
+        if self._current_call:
+            return self._position
+        return None
+    
+    @property
+    def media_position_updated_at(self):
+        """Return when the position was last updated."""
+        return self._position_updated_at
+    
+    @property
+    def extra_state_attributes(self):
+        """Return the queue and follow mode."""
+        return {
+            "call_id": self._current_call['id'] if self._current_call else None,
+            "queue": [call['id'] for call in self._queue],
+            "follow": self._follow is not None,
+            "follow_talkgroups": sorted(
+                f"{system}:{talkgroup}" if system is not None else str(talkgroup)
+                for system, talkgroup in self._follow or ()
+            ),
+        }
+    
     async def async_play_media(self, media_type: str, media_id: str, **kwargs):
-        """Play a specific call."""
-        # Find the call in the coordinator data
-        calls = self.coordinator.data.get("calls", [])
+        """Play a call, or queue it depending on enqueue."""
+        try:
+            call_id = int(media_id)
+        except ValueError as err:
+            raise HomeAssistantError(f"Invalid call id: {media_id}") from err
+        
+        call = await self._async_get_call(call_id)
+        if call is None:
+            raise HomeAssistantError(f"Call {call_id} not found")
+        
+        enqueue = kwargs.get(ATTR_MEDIA_ENQUEUE)
+        if enqueue == MediaPlayerEnqueue.ADD:
+            self._queue.append(call)
+        elif enqueue == MediaPlayerEnqueue.NEXT:
+            self._queue.appendleft(call)
+        else:
+            if enqueue == MediaPlayerEnqueue.REPLACE:
+                self._queue.clear()
+            await self._async_start(call)
+            return
+        
+        if self._state == MediaPlayerState.IDLE:
+            await self._async_play_next()
+        else:
+            self._prefetch()
+            self.async_write_ha_state()
+    
+    async def async_browse_media(
+        self, media_content_type: str | None = None, media_content_id: str | None = None
+    ):
+        """Browse calls by system, talkgroup and day."""
+        return await self._browser.async_browse(media_content_type, media_content_id)
+    
+    async def async_media_play(self) -> None:
+        """Resume the current call, or start the queue."""
+        if self._state == MediaPlayerState.PAUSED:
+            self._state = MediaPlayerState.PLAYING
+            self._position_updated_at = dt_util.utcnow()
+            self._schedule_end()
+            await self._async_output("media_play")
+            self.async_write_ha_state()
+        elif self._state == MediaPlayerState.IDLE:
+            await self._async_play_next()
+    
+    async def async_media_pause(self) -> None:
+        """Pause the current call."""
+        if self._state != MediaPlayerState.PLAYING:
+            return
+        
+        self._cancel_timer()
+        self._update_position()
+        self._state = MediaPlayerState.PAUSED
+        await self._async_output("media_pause")
+        self.async_write_ha_state()
+    
+    async def async_media_stop(self) -> None:
+        """Stop playback; the queue is kept."""
+        self._cancel_timer()
+        self._current_call = None
+        self._state = MediaPlayerState.IDLE
+        self._position_updated_at = None
+        await self._async_output("media_stop")
+        self.async_write_ha_state()
+    
+    async def async_media_next_track(self) -> None:
+        """Skip to the next queued call."""
+        self._cancel_timer()
+        await self._async_play_next()
+    
+    async def async_clear_playlist(self) -> None:
+        """Clear the queue."""
+        self._queue.clear()
+        self.async_write_ha_state()
+    
+    async def async_follow(self, talkgroups) -> None:
+        """Queue new calls on talkgroups ("100" or "1:100") as they arrive, or on all if empty."""
+        try:
+            self._follow = parse_talkgroup_filter(",".join(talkgroups))
+        except ValueError as err:
+            raise HomeAssistantError(f"Invalid talkgroups: {talkgroups}") from err
+        self.async_write_ha_state()
+    
+    async def async_unfollow(self) -> None:
+        """Stop queueing new calls."""
+        self._follow = None
+        self.async_write_ha_state()
+    
+    @callback
+    def _async_handle_new_calls(self, calls) -> None:
+        """Queue new calls, oldest first, on the followed talkgroups."""
+        self._browser.add_calls(calls)
+        if self._follow is None:
+            return
+        
+        queued = False
         for call in calls:
-            if str(call.get("id")) == media_id:
-                self._current_call = call
-                self._state = MediaPlayerState.PLAYING
-                self.async_write_ha_state()
-                break
+            if self._follow and not (
+                (call['system'], call['talkgroup']) in self._follow
+                or (None, call['talkgroup']) in self._follow
+            ):
+                continue
+            self._queue.append(call)
+            queued = True
+        
+        if not queued:
+            return
+        
+        if self._state == MediaPlayerState.IDLE:
+            self.hass.async_create_task(self._async_play_next())
+        else:
+            self._prefetch()
+            self.async_write_ha_state()
+    
+    async def _async_get_call(self, call_id: int):
+        """Return a call from the ring buffer index, or the database if it's older."""
+        call = self.coordinator.calls_by_id.get(call_id)
+        if call is None:
+            call = await self.coordinator.db.get_call(call_id)
+        return call
+    
+    async def _async_play_next(self) -> None:
+        """Play the next queued call, or go idle if there is none."""
+        if self._queue:
+            await self._async_start(self._queue.popleft())
+            return
+        
+        self._current_call = None
+        self._state = MediaPlayerState.IDLE
+        self._position_updated_at = None
+        self.async_write_ha_state()
+    
+    async def _async_start(self, call) -> None:
+        """Start playing a call."""
+        self._cancel_timer()
+        self._current_call = call
+        self._state = MediaPlayerState.PLAYING
+        self._position = 0.0
+        self._position_updated_at = dt_util.utcnow()
+        self._schedule_end()
+        self._prefetch()
+        self.async_write_ha_state()
+        
+        if self._output:
+            url = async_process_play_media_url(
+                self.hass, audio_url(self.config_entry.entry_id, call['id'])
+            )
+            await self._async_output(
+                "play_media", media_content_id=url, media_content_type=MediaType.MUSIC
+            )
+    
+    async def _async_output(self, service: str, **data) -> None:
+        """Forward a media player service call to the output player, if any."""
+        if not self._output:
+            return
+        
+        try:
+            await self.hass.services.async_call(
+                "media_player", service, {"entity_id": self._output, **data}
+            )
+        except Exception as err:
+            _LOGGER.warning("Error calling %s on %s: %s", service, self._output, err)
+    
+    def _prefetch(self) -> None:
+        """Load the audio of the next queued calls into the audio cache."""
+        db = self.coordinator.db
+        if not db.audio_cache.max_bytes:
+            return
+        
+        for call in list(self._queue)[:PLAYER_PREFETCH]:
+            if db.audio_cache.get(call['id']) is None:
+                self.hass.async_create_background_task(
+                    self._async_prefetch(call['id']), f"{DOMAIN} prefetch {call['id']}"
+                )
+    
+    async def _async_prefetch(self, call_id: int) -> None:
+        """Load one call's audio, ignoring errors; playback will retry."""
+        try:
+            await self.coordinator.db.get_call_audio(call_id)
+        except Exception as err:
+            _LOGGER.debug("Error prefetching audio for call %s: %s", call_id, err)
+    
+    def _schedule_end(self) -> None:
+        """Move on to the next call when the current one ends."""
+        remaining = max((self._current_call['call_length'] or 0) - self._position, 0)
+        self._unsub_timer = async_call_later(
+            self.hass, remaining + PLAYER_CALL_GAP, self._async_call_ended
+        )
+    
+    async def _async_call_ended(self, _now) -> None:
+        """Play the next call once the current one ends."""
+        self._unsub_timer = None
+        await self._async_play_next()
+    
+    def _update_position(self) -> None:
+        """Add the time played since the last update to the position."""
+        now = dt_util.utcnow()
+        if self._position_updated_at is not None:
+            self._position += (now - self._position_updated_at).total_seconds()
+        self._position = min(self._position, self._current_call['call_length'] or 0)
+        self._position_updated_at = now
+    
+    def _cancel_timer(self) -> None:
+        """Cancel the end of call timer, if any."""
+        if self._unsub_timer:
+            self._unsub_timer()
+            self._unsub_timer = None
@@ -0,0 +1,172 @@
+"""Timings and counters for the Rdio-Scanner diagnostics."""
+from __future__ import annotations
+
+import functools
+import logging
+import sqlite3
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from .const import SLOW_QUERY_TIME
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Calls, duration and rows per database query, by name."""
+    
+    def __init__(self) -> None:
+        """Initialize the stats."""
+        # name -> [calls, failures, total seconds, max seconds, last seconds, rows]
+        self._queries: Dict[str, List[float]] = {}
+    
+    def record(self, name: str, duration: float, rows: Optional[int] = None, failed: bool = False) -> None:
+        """Record one run of a query."""
+        query = self._queries.setdefault(name, [0, 0, 0.0, 0.0, 0.0, 0])
+        query[0] += 1
+        query[1] += failed
+        query[2] += duration
+        query[3] = max(query[3], duration)
+        query[4] = duration
+        query[5] += rows or 0
+    
+    def slowest(self) -> Optional[tuple]:
+        """Return (name, mean seconds) of the query slowest on average."""
+        if not self._queries:
+            return None
+        name, query = max(self._queries.items(), key=lambda item: item[1][2] / item[1][0])
+        return name, query[2] / query[0]
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return the stats per query, in milliseconds."""
+        return {
+            name: {
+                "calls": int(calls),
+                "failures": int(failures),
+                "mean_ms": round(total / calls * 1000, 2),
+                "max_ms": round(longest * 1000, 2),
+                "last_ms": round(last * 1000, 2),
+                "rows": int(rows),
+            }
+            for name, (calls, failures, total, longest, last, rows) in sorted(self._queries.items())
+        }
+
+
+def timed_query(func):
+    """Record an RdioScannerDB query method's duration and rows in its query_stats."""
+    name = func.__name__.lstrip("_")
+    
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        started = time.monotonic()
+        try:
+            result = await func(self, *args, **kwargs)
+        except Exception:
+            self.query_stats.record(name, time.monotonic() - started, failed=True)
+            raise
+        self.query_stats.record(
+            name,
+            time.monotonic() - started,
+            len(result) if isinstance(result, list) else None,
+        )
+        return result
+    
+    return wrapper
+
+
+class RefreshStats:
+    """Duration and rows of the coordinator's refreshes."""
+    
+    def __init__(self) -> None:
+        """Initialize the stats."""
+        self.count = 0
+        self.failures = 0
+        self.last_duration: Optional[float] = None
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+        self.last_rows = 0
+        self.rows = 0
+        self.last_refresh: Optional[datetime] = None
+    
+    def record(self, duration: float, rows: int, failed: bool = False) -> None:
+        """Record one refresh."""
+        self.count += 1
+        self.failures += failed
+        self.last_duration = duration
+        self.max_duration = max(self.max_duration, duration)
+        self.total_duration += duration
+        self.last_rows = rows
+        self.rows += rows
+        self.last_refresh = datetime.now(timezone.utc)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return the stats, in milliseconds."""
+        return {
+            "refreshes": self.count,
+            "failures": self.failures,
+            "last_ms": None if self.last_duration is None else round(self.last_duration * 1000, 2),
+            "mean_ms": round(self.total_duration / self.count * 1000, 2) if self.count else None,
+            "max_ms": round(self.max_duration * 1000, 2),
+            "last_rows": self.last_rows,
+            "rows": self.rows,
+            "last_refresh": self.last_refresh.isoformat() if self.last_refresh else None,
+        }
+
+
+class AudioServed:
+    """Audio requests answered and bytes sent by the audio view."""
+    
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.requests = 0
+        self.partial = 0
+        self.not_modified = 0
+        self.bytes = 0
+    
+    def stats(self) -> Dict[str, int]:
+        """Return the counters."""
+        return {
+            "requests": self.requests,
+            "partial": self.partial,
+            "not_modified": self.not_modified,
+            "bytes": self.bytes,
+        }
+
+
+def log_slow_query(reader: sqlite3.Connection, query: str, params: Iterable[Any], duration: float) -> None:
+    """Log a slow query with its plan at debug level. Runs in the executor."""
+    if duration < SLOW_QUERY_TIME or not _LOGGER.isEnabledFor(logging.DEBUG):
+        return
+    try:
+        plan = reader.execute(f"EXPLAIN QUERY PLAN {query}", tuple(params)).fetchall()
+    except sqlite3.Error as err:
+        plan = [(0, 0, 0, f"no plan: {err}")]
+    _log_plan(query, duration, plan)
+
+
+async def async_log_slow_query(conn, query: str, params: Iterable[Any], duration: float) -> None:
+    """Log a slow query on an aiosqlite connection with its plan at debug level."""
+    if duration < SLOW_QUERY_TIME or not _LOGGER.isEnabledFor(logging.DEBUG):
+        return
+    try:
+        cursor = await conn.execute(f"EXPLAIN QUERY PLAN {query}", tuple(params))
+        plan = await cursor.fetchall()
+    except sqlite3.Error as err:
+        plan = [(0, 0, 0, f"no plan: {err}")]
+    _log_plan(query, duration, plan)
+
+
+def _log_plan(query: str, duration: float, plan) -> None:
+    """Log a query and its plan, indenting each step under its parent."""
+    depth = {0: 0}
+    steps = []
+    for step_id, parent, _, detail in plan:
+        depth[step_id] = depth.get(parent, 0) + 1
+        steps.append("  " * depth[step_id] + detail)
+    _LOGGER.debug(
+        "Slow query (%.0f ms): %s\n%s",
+        duration * 1000,
+        " ".join(query.split()),
+        "\n".join(steps),
+    )
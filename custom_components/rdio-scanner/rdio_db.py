@@ -1,15 +1,42 @@
 """Database interface for Rdio-Scanner."""
-import base64
+import asyncio
+import hashlib
 import json
 import logging
 import os
+import sqlite3
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
+from urllib.parse import quote
 
 import aiosqlite
 from homeassistant.const import CONF_PATH
 
-from .const import RDIO_TABLES
+from .audio_cache import AudioCache
+from .calls import CALL_COLUMNS, RdioScannerCall
+from .const import (
+    AUDIO_CACHE_MAX_ITEM_SIZE,
+    AUDIO_CHUNK_SIZE,
+    CONF_AUDIO_CACHE_SIZE,
+    CONF_AUDIO_CACHE_TTL,
+    DEFAULT_AUDIO_CACHE_SIZE,
+    DEFAULT_AUDIO_CACHE_TTL,
+    QUERY_SEARCH_TALKGROUPS,
+    RDIO_TABLES,
+    READER_CONNECTIONS,
+    READER_PRAGMAS,
+    SIDECAR_SYNC_BATCH,
+)
+from .metrics import (
+    AudioServed,
+    QueryStats,
+    async_log_slow_query,
+    log_slow_query,
+    timed_query,
+)
+from .sidecar import SOURCE_COLUMNS, RdioScannerSidecar
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -17,129 +44,447 @@ _LOGGER = logging.getLogger(__name__)
 class RdioScannerDB:
     """Interface to Rdio-Scanner SQLite database."""
     
-    def __init__(self, config: dict) -> None:
+    def __init__(self, config: dict, sidecar_path: Optional[str] = None) -> None:
         """Initialize database connection."""
         self.db_path = os.path.join(config[CONF_PATH], "rdio-scanner.db")
+        # Read-only so we never take a write lock against the Rdio-Scanner server
+        self._uri = f"file:{quote(self.db_path)}?mode=ro"
+        # Metadata connection used by the coordinator
         self.conn = None
-        self._audio_cache = {}
+        self.audio_cache = AudioCache(
+            max_bytes=config.get(CONF_AUDIO_CACHE_SIZE, DEFAULT_AUDIO_CACHE_SIZE) * 1024 * 1024,
+            max_item_bytes=AUDIO_CACHE_MAX_ITEM_SIZE,
+            ttl=config.get(CONF_AUDIO_CACHE_TTL, DEFAULT_AUDIO_CACHE_TTL),
+        )
+        # Reader connections for audio and background scans, leased one
+        # caller at a time so they never queue behind the metadata connection.
+        # aiosqlite has no incremental BLOB I/O, so these are plain sqlite3
+        # connections driven from the executor.
+        self._idle_readers: asyncio.Queue = asyncio.Queue()
+        self._reader_count = 0
+        # Readers leased when the database is closed are closed on return
+        self._closed = False
+        # Optional metadata index; metadata queries move there once it is built
+        self.sidecar = RdioScannerSidecar(sidecar_path) if sidecar_path else None
+        self.query_stats = QueryStats()
+        self.audio_served = AudioServed()
     
     async def connect(self) -> None:
         """Connect to database."""
+        self._closed = False
         if not self.conn:
-            self.conn = await aiosqlite.connect(self.db_path)
+            conn = await aiosqlite.connect(self._uri, uri=True, isolation_level=None)
+            try:
+                for pragma in READER_PRAGMAS:
+                    await conn.execute(pragma)
+            except Exception:
+                await conn.close()
+                raise
             # Enable row factory for dict-like access
-            self.conn.row_factory = aiosqlite.Row
+            conn.row_factory = aiosqlite.Row
+            self.conn = conn
     
     async def close(self) -> None:
         """Close database connection."""
+        self._closed = True
         if self.conn:
             await self.conn.close()
             self.conn = None
+        
+        if self.sidecar:
+            await self.sidecar.close()
+        
+        loop = asyncio.get_running_loop()
+        while not self._idle_readers.empty():
+            reader = self._idle_readers.get_nowait()
+            self._reader_count -= 1
+            await loop.run_in_executor(None, reader.close)
     
-    async def get_recent_calls(self, limit: int = 100) -> List[Dict[str, Any]]:
-        """Get recent calls from database."""
+    def _connect_reader(self) -> sqlite3.Connection:
+        """Open a read-only reader connection. Runs in the executor."""
+        reader = sqlite3.connect(
+            self._uri, uri=True, isolation_level=None, check_same_thread=False
+        )
+        try:
+            for pragma in READER_PRAGMAS:
+                reader.execute(pragma)
+        except sqlite3.Error:
+            reader.close()
+            raise
+        reader.row_factory = sqlite3.Row
+        return reader
+    
+    @asynccontextmanager
+    async def _lease_reader(self) -> AsyncIterator[sqlite3.Connection]:
+        """Lease a reader connection, opening one if the pool has room."""
+        if not self._idle_readers.empty():
+            reader = self._idle_readers.get_nowait()
+        elif self._reader_count < READER_CONNECTIONS:
+            self._reader_count += 1
+            try:
+                reader = await asyncio.get_running_loop().run_in_executor(
+                    None, self._connect_reader
+                )
+            except Exception:
+                self._reader_count -= 1
+                raise
+        else:
+            reader = await self._idle_readers.get()
+        
+        try:
+            yield reader
+        finally:
+            if self._closed:
+                self._reader_count -= 1
+                await asyncio.get_running_loop().run_in_executor(None, reader.close)
+            else:
+                self._idle_readers.put_nowait(reader)
+    
+    async def _run_reader(self, func, *args):
+        """Run func(reader, *args) in the executor on a leased reader connection."""
+        async with self._lease_reader() as reader:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, func, reader, *args
+            )
+    
+    async def _execute(self, query: str, params=(), row_factory=None) -> List[Any]:
+        """Run a query on the metadata connection and return all rows."""
         await self.connect()
         
-        query = """
-            SELECT 
-                id,
-                dateTime,
-                system,
-                talkgroup,
-                frequency,
-                frequencies,
-                patches,
-                sources,
-                len as call_length,
-                talkgroupData
+        started = time.monotonic()
+        cursor = await self.conn.execute(query, params)
+        if row_factory is not None:
+            cursor.row_factory = row_factory
+        rows = await cursor.fetchall()
+        await async_log_slow_query(self.conn, query, params, time.monotonic() - started)
+        return rows
+    
+    def reader_stats(self) -> Dict[str, int]:
+        """Return the reader pool's size and idle connections."""
+        return {
+            "open": self._reader_count,
+            "idle": self._idle_readers.qsize(),
+            "max": READER_CONNECTIONS,
+        }
+    
+    def file_sizes(self) -> Dict[str, int]:
+        """Return the sizes in bytes of the database, its WAL and the call index. Runs in the executor."""
+        files = {"database": self.db_path}
+        if self.sidecar:
+            files["index"] = self.sidecar.path
+        
+        sizes = {}
+        for name, path in files.items():
+            for suffix, key in (("", name), ("-wal", f"{name}_wal")):
+                try:
+                    sizes[key] = os.path.getsize(path + suffix)
+                except OSError:
+                    sizes[key] = 0
+        return sizes
+    
+    @timed_query
+    async def get_data_version(self) -> int:
+        """Get the data version, which changes when another connection commits."""
+        await self.connect()
+        
+        cursor = await self.conn.execute("PRAGMA data_version")
+        row = await cursor.fetchone()
+        
+        return row[0]
+    
+    @property
+    def use_sidecar(self) -> bool:
+        """Return True if metadata queries should go to the sidecar index."""
+        return self.sidecar is not None and self.sidecar.ready
+    
+    @timed_query
+    async def sync_sidecar(self, max_rows: Optional[int] = None) -> int:
+        """Copy calls added since the last sync into the sidecar index."""
+        count = 0
+        async with self.sidecar.lock:
+            await self.sidecar.connect()
+            while max_rows is None or count < max_rows:
+                rows = await self._run_reader(_fetchall, f"""
+                    SELECT {SOURCE_COLUMNS}
+                    FROM rdio_scanner_calls
+                    WHERE id > ?
+                    ORDER BY id
+                    LIMIT ?
+                """, (self.sidecar.last_id, SIDECAR_SYNC_BATCH))
+                await self.sidecar.add_calls(rows)
+                count += len(rows)
+                
+                if len(rows) < SIDECAR_SYNC_BATCH:
+                    self.sidecar.ready = True
+                    break
+        
+        return count
+    
+    @timed_query
+    async def prune_sidecar(self) -> int:
+        """Drop calls from the sidecar that Rdio-Scanner no longer has."""
+        row = await self._run_reader(
+            _fetchone, "SELECT MIN(id) FROM rdio_scanner_calls"
+        )
+        if row is None or row[0] is None:
+            return 0
+        return await self.sidecar.prune(row[0])
+    
+    @timed_query
+    async def get_recent_calls(self, limit: int = 100) -> List[RdioScannerCall]:
+        """Get recent calls from database."""
+        if self.use_sidecar:
+            return await self.sidecar.get_calls(limit=limit)
+        
+        query = f"""
+            SELECT {CALL_COLUMNS}
             FROM rdio_scanner_calls
-            ORDER BY dateTime DESC
+            ORDER BY dateTime DESC, id DESC
             LIMIT ?
         """
         
-        cursor = await self.conn.execute(query, (limit,))
-        rows = await cursor.fetchall()
+        # Records are built in the aiosqlite thread, JSON is decoded on access
+        return await self._execute(query, (limit,), RdioScannerCall.from_row)
+    
+    @timed_query
+    async def get_calls_since(
+        self, date_time: int, call_id: int, limit: int = 100
+    ) -> List[RdioScannerCall]:
+        """Get calls newer than the (dateTime, id) high-water mark, oldest first."""
+        # dateTime >= ? keeps the range scan on the dateTime index, the OR
+        # breaks ties between calls recorded in the same millisecond.
+        return await self._select_calls(
+            "dateTime >= ? AND (dateTime > ? OR id > ?)",
+            (date_time, date_time, call_id),
+            order="dateTime ASC, id ASC",
+            limit=limit,
+        )
+    
+    @timed_query
+    async def get_call(self, call_id: int) -> Optional[RdioScannerCall]:
+        """Get a single call by id."""
+        calls = await self._select_calls("id = ?", (call_id,), order="id", limit=1)
+        return calls[0] if calls else None
+    
+    @timed_query
+    async def get_calls_after(
+        self,
+        call_id: int,
+        limit: int = 100,
+        systems: Optional[List[int]] = None,
+        talkgroups: Optional[List[int]] = None,
+        selection: Optional[tuple] = None,
+    ) -> List[RdioScannerCall]:
+        """Get calls with an id above call_id, oldest first, optionally filtered."""
+        where, params = _call_filter(systems, talkgroups, selection=selection)
+        return await self._select_calls(
+            " AND ".join(["id > ?", *where]),
+            (call_id, *params),
+            order="id ASC",
+            limit=limit,
+        )
+    
+    @timed_query
+    async def get_calls_page(
+        self,
+        before: Optional[tuple] = None,
+        limit: int = 100,
+        search: Optional[str] = None,
+        unit: Optional[int] = None,
+        **filters: Any,
+    ) -> List[RdioScannerCall]:
+        """Get one page of calls, newest first, older than the (dateTime, id) cursor.
         
-        calls = []
-        for row in rows:
-            call = dict(row)
-            
-            # Parse JSON fields
-            if call.get('frequencies'):
-                try:
-                    call['frequencies'] = json.loads(call['frequencies'])
-                except:
-                    call['frequencies'] = []
-            
-            if call.get('patches'):
-                try:
-                    call['patches'] = json.loads(call['patches'])
-                except:
-                    call['patches'] = []
-            
-            if call.get('sources'):
-                try:
-                    call['sources'] = json.loads(call['sources'])
-                except:
-                    call['sources'] = []
-            
-            if call.get('talkgroupData'):
-                try:
-                    tg_data = json.loads(call['talkgroupData'])
-                    call['talkgroup_name'] = tg_data.get('label', f"TG {call['talkgroup']}")
-                    call['talkgroup_tag'] = tg_data.get('tag', '')
-                    call['talkgroup_group'] = tg_data.get('group', '')
-                except:
-                    call['talkgroup_name'] = f"TG {call['talkgroup']}"
-            
-            # Convert timestamp to readable format
-            if call.get('dateTime'):
-                call['timestamp'] = datetime.fromtimestamp(call['dateTime'] / 1000).isoformat()
-            
-            calls.append(call)
+        filters are the keyword arguments of _call_filter. Seeking past the
+        cursor instead of using OFFSET makes every page cost the same.
+        search (talkgroup label, tag or group text) and unit (a source unit
+        id) need the sidecar's search and unit tables, so use_sidecar must
+        be True to pass them.
+        """
+        # Tags only have a column of their own in the sidecar
+        tag_column = "tag" if self.use_sidecar else "json_extract(talkgroupData, '$.tag')"
+        where, params = _call_filter(tag_column=tag_column, **filters)
+        if search is not None:
+            talkgroups = await self.sidecar.search_talkgroups(search, QUERY_SEARCH_TALKGROUPS)
+            if not talkgroups:
+                return []
+            where.append(
+                f"({' OR '.join(['(system = ? AND talkgroup = ?)'] * len(talkgroups))})"
+            )
+            for talkgroup in talkgroups:
+                params.extend((talkgroup['system'], talkgroup['talkgroup']))
+        if before is not None:
+            where.append("dateTime <= ? AND (dateTime < ? OR id < ?)")
+            params.extend((before[0], before[0], before[1]))
         
-        return calls
+        if unit is not None:
+            return await self.sidecar.get_unit_calls(
+                unit, " AND ".join(where), params, limit=limit
+            )
+        return await self._select_calls(
+            " AND ".join(where) or "1",
+            params,
+            order="dateTime DESC, id DESC",
+            limit=limit,
+        )
     
-    async def get_call_audio(self, call_id: int) -> Optional[Dict[str, Any]]:
-        """Get audio data for a specific call."""
-        # Check cache first
-        if call_id in self._audio_cache:
-            return self._audio_cache[call_id]
+    async def iter_calls(
+        self,
+        before: Optional[tuple] = None,
+        page_size: int = 100,
+        **filters: Any,
+    ) -> AsyncIterator[RdioScannerCall]:
+        """Yield matching calls, newest first, one page in memory at a time."""
+        while True:
+            page = await self.get_calls_page(before, page_size, **filters)
+            for call in page:
+                yield call
+            if len(page) < page_size:
+                return
+            before = (page[-1]['dateTime'], page[-1]['id'])
+    
+    async def export_calls(
+        self,
+        path: str,
+        archive_format: str = "zip",
+        progress=None,
+        cancel=None,
+        **filters: Any,
+    ) -> Dict[str, int]:
+        """Export matching calls with their audio to an archive at path.
         
-        await self.connect()
+        Runs on a connection of its own in the executor, so neither the
+        coordinator nor audio requests wait for it.
+        """
+        from .export import write_export
         
-        query = """
-            SELECT audio, audioName, audioType
+        where, params = _call_filter(
+            tag_column="json_extract(talkgroupData, '$.tag')", **filters
+        )
+        loop = asyncio.get_running_loop()
+        reader = await loop.run_in_executor(None, self._connect_reader)
+        try:
+            return await loop.run_in_executor(
+                None, write_export, reader, path, archive_format, where, params, progress, cancel
+            )
+        finally:
+            await loop.run_in_executor(None, reader.close)
+    
+    async def _select_calls(
+        self, where: str, params, order: str, limit: int
+    ) -> List[RdioScannerCall]:
+        """Select call records from the sidecar if ready, else the metadata connection."""
+        if self.use_sidecar:
+            return await self.sidecar.get_calls(where, params, order=order, limit=limit)
+        
+        query = f"""
+            SELECT {CALL_COLUMNS}
             FROM rdio_scanner_calls
-            WHERE id = ?
+            WHERE {where}
+            ORDER BY {order}
+            LIMIT ?
         """
         
-        cursor = await self.conn.execute(query, (call_id,))
-        row = await cursor.fetchone()
+        return await self._execute(query, (*params, limit), RdioScannerCall.from_row)
+    
+    async def get_call_audio(self, call_id: int) -> Optional[Dict[str, Any]]:
+        """Get audio data for a specific call."""
+        # Concurrent requests for the same call share a single BLOB read
+        return await self.audio_cache.get_or_load(
+            call_id,
+            lambda: self._load_call_audio(call_id),
+            size_of=lambda audio_data: len(audio_data['data']),
+        )
+    
+    @timed_query
+    async def _load_call_audio(self, call_id: int) -> Optional[Dict[str, Any]]:
+        """Read audio data for a specific call from the database."""
+        row = await self._run_reader(_fetchone, """
+            SELECT audio, audioName, audioType
+            FROM rdio_scanner_calls
+            WHERE id = ?
+        """, (call_id,))
         
         if row and row['audio']:
-            audio_data = {
+            return {
                 'data': row['audio'],  # This is the BLOB
                 'type': row['audioType'] or 'audio/mpeg',
                 'name': row['audioName'] or f'call_{call_id}.mp3',
             }
-            
-            # Cache if not too large (< 10MB)
-            if len(row['audio']) < 10 * 1024 * 1024:
-                self._audio_cache[call_id] = audio_data
-                
-                # Limit cache size
-                if len(self._audio_cache) > 50:
-                    self._audio_cache.pop(next(iter(self._audio_cache)))
-            
-            return audio_data
         
         return None
     
+    @timed_query
+    async def get_call_audio_info(self, call_id: int) -> Optional[Dict[str, Any]]:
+        """Get audio size and type for a call without reading the BLOB."""
+        row = await self._run_reader(_fetchone, """
+            SELECT length(audio) AS size, audioName, audioType, dateTime
+            FROM rdio_scanner_calls
+            WHERE id = ?
+        """, (call_id,))
+        
+        if row and row['size']:
+            return audio_info(
+                call_id, row['size'], row['audioType'], row['audioName'], row['dateTime']
+            )
+        
+        return None
+    
+    async def iter_call_audio(
+        self,
+        call_id: int,
+        start: int = 0,
+        end: Optional[int] = None,
+        size: Optional[int] = None,
+        chunk_size: int = AUDIO_CHUNK_SIZE,
+    ) -> AsyncIterator[bytes]:
+        """Yield the audio bytes in [start, end) in chunks of at most chunk_size.
+        
+        Audio small enough to cache is loaded once and served from memory,
+        anything larger is streamed straight from the BLOB.
+        """
+        if size is not None and self.audio_cache.fits(size):
+            cached = await self.get_call_audio(call_id)
+        else:
+            cached = self.audio_cache.get(call_id)
+        
+        if cached:
+            data = cached['data']
+            end = len(data) if end is None else min(end, len(data))
+            for offset in range(start, end, chunk_size):
+                yield data[offset:min(offset + chunk_size, end)]
+            return
+        
+        offset = start
+        while end is None or offset < end:
+            size = chunk_size if end is None else min(chunk_size, end - offset)
+            # Lease per chunk so long recordings don't starve other readers
+            started = time.monotonic()
+            chunk = await self._run_reader(_read_blob, call_id, offset, size)
+            self.query_stats.record("read_blob", time.monotonic() - started)
+            if not chunk:
+                return
+            offset += len(chunk)
+            yield chunk
+    
+    async def read_call_audio(self, call_id: int, start: int, end: int) -> bytes:
+        """Read a small byte range of a call's audio without loading it into the memory cache."""
+        if cached := self.audio_cache.get(call_id):
+            return cached['data'][start:end]
+        
+        started = time.monotonic()
+        data = await self._run_reader(_read_blob, call_id, start, end - start)
+        self.query_stats.record("read_blob", time.monotonic() - started)
+        return data
+    
+    @timed_query
+    async def extract_call_audio(self, call_id: int, path: str) -> Optional[tuple]:
+        """Copy a call's audio to a file. Return (sha256 hex digest, audio info), or None if the call is gone."""
+        return await self._run_reader(_extract_blob, call_id, path)
+    
+    @timed_query
     async def get_systems(self) -> List[Dict[str, Any]]:
         """Get all systems from database."""
-        await self.connect()
-        
         query = """
             SELECT DISTINCT system
             FROM rdio_scanner_calls
@@ -147,8 +492,7 @@ class RdioScannerDB:
             ORDER BY system
         """
         
-        cursor = await self.conn.execute(query)
-        rows = await cursor.fetchall()
+        rows = await self._execute(query)
         
         systems = []
         for row in rows:
@@ -159,10 +503,9 @@ class RdioScannerDB:
         
         return systems
     
+    @timed_query
     async def get_talkgroups(self, system_id: Optional[int] = None) -> List[Dict[str, Any]]:
         """Get unique talkgroups from calls."""
-        await self.connect()
-        
         where_clause = "WHERE system = ?" if system_id else ""
         params = [system_id] if system_id else []
         
@@ -175,8 +518,7 @@ class RdioScannerDB:
             ORDER BY talkgroup
         """
         
-        cursor = await self.conn.execute(query, params)
-        rows = await cursor.fetchall()
+        rows = await self._execute(query, params)
         
         talkgroups = []
         for row in rows:
@@ -198,10 +540,147 @@ class RdioScannerDB:
         
         return talkgroups
     
-    async def get_call_stats(self, hours: int = 24) -> Dict[str, Any]:
-        """Get call statistics."""
+    @timed_query
+    async def get_max_call_id(self) -> int:
+        """Get the id of the newest call that metadata queries can see."""
+        if self.use_sidecar:
+            return self.sidecar.last_id
+        
+        rows = await self._execute("SELECT MAX(id) FROM rdio_scanner_calls")
+        return rows[0][0] or 0
+    
+    @timed_query
+    async def get_catalog(self, max_id: Optional[int] = None) -> List[Any]:
+        """Get per-talkgroup aggregates and the latest talkgroupData in one scan, of calls up to max_id."""
+        if self.use_sidecar:
+            return await self.sidecar.get_catalog(max_id)
+        
+        # With a single MAX() aggregate SQLite takes talkgroupData from the
+        # newest call of each group. This is a full scan, so it runs on a
+        # reader instead of holding up the metadata connection.
+        query = """
+            SELECT
+                system,
+                talkgroup,
+                talkgroupData,
+                COUNT(*) AS calls,
+                MAX(dateTime) AS last_call
+            FROM rdio_scanner_calls
+            WHERE id <= ?
+            GROUP BY system, talkgroup
+        """
+        
+        return await self._run_reader(
+            _fetchall, query, ((1 << 63) - 1 if max_id is None else max_id,)
+        )
+    
+    @timed_query
+    async def get_schema(self) -> Dict[str, set]:
+        """Get each table's columns from the schema alone, without reading any rows."""
+        await self.connect()
+        
+        cursor = await self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'rdio_scanner_%'"
+        )
+        schema = {}
+        for (table,) in await cursor.fetchall():
+            cursor = await self.conn.execute(f"PRAGMA table_info({table})")
+            schema[table] = {row['name'] for row in await cursor.fetchall()}
+        return schema
+    
+    @timed_query
+    async def get_system_labels(self) -> Dict[int, str]:
+        """Get system labels from the systems table, if it has them."""
         await self.connect()
         
+        table = RDIO_TABLES["systems"]
+        cursor = await self.conn.execute(f"PRAGMA table_info({table})")
+        columns = {row['name'] for row in await cursor.fetchall()}
+        if not {'systemId', 'label'} <= columns:
+            return {}
+        
+        cursor = await self.conn.execute(f"SELECT systemId, label FROM {table}")
+        return {
+            row['systemId']: row['label']
+            for row in await cursor.fetchall()
+            if row['label']
+        }
+    
+    @timed_query
+    async def get_system_count(self) -> int:
+        """Get the number of systems in the systems table, labelled or not."""
+        await self.connect()
+        
+        table = RDIO_TABLES["systems"]
+        cursor = await self.conn.execute(f"PRAGMA table_info({table})")
+        if 'systemId' not in {row['name'] for row in await cursor.fetchall()}:
+            return 0
+        
+        cursor = await self.conn.execute(f"SELECT COUNT(DISTINCT systemId) FROM {table}")
+        return (await cursor.fetchone())[0]
+    
+    async def _query_calls_metadata(self, query: str, params=()) -> List[Any]:
+        """Run a metadata query against the sidecar if ready, else a reader.
+        
+        The query names the calls table as {calls}.
+        """
+        if self.use_sidecar:
+            return await self.sidecar.fetchall(query.format(calls="calls"), params)
+        return await self._run_reader(
+            _fetchall, query.format(calls="rdio_scanner_calls"), params
+        )
+    
+    @timed_query
+    async def get_first_call_time(self) -> Optional[int]:
+        """Get the dateTime of the oldest call."""
+        rows = await self._query_calls_metadata("SELECT MIN(dateTime) FROM {calls}")
+        return rows[0][0] if rows else None
+    
+    @timed_query
+    async def get_hourly_stats(self, start: int, end: int) -> List[Any]:
+        """Get call counts and airtime per hour, system and talkgroup in [start, end)."""
+        return await self._query_calls_metadata("""
+            SELECT
+                dateTime / 3600000 AS hour,
+                system,
+                talkgroup,
+                COUNT(*) AS calls,
+                COALESCE(SUM(len), 0) AS airtime
+            FROM {calls}
+            WHERE dateTime >= ? AND dateTime < ?
+            GROUP BY hour, system, talkgroup
+            ORDER BY hour
+        """, (start, end))
+    
+    @timed_query
+    async def get_talkgroup_quarter_hours(self, system_id: int, talkgroup_id: int) -> List[Any]:
+        """Get call counts per quarter hour since the epoch on a talkgroup.
+        
+        Every UTC offset is a whole number of quarter hours, so these add up
+        to exact counts per local day. The sidecar seeks its (system,
+        talkgroup, dateTime) index; rdio-scanner.db's (dateTime, system,
+        talkgroup) index covers the query, so audio pages aren't read.
+        """
+        return await self._query_calls_metadata("""
+            SELECT dateTime / 900000 AS quarter, COUNT(*) AS calls
+            FROM {calls}
+            WHERE system = ? AND talkgroup = ?
+            GROUP BY quarter
+        """, (system_id, talkgroup_id))
+    
+    @timed_query
+    async def get_call_times_since(self, since: int) -> List[Any]:
+        """Get system, talkgroup, dateTime and len of calls at or after since, oldest first."""
+        return await self._query_calls_metadata("""
+            SELECT system, talkgroup, dateTime, len AS call_length
+            FROM {calls}
+            WHERE dateTime >= ?
+            ORDER BY dateTime, id
+        """, (since,))
+    
+    @timed_query
+    async def get_call_stats(self, hours: int = 24) -> Dict[str, Any]:
+        """Get call statistics."""
         # Calculate timestamp for X hours ago
         since = datetime.now() - timedelta(hours=hours)
         since_ms = int(since.timestamp() * 1000)
@@ -217,7 +696,127 @@ class RdioScannerDB:
             WHERE dateTime > ?
         """
         
-        cursor = await self.conn.execute(query, (since_ms,))
-        row = await cursor.fetchone()
+        rows = await self._execute(query, (since_ms,))
         
-        return dict(row) if row else {}
+        return dict(rows[0]) if rows else {}
+
+
+def _call_filter(
+    systems: Optional[List[int]] = None,
+    talkgroups: Optional[List[int]] = None,
+    tags: Optional[List[str]] = None,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    min_length: Optional[float] = None,
+    selection: Optional[tuple] = None,
+    tag_column: str = "tag",
+) -> tuple:
+    """Return WHERE clauses and parameters for the call filters that are set.
+    
+    selection is a (systems, talkgroups) pair from parse_talkgroup_selection,
+    matched exactly, such as the talkgroups a config entry shows.
+    """
+    where, params = [], []
+    if systems:
+        where.append(f"system IN ({', '.join('?' * len(systems))})")
+        params.extend(systems)
+    if talkgroups:
+        where.append(f"talkgroup IN ({', '.join('?' * len(talkgroups))})")
+        params.extend(talkgroups)
+    if tags:
+        where.append(f"{tag_column} IN ({', '.join('?' * len(tags))})")
+        params.extend(tags)
+    if start is not None:
+        where.append("dateTime >= ?")
+        params.append(start)
+    if end is not None:
+        where.append("dateTime < ?")
+        params.append(end)
+    if min_length is not None:
+        where.append("len >= ?")
+        params.append(min_length)
+    if selection and any(selection):
+        selected_systems, selected_talkgroups = selection
+        clauses = []
+        if selected_systems:
+            clauses.append(f"system IN ({', '.join('?' * len(selected_systems))})")
+            params.extend(sorted(selected_systems))
+        for system, talkgroup in selected_talkgroups:
+            if system is None:
+                clauses.append("talkgroup = ?")
+                params.append(talkgroup)
+            else:
+                clauses.append("(system = ? AND talkgroup = ?)")
+                params.extend((system, talkgroup))
+        where.append(f"({' OR '.join(clauses)})")
+    return where, params
+
+
+def _fetchone(reader: sqlite3.Connection, query: str, params=()) -> Optional[sqlite3.Row]:
+    """Run a query on a reader and return the first row."""
+    started = time.monotonic()
+    row = reader.execute(query, params).fetchone()
+    log_slow_query(reader, query, params, time.monotonic() - started)
+    return row
+
+
+def _fetchall(reader: sqlite3.Connection, query: str, params=()) -> List[sqlite3.Row]:
+    """Run a query on a reader and return all rows."""
+    started = time.monotonic()
+    rows = reader.execute(query, params).fetchall()
+    log_slow_query(reader, query, params, time.monotonic() - started)
+    return rows
+
+
+def _read_blob(reader: sqlite3.Connection, call_id: int, offset: int, size: int) -> bytes:
+    """Read part of an audio BLOB with incremental BLOB I/O, or nothing if the audio is NULL."""
+    try:
+        blob = reader.blobopen("rdio_scanner_calls", "audio", call_id, readonly=True)
+    except sqlite3.OperationalError:
+        row = reader.execute(
+            "SELECT audio IS NULL FROM rdio_scanner_calls WHERE id = ?", (call_id,)
+        ).fetchone()
+        if row and row[0]:
+            return b""
+        raise
+    
+    with blob:
+        blob.seek(offset)
+        return blob.read(size)
+
+
+def audio_info(
+    call_id: int, size: int, audio_type: Optional[str], name: Optional[str], date_time: int
+) -> Dict[str, Any]:
+    """Return what the audio view needs to serve a call."""
+    return {
+        'size': size,
+        'type': audio_type or 'audio/mpeg',
+        'name': name or f'call_{call_id}.mp3',
+        'dateTime': date_time,
+    }
+
+
+def _extract_blob(reader: sqlite3.Connection, call_id: int, path: str) -> Optional[tuple]:
+    """Copy an audio BLOB to a synced file in chunks, hashing it on the way."""
+    row = reader.execute(
+        "SELECT audioType, audioName, dateTime FROM rdio_scanner_calls WHERE id = ?",
+        (call_id,),
+    ).fetchone()
+    if row is None:
+        return None
+    try:
+        blob = reader.blobopen("rdio_scanner_calls", "audio", call_id, readonly=True)
+    except sqlite3.OperationalError:
+        return None
+    
+    digest = hashlib.sha256()
+    size = 0
+    with blob, open(path, "wb") as file:
+        while chunk := blob.read(AUDIO_CHUNK_SIZE):
+            digest.update(chunk)
+            file.write(chunk)
+            size += len(chunk)
+        file.flush()
+        os.fsync(file.fileno())
+    return digest.hexdigest(), audio_info(call_id, size, *row)
@@ -2,18 +2,42 @@
 from __future__ import annotations
 
 import logging
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timedelta, timezone
 
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_NAME
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    CONF_NAME,
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfInformation,
+    UnitOfTime,
+)
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
+from .audio_handler import audio_url
+from .const import (
+    CALL_RATE_WINDOW,
+    CONF_TALKGROUP_ENTITIES,
+    DEFAULT_TALKGROUP_ENTITIES,
+    DOMAIN,
+)
+from .entity import RdioScannerTalkgroupEntity, async_add_talkgroup_entities
 
 _LOGGER = logging.getLogger(__name__)
 
+# Only the database size sensor polls
+SCAN_INTERVAL = timedelta(minutes=1)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -28,9 +52,39 @@ async def async_setup_entry(
         RdioScannerTotalCalls(coordinator, config_entry),
         RdioScannerSystems(coordinator, config_entry),
         RdioScannerTalkgroups(coordinator, config_entry),
+        RdioScannerAudioCache(coordinator, config_entry),
+        RdioScannerRefreshDuration(coordinator, config_entry),
+        RdioScannerSlowestQuery(coordinator, config_entry),
+        RdioScannerAudioServed(coordinator, config_entry),
+        RdioScannerDatabaseSize(coordinator, config_entry),
     ]
     
     async_add_entities(sensors)
+    
+    if not config_entry.options.get(CONF_TALKGROUP_ENTITIES, DEFAULT_TALKGROUP_ENTITIES):
+        return
+    
+    # One query seeds every call rate sensor; the call window may not span an hour
+    since = int(time.time() * 1000) - int(CALL_RATE_WINDOW.total_seconds() * 1000)
+    history = defaultdict(list)
+    try:
+        for row in await coordinator.db.get_call_times_since(since):
+            history[(row['system'], row['talkgroup'])].append(row)
+    except Exception as err:
+        _LOGGER.warning("Error loading call rates, using the call window: %s", err)
+    
+    def talkgroup_sensors(talkgroup, calls):
+        key = (talkgroup['system'], talkgroup['id'])
+        return [
+            RdioScannerTalkgroupLastCall(coordinator, config_entry, talkgroup, calls),
+            RdioScannerTalkgroupCallRate(
+                coordinator, config_entry, talkgroup, history.pop(key, calls)
+            ),
+        ]
+    
+    async_add_talkgroup_entities(
+        hass, config_entry, coordinator, async_add_entities, talkgroup_sensors
+    )
 
 
 class RdioScannerSensorBase(CoordinatorEntity, SensorEntity):
@@ -46,6 +100,15 @@ class RdioScannerSensorBase(CoordinatorEntity, SensorEntity):
             "manufacturer": "Rdio-Scanner",
             "model": "Radio Scanner",
         }
+        self._written = None
+    
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only when the state or attributes changed."""
+        written = (self.available, self.state, self.extra_state_attributes)
+        if written != self._written:
+            self._written = written
+            self.async_write_ha_state()
 
 
 class RdioScannerActiveCalls(RdioScannerSensorBase):
@@ -62,6 +125,15 @@ class RdioScannerActiveCalls(RdioScannerSensorBase):
     def state(self):
         """Return the state."""
         return self.coordinator.data.get("active_calls", 0)
+    
+    @property
+    def extra_state_attributes(self):
+        """Return the talkgroups with a call in progress."""
+        talkgroups = []
+        for system_id, talkgroup_id in self.coordinator.active_calls.talkgroups:
+            talkgroup = self.coordinator.catalog.get_talkgroup(system_id, talkgroup_id)
+            talkgroups.append(talkgroup['name'] if talkgroup else f"TG {talkgroup_id}")
+        return {"active_talkgroups": sorted(talkgroups)}
 
 
 class RdioScannerTotalCalls(RdioScannerSensorBase):
@@ -123,3 +195,246 @@ class RdioScannerTalkgroups(RdioScannerSensorBase):
     def state(self):
         """Return the state."""
         return len(self.coordinator.data.get("talkgroups", []))
+
+
+class RdioScannerAudioCache(RdioScannerSensorBase):
+    """Sensor for the audio cache hit rate."""
+    
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_native_unit_of_measurement = PERCENTAGE
+    
+    def __init__(self, coordinator, config_entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, config_entry)
+        self._attr_name = f"{config_entry.data.get(CONF_NAME)} Audio Cache"
+        self._attr_unique_id = f"{config_entry.entry_id}_audio_cache"
+        self._attr_icon = "mdi:memory"
+    
+    @property
+    def native_value(self):
+        """Return the hit rate."""
+        hit_rate = self.coordinator.db.audio_cache.stats()["hit_rate"]
+        return None if hit_rate is None else round(hit_rate * 100, 1)
+    
+    @property
+    def extra_state_attributes(self):
+        """Return cache counters."""
+        return self.coordinator.db.audio_cache.stats()
+
+
+class RdioScannerRefreshDuration(RdioScannerSensorBase):
+    """Sensor for how long the last refresh took."""
+    
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    
+    def __init__(self, coordinator, config_entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, config_entry)
+        self._attr_name = f"{config_entry.data.get(CONF_NAME)} Refresh Duration"
+        self._attr_unique_id = f"{config_entry.entry_id}_refresh_duration"
+        self._attr_icon = "mdi:timer-outline"
+    
+    @property
+    def native_value(self):
+        """Return the last refresh's duration."""
+        return self.coordinator.refresh_stats.stats()["last_ms"]
+    
+    @property
+    def extra_state_attributes(self):
+        """Return refresh counters."""
+        stats = self.coordinator.refresh_stats.stats()
+        del stats["last_ms"], stats["last_refresh"]
+        return stats
+
+
+class RdioScannerSlowestQuery(RdioScannerSensorBase):
+    """Sensor for the database query slowest on average."""
+    
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    
+    def __init__(self, coordinator, config_entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, config_entry)
+        self._attr_name = f"{config_entry.data.get(CONF_NAME)} Slowest Query"
+        self._attr_unique_id = f"{config_entry.entry_id}_slowest_query"
+        self._attr_icon = "mdi:database-clock"
+    
+    @property
+    def native_value(self):
+        """Return the slowest query's mean duration."""
+        slowest = self.coordinator.db.query_stats.slowest()
+        return None if slowest is None else round(slowest[1] * 1000, 1)
+    
+    @property
+    def extra_state_attributes(self):
+        """Return the slowest query and its counters."""
+        slowest = self.coordinator.db.query_stats.slowest()
+        if slowest is None:
+            return {}
+        return {"query": slowest[0], **self.coordinator.db.query_stats.stats()[slowest[0]]}
+
+
+class RdioScannerAudioServed(RdioScannerSensorBase):
+    """Sensor for the audio sent by the audio endpoint."""
+    
+    _attr_device_class = SensorDeviceClass.DATA_SIZE
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_native_unit_of_measurement = UnitOfInformation.MEGABYTES
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    
+    def __init__(self, coordinator, config_entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, config_entry)
+        self._attr_name = f"{config_entry.data.get(CONF_NAME)} Audio Served"
+        self._attr_unique_id = f"{config_entry.entry_id}_audio_served"
+        self._attr_icon = "mdi:upload-network"
+    
+    @property
+    def native_value(self):
+        """Return the audio sent since startup."""
+        return round(self.coordinator.db.audio_served.bytes / 1024 / 1024, 1)
+    
+    @property
+    def extra_state_attributes(self):
+        """Return request counters."""
+        stats = self.coordinator.db.audio_served.stats()
+        del stats["bytes"]
+        return stats
+
+
+class RdioScannerDatabaseSize(RdioScannerSensorBase):
+    """Sensor for the size of rdio-scanner.db and its WAL."""
+    
+    _attr_device_class = SensorDeviceClass.DATA_SIZE
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_native_unit_of_measurement = UnitOfInformation.MEGABYTES
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    
+    def __init__(self, coordinator, config_entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, config_entry)
+        self._attr_name = f"{config_entry.data.get(CONF_NAME)} Database Size"
+        self._attr_unique_id = f"{config_entry.entry_id}_database_size"
+        self._attr_icon = "mdi:database"
+        self._sizes = {}
+    
+    @property
+    def should_poll(self) -> bool:
+        """Poll the file sizes; they change without a refresh."""
+        return True
+    
+    async def async_update(self) -> None:
+        """Read the file sizes."""
+        self._sizes = await self.hass.async_add_executor_job(self.coordinator.db.file_sizes)
+    
+    @property
+    def native_value(self):
+        """Return the size of the database with its WAL."""
+        if not self._sizes:
+            return None
+        return round((self._sizes["database"] + self._sizes["database_wal"]) / 1024 / 1024, 1)
+    
+    @property
+    def extra_state_attributes(self):
+        """Return each file's size in MB."""
+        return {
+            f"{name}_mb": round(size / 1024 / 1024, 1) for name, size in self._sizes.items()
+        }
+
+
+class RdioScannerTalkgroupLastCall(RdioScannerTalkgroupEntity, SensorEntity):
+    """Sensor for the time of a talkgroup's last call."""
+    
+    _attr_device_class = SensorDeviceClass.TIMESTAMP
+    _attr_icon = "mdi:clock-outline"
+    
+    def __init__(self, coordinator, config_entry: ConfigEntry, talkgroup, calls) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, config_entry, talkgroup, calls, "last_call", "Last Call")
+        self._date_time = talkgroup['last_call']
+    
+    @property
+    def native_value(self):
+        """Return the time of the last call."""
+        if not self._date_time:
+            return None
+        return datetime.fromtimestamp(self._date_time / 1000, tz=timezone.utc)
+    
+    def _update_from_calls(self, calls) -> bool:
+        """Take the newest call."""
+        latest = None
+        for call in calls:
+            latest = call
+        if latest is None:
+            return False
+        
+        self._date_time = latest['dateTime']
+        self._attr_extra_state_attributes = {
+            **self._attr_extra_state_attributes,
+            "call_id": latest['id'],
+            "call_length": latest['call_length'],
+            "frequency": latest['frequency'],
+            "audio_url": audio_url(self.config_entry.entry_id, latest['id']),
+        }
+        return True
+
+
+class RdioScannerTalkgroupCallRate(RdioScannerTalkgroupEntity, SensorEntity):
+    """Sensor for a talkgroup's calls over the last hour."""
+    
+    _attr_icon = "mdi:chart-line"
+    _attr_native_unit_of_measurement = "calls/h"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    
+    def __init__(self, coordinator, config_entry: ConfigEntry, talkgroup, calls) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, config_entry, talkgroup, calls, "call_rate", "Calls Per Hour")
+        self._window = int(CALL_RATE_WINDOW.total_seconds() * 1000)
+        # dateTime of each call in the window, oldest first
+        self._times = deque()
+    
+    @property
+    def native_value(self):
+        """Return the number of calls in the last hour."""
+        return len(self._times)
+    
+    def _update_from_calls(self, calls) -> bool:
+        """Count calls still inside the window."""
+        count = len(self._times)
+        cutoff = int(time.time() * 1000) - self._window
+        self._times.extend(
+            call['dateTime'] for call in calls if call['dateTime'] > cutoff
+        )
+        self._expire()
+        return len(self._times) != count
+    
+    @callback
+    def _async_expire(self, now) -> None:
+        """Drop calls that left the window."""
+        self._unsub_timer = None
+        count = len(self._times)
+        self._expire()
+        if len(self._times) != count:
+            self.async_write_ha_state()
+    
+    def _expire(self) -> None:
+        """Drop calls older than the window and schedule the next expiry."""
+        cutoff = int(time.time() * 1000) - self._window
+        while self._times and self._times[0] <= cutoff:
+            self._times.popleft()
+        
+        # A single timer, for the oldest call; none while the talkgroup is quiet
+        if self._times and self._unsub_timer is None:
+            self._unsub_timer = async_call_later(
+                self.hass, (self._times[0] - cutoff) / 1000, self._async_expire
+            )
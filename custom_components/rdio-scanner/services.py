@@ -0,0 +1,234 @@
+"""Services for Rdio-Scanner."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import uuid
+from functools import partial
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    EVENT_EXPORT_FINISHED,
+    EVENT_EXPORT_PROGRESS,
+    QUERY_MAX_LIMIT,
+)
+from .export import EXPORT_FORMATS
+from .websocket_api import call_message
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_QUERY_CALLS = "query_calls"
+SERVICE_EXPORT_CALLS = "export_calls"
+
+ATTR_ENTRY_ID = "entry_id"
+ATTR_SYSTEMS = "systems"
+ATTR_TALKGROUPS = "talkgroups"
+ATTR_TAGS = "tags"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_MIN_LENGTH = "min_length"
+ATTR_LIMIT = "limit"
+ATTR_CURSOR = "cursor"
+ATTR_SEARCH = "search"
+ATTR_UNIT = "unit"
+ATTR_FORMAT = "format"
+ATTR_DIRECTORY = "directory"
+
+FILTER_SCHEMA = {
+    vol.Optional(ATTR_ENTRY_ID): cv.string,
+    vol.Optional(ATTR_SYSTEMS): vol.All(cv.ensure_list, [vol.Coerce(int)]),
+    vol.Optional(ATTR_TALKGROUPS): vol.All(cv.ensure_list, [vol.Coerce(int)]),
+    vol.Optional(ATTR_TAGS): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional(ATTR_START): cv.datetime,
+    vol.Optional(ATTR_END): cv.datetime,
+    vol.Optional(ATTR_MIN_LENGTH): vol.Coerce(float),
+}
+
+QUERY_CALLS_SCHEMA = vol.Schema(
+    {
+        **FILTER_SCHEMA,
+        vol.Optional(ATTR_LIMIT, default=100): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=QUERY_MAX_LIMIT)
+        ),
+        vol.Optional(ATTR_CURSOR): cv.string,
+        vol.Optional(ATTR_SEARCH): cv.string,
+        vol.Optional(ATTR_UNIT): vol.Coerce(int),
+    }
+)
+
+EXPORT_CALLS_SCHEMA = vol.Schema(
+    {
+        **FILTER_SCHEMA,
+        vol.Optional(ATTR_FORMAT, default="zip"): vol.In(EXPORT_FORMATS),
+        vol.Optional(ATTR_DIRECTORY): cv.string,
+    }
+)
+
+
+def setup_services(hass: HomeAssistant) -> None:
+    """Register the services once for all config entries."""
+    if hass.services.has_service(DOMAIN, SERVICE_QUERY_CALLS):
+        return
+    
+    async def async_query_calls(call: ServiceCall) -> ServiceResponse:
+        """Return one page of call history and the cursor for the next."""
+        entry_id, coordinator = get_coordinator(hass, call.data.get(ATTR_ENTRY_ID))
+        limit = call.data[ATTR_LIMIT]
+        
+        before = None
+        if cursor := call.data.get(ATTR_CURSOR):
+            try:
+                date_time, call_id = (int(part) for part in cursor.split(":"))
+            except ValueError as err:
+                raise HomeAssistantError(f"Invalid cursor {cursor}") from err
+            before = (date_time, call_id)
+        
+        search = call.data.get(ATTR_SEARCH)
+        unit = call.data.get(ATTR_UNIT)
+        if (search is not None or unit is not None) and not coordinator.db.use_sidecar:
+            raise HomeAssistantError(
+                "search and unit need a call index; enable Build a call index "
+                "in the integration options and wait for it to finish building"
+            )
+        
+        # One extra row tells whether there is another page
+        calls = await coordinator.db.get_calls_page(
+            before,
+            limit + 1,
+            search=search,
+            unit=unit,
+            selection=coordinator.view,
+            **_filters(call.data),
+        )
+        next_cursor = None
+        if len(calls) > limit:
+            calls = calls[:limit]
+            next_cursor = f"{calls[-1]['dateTime']}:{calls[-1]['id']}"
+        
+        return {
+            "calls": [call_message(entry_id, record) for record in calls],
+            "next_cursor": next_cursor,
+        }
+    
+    async def async_export_calls(call: ServiceCall) -> ServiceResponse:
+        """Start exporting calls and their audio in the background."""
+        entry_id, coordinator = get_coordinator(hass, call.data.get(ATTR_ENTRY_ID))
+        
+        directory = call.data.get(ATTR_DIRECTORY)
+        if directory is None:
+            directory = hass.config.path(DOMAIN, "exports")
+        elif not hass.config.is_allowed_path(directory):
+            raise HomeAssistantError(
+                f"{directory} is not in allowlist_external_dirs"
+            )
+        
+        # The suffix keeps exports started in the same second apart
+        export_id = (
+            f"rdio_scanner_{dt_util.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        )
+        path = os.path.join(directory, f"{export_id}.{call.data[ATTR_FORMAT]}")
+        await hass.async_add_executor_job(partial(os.makedirs, directory, exist_ok=True))
+        
+        cancel = threading.Event()
+        coordinator.exports.add(cancel)
+        
+        def progress(calls: int, size: int) -> None:
+            # Called from the export thread
+            hass.bus.fire(
+                EVENT_EXPORT_PROGRESS,
+                {"export_id": export_id, "path": path, "calls": calls, "bytes": size},
+            )
+        
+        async def async_export() -> None:
+            result = {"export_id": export_id, "path": path}
+            try:
+                result.update(
+                    await coordinator.db.export_calls(
+                        path,
+                        call.data[ATTR_FORMAT],
+                        progress,
+                        cancel,
+                        selection=coordinator.view,
+                        **_filters(call.data),
+                    )
+                )
+            except asyncio.CancelledError:
+                # The export thread doesn't stop with the task
+                cancel.set()
+                raise
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.error("Error exporting calls to %s: %s", path, err)
+                result["error"] = str(err) or type(err).__name__
+            finally:
+                coordinator.exports.discard(cancel)
+            hass.bus.async_fire(EVENT_EXPORT_FINISHED, result)
+        
+        coordinator.entry.async_create_background_task(
+            hass, async_export(), f"{DOMAIN} export {export_id}"
+        )
+        return {"export_id": export_id, "path": path}
+    
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_QUERY_CALLS,
+        async_query_calls,
+        schema=QUERY_CALLS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_CALLS,
+        async_export_calls,
+        schema=EXPORT_CALLS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+def remove_services(hass: HomeAssistant) -> None:
+    """Remove the services once the last config entry is unloaded."""
+    if not hass.data.get(DOMAIN):
+        hass.services.async_remove(DOMAIN, SERVICE_QUERY_CALLS)
+        hass.services.async_remove(DOMAIN, SERVICE_EXPORT_CALLS)
+
+
+def get_coordinator(hass: HomeAssistant, entry_id: str | None):
+    """Return (entry id, coordinator), defaulting to the only config entry."""
+    coordinators = hass.data.get(DOMAIN, {})
+    if entry_id is None:
+        if len(coordinators) != 1:
+            raise HomeAssistantError("entry_id is required with more than one Rdio-Scanner")
+        entry_id = next(iter(coordinators))
+    if entry_id not in coordinators:
+        raise HomeAssistantError(f"Config entry {entry_id} not found")
+    return entry_id, coordinators[entry_id]
+
+
+def _filters(data: dict) -> dict:
+    """Return the call filters of a service call as get_calls_page arguments."""
+    filters = {
+        "systems": data.get(ATTR_SYSTEMS),
+        "talkgroups": data.get(ATTR_TALKGROUPS),
+        "tags": data.get(ATTR_TAGS),
+        "min_length": data.get(ATTR_MIN_LENGTH),
+    }
+    for attr in (ATTR_START, ATTR_END):
+        if (value := data.get(attr)) is not None:
+            # The datetime selector gives naive local times
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+            filters[attr] = int(value.timestamp() * 1000)
+    return filters
@@ -0,0 +1,337 @@
+"""Sidecar metadata index for Rdio-Scanner."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from functools import partial
+from typing import Any, Iterable, List, Optional, Sequence
+
+import aiosqlite
+
+from .calls import CALL_COLUMNS, RdioScannerCall, parse_talkgroup_data
+from .metrics import async_log_slow_query
+
+_LOGGER = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+# Calls as denormalized metadata, no audio. Column names match
+# rdio_scanner_calls so CALL_COLUMNS works against either database.
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS calls (
+        id INTEGER PRIMARY KEY,
+        dateTime INTEGER NOT NULL,
+        system INTEGER,
+        talkgroup INTEGER,
+        frequency INTEGER,
+        frequencies TEXT,
+        patches TEXT,
+        sources TEXT,
+        len INTEGER,
+        talkgroupData TEXT,
+        label TEXT,
+        tag TEXT,
+        grp TEXT,
+        audioSize INTEGER
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS calls_time ON calls (dateTime, id)",
+    "CREATE INDEX IF NOT EXISTS calls_talkgroup ON calls (system, talkgroup, dateTime, id)",
+    "CREATE INDEX IF NOT EXISTS calls_tag ON calls (tag, dateTime, id)",
+    """
+    CREATE TABLE IF NOT EXISTS talkgroups (
+        system INTEGER,
+        talkgroup INTEGER,
+        label TEXT,
+        tag TEXT,
+        grp TEXT,
+        PRIMARY KEY (system, talkgroup)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS call_units (
+        unit INTEGER NOT NULL,
+        dateTime INTEGER NOT NULL,
+        id INTEGER NOT NULL,
+        PRIMARY KEY (unit, dateTime, id)
+    ) WITHOUT ROWID
+    """,
+)
+
+FTS_SCHEMA = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS talkgroups_fts USING fts5(
+        label, tag, grp, content='talkgroups'
+    )
+"""
+
+INSERT_CALL = """
+    INSERT OR IGNORE INTO calls (
+        id, dateTime, system, talkgroup, frequency, frequencies, patches,
+        sources, len, talkgroupData, label, tag, grp, audioSize
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Rows pulled from rdio-scanner.db per sync batch
+SOURCE_COLUMNS = f"{CALL_COLUMNS}, length(audio) AS audioSize"
+
+
+class RdioScannerSidecar:
+    """Integration-owned SQLite index of call metadata, kept in sync by call id."""
+    
+    def __init__(self, path: str) -> None:
+        """Initialize the sidecar."""
+        self.path = path
+        self.conn: Optional[aiosqlite.Connection] = None
+        self.fts = False
+        # Highest rdio_scanner_calls id copied so far
+        self.last_id = 0
+        # True once the initial build has caught up with rdio-scanner.db
+        self.ready = False
+        self.lock = asyncio.Lock()
+        # (system, talkgroup) -> (label, tag, group) already indexed
+        self._talkgroups: dict[tuple, tuple] = {}
+    
+    async def connect(self) -> None:
+        """Open the sidecar, creating or rebuilding its schema as needed."""
+        if self.conn:
+            return
+        
+        await asyncio.get_running_loop().run_in_executor(
+            None, partial(os.makedirs, os.path.dirname(self.path), exist_ok=True)
+        )
+        conn = await aiosqlite.connect(self.path)
+        try:
+            await conn.execute("PRAGMA journal_mode = WAL")
+            await conn.execute("PRAGMA synchronous = NORMAL")
+            
+            cursor = await conn.execute("PRAGMA user_version")
+            version = (await cursor.fetchone())[0]
+            if version not in (0, SCHEMA_VERSION):
+                _LOGGER.info("Rebuilding call index %s for schema %s", self.path, SCHEMA_VERSION)
+                for table in ("talkgroups_fts", "talkgroups", "call_units", "calls", "meta"):
+                    await conn.execute(f"DROP TABLE IF EXISTS {table}")
+            
+            for statement in SCHEMA:
+                await conn.execute(statement)
+            try:
+                await conn.execute(FTS_SCHEMA)
+                self.fts = True
+            except aiosqlite.OperationalError:
+                _LOGGER.debug("SQLite has no FTS5, talkgroup search will use LIKE")
+            await conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            await conn.commit()
+            
+            cursor = await conn.execute("SELECT value FROM meta WHERE key = 'last_id'")
+            row = await cursor.fetchone()
+            cursor = await conn.execute(
+                "SELECT system, talkgroup, label, tag, grp FROM talkgroups"
+            )
+            talkgroups = await cursor.fetchall()
+        except Exception:
+            await conn.close()
+            raise
+        
+        self.last_id = row[0] if row else 0
+        self._talkgroups = {(tg[0], tg[1]): tuple(tg[2:]) for tg in talkgroups}
+        self.conn = conn
+    
+    async def close(self) -> None:
+        """Close the sidecar."""
+        if self.conn:
+            await self.conn.close()
+            self.conn = None
+    
+    async def add_calls(self, rows: Sequence[Sequence[Any]]) -> None:
+        """Index rows of SOURCE_COLUMNS from rdio-scanner.db, in id order."""
+        if not rows:
+            return
+        
+        await self.connect()
+        calls, units, talkgroups = [], [], {}
+        for row in map(tuple, rows):
+            call_id, date_time = row[0], row[1]
+            labels = parse_talkgroup_data(row[9]) or (None, None, None)
+            calls.append((*row[:10], *labels, row[10]))
+            units.extend((unit, date_time, call_id) for unit in _units(row[7]))
+            
+            key = (row[2], row[3])
+            if labels[0] is not None and self._talkgroups.get(key) != labels:
+                talkgroups[key] = labels
+        
+        await self.conn.executemany(INSERT_CALL, calls)
+        await self.conn.executemany(
+            "INSERT OR IGNORE INTO call_units (unit, dateTime, id) VALUES (?, ?, ?)",
+            units,
+        )
+        for key, labels in talkgroups.items():
+            await self._set_talkgroup(key, labels)
+        
+        self.last_id = calls[-1][0]
+        await self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_id', ?)",
+            (self.last_id,),
+        )
+        await self.conn.commit()
+    
+    async def _set_talkgroup(self, key: tuple, labels: tuple) -> None:
+        """Insert or relabel a talkgroup, keeping the FTS index in step."""
+        cursor = await self.conn.execute(
+            "SELECT rowid, label, tag, grp FROM talkgroups WHERE system = ? AND talkgroup = ?",
+            key,
+        )
+        old = await cursor.fetchone()
+        if old and self.fts:
+            await self.conn.execute(
+                "INSERT INTO talkgroups_fts (talkgroups_fts, rowid, label, tag, grp) "
+                "VALUES ('delete', ?, ?, ?, ?)",
+                old,
+            )
+        
+        cursor = await self.conn.execute(
+            "INSERT OR REPLACE INTO talkgroups (rowid, system, talkgroup, label, tag, grp) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (old[0] if old else None, *key, *labels),
+        )
+        if self.fts:
+            await self.conn.execute(
+                "INSERT INTO talkgroups_fts (rowid, label, tag, grp) VALUES (?, ?, ?, ?)",
+                (cursor.lastrowid, *labels),
+            )
+        self._talkgroups[key] = labels
+    
+    async def prune(self, min_id: int) -> int:
+        """Drop calls that Rdio-Scanner has pruned from its own database."""
+        await self.connect()
+        await self.conn.execute(
+            "DELETE FROM call_units WHERE id < ?", (min_id,)
+        )
+        cursor = await self.conn.execute("DELETE FROM calls WHERE id < ?", (min_id,))
+        await self.conn.commit()
+        return cursor.rowcount
+    
+    async def get_calls(
+        self,
+        where: str = "",
+        params: Iterable[Any] = (),
+        order: str = "dateTime DESC, id DESC",
+        limit: int = 100,
+    ) -> List[RdioScannerCall]:
+        """Select call records from the index."""
+        await self.connect()
+        query = f"""
+            SELECT {CALL_COLUMNS}
+            FROM calls
+            {f"WHERE {where}" if where else ""}
+            ORDER BY {order}
+            LIMIT ?
+        """
+        return await self._select(query, (*params, limit), RdioScannerCall.from_row)
+    
+    async def fetchall(self, query: str, params: Iterable[Any] = ()) -> List[Any]:
+        """Run a read query against the index."""
+        await self.connect()
+        return await self._select(query, tuple(params))
+    
+    async def get_catalog(self, max_id: Optional[int] = None) -> List[Any]:
+        """Get per-talkgroup aggregates of calls up to max_id, served from the (system, talkgroup) index."""
+        await self.connect()
+        return await self._select(
+            """
+            SELECT
+                system,
+                talkgroup,
+                talkgroupData,
+                COUNT(*) AS calls,
+                MAX(dateTime) AS last_call
+            FROM calls
+            WHERE id <= ?
+            GROUP BY system, talkgroup
+            """,
+            ((1 << 63) - 1 if max_id is None else max_id,),
+        )
+    
+    async def _select(self, query: str, params: tuple = (), row_factory=aiosqlite.Row) -> List[Any]:
+        """Run a read query and return all rows, logging it if slow."""
+        started = time.monotonic()
+        cursor = await self.conn.execute(query, params)
+        cursor.row_factory = row_factory
+        rows = await cursor.fetchall()
+        await async_log_slow_query(self.conn, query, params, time.monotonic() - started)
+        return rows
+    
+    async def search_talkgroups(self, text: str, limit: int = 50) -> List[Any]:
+        """Find talkgroups whose label, tag or group matches every word of text."""
+        words = text.replace('"', " ").split()
+        if not words:
+            return []
+        
+        await self.connect()
+        if self.fts:
+            # Quote each word so user input can't inject FTS syntax
+            match = " ".join(f'"{word}"*' for word in words)
+            query = """
+                SELECT talkgroups.system, talkgroups.talkgroup,
+                    talkgroups.label, talkgroups.tag, talkgroups.grp
+                FROM talkgroups_fts
+                JOIN talkgroups ON talkgroups.rowid = talkgroups_fts.rowid
+                WHERE talkgroups_fts MATCH ?
+                ORDER BY rank
+                LIMIT ?
+            """
+            params = (match, limit)
+        else:
+            labels = "IFNULL(label, '') || ' ' || IFNULL(tag, '') || ' ' || IFNULL(grp, '')"
+            match = " AND ".join([f"({labels}) LIKE ?"] * len(words))
+            query = f"""
+                SELECT system, talkgroup, label, tag, grp
+                FROM talkgroups
+                WHERE {match}
+                LIMIT ?
+            """
+            params = (*(f"%{word}%" for word in words), limit)
+        
+        return await self._select(query, params)
+    
+    async def get_unit_calls(
+        self,
+        unit: int,
+        where: str = "",
+        params: Iterable[Any] = (),
+        limit: int = 100,
+    ) -> List[RdioScannerCall]:
+        """Get the newest calls a unit transmitted on, optionally matching where too."""
+        return await self.get_calls(
+            f"id IN (SELECT id FROM call_units WHERE unit = ?){f' AND {where}' if where else ''}",
+            (unit, *params),
+            limit=limit,
+        )
+
+
+def _units(raw: Optional[str]) -> set:
+    """Return the unit ids in a sources JSON column."""
+    if not raw:
+        return set()
+    
+    try:
+        sources = json.loads(raw)
+    except (TypeError, ValueError):
+        return set()
+    
+    if not isinstance(sources, list):
+        return set()
+    
+    return {
+        source['src']
+        for source in sources
+        if isinstance(source, dict) and isinstance(source.get('src'), int)
+    }
@@ -0,0 +1,180 @@
+"""Long-term call statistics for Rdio-Scanner."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_NAME, UnitOfTime
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    STATISTICS_BATCH_DELAY,
+    STATISTICS_BATCH_HOURS,
+    STATISTICS_OPEN_HOURS,
+    STATISTICS_UPDATE_INTERVAL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+HOUR_MS = 3600 * 1000
+
+
+class RdioScannerStatistics:
+    """Push hourly call counts and airtime into the recorder's long-term statistics.
+    
+    Rdio-Scanner stamps a call with its start time but writes it when it
+    ends, so the newest STATISTICS_OPEN_HOURS hours stay open and are
+    re-imported from the closed running sums on every update. Older hours
+    are closed: imported once, their sums carried forward. The first run
+    backfills the whole database in bounded batches; the position and sums
+    of closed hours are kept in a Store so restarts resume where they left
+    off.
+    """
+    
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, coordinator) -> None:
+        """Initialize the statistics pipeline."""
+        self.hass = hass
+        self.entry = entry
+        self.coordinator = coordinator
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.statistics.{entry.entry_id}")
+        self._prefix = f"{DOMAIN}:{entry.entry_id.lower()}"
+        self._name = entry.data.get(CONF_NAME, "Rdio-Scanner")
+        # First hour (hours since the epoch) not closed yet
+        self._next_hour: int | None = None
+        # statistic_id -> running sum over closed hours
+        self._sums: dict[str, float] = {}
+        self._lock = asyncio.Lock()
+    
+    async def async_start(self) -> CALLBACK_TYPE:
+        """Resume from the stored position and update every STATISTICS_UPDATE_INTERVAL."""
+        if data := await self._store.async_load():
+            self._next_hour = data["next_hour"]
+            self._sums = data["sums"]
+        
+        self.entry.async_create_background_task(
+            self.hass, self.async_update(), f"{DOMAIN} statistics import"
+        )
+        return async_track_time_interval(
+            self.hass, self._async_interval, STATISTICS_UPDATE_INTERVAL
+        )
+    
+    async def _async_interval(self, now: datetime) -> None:
+        """Update on the interval."""
+        await self.async_update()
+    
+    async def async_update(self) -> None:
+        """Close hours that left the open window and re-import the open ones."""
+        if self._lock.locked():
+            return
+        
+        async with self._lock:
+            try:
+                await self._async_import_pending()
+            except Exception as err:
+                _LOGGER.error("Error importing call statistics: %s", err)
+    
+    async def _async_import_pending(self) -> None:
+        """Close pending hours in batches of STATISTICS_BATCH_HOURS, then import the open ones."""
+        db = self.coordinator.db
+        current_hour = int(time.time() * 1000) // HOUR_MS
+        open_hour = current_hour - STATISTICS_OPEN_HOURS + 1
+        
+        if self._next_hour is None:
+            first_call = await db.get_first_call_time()
+            if first_call is None:
+                return
+            self._next_hour = first_call // HOUR_MS
+        
+        while self._next_hour < open_hour:
+            end_hour = min(self._next_hour + STATISTICS_BATCH_HOURS, open_hour)
+            rows = await db.get_hourly_stats(self._next_hour * HOUR_MS, end_hour * HOUR_MS)
+            self._import(rows, self._sums)
+            
+            self._next_hour = end_hour
+            await self._store.async_save(
+                {"next_hour": self._next_hour, "sums": self._sums}
+            )
+            
+            if self._next_hour < open_hour:
+                # Backfill; leave room for everything else using the database
+                await asyncio.sleep(STATISTICS_BATCH_DELAY)
+        
+        # Open hours build on the closed sums without advancing them
+        rows = await db.get_hourly_stats(
+            self._next_hour * HOUR_MS, (current_hour + 1) * HOUR_MS
+        )
+        self._import(rows, dict(self._sums))
+    
+    def _import(self, rows, sums: dict[str, float]) -> None:
+        """Queue per-system and per-talkgroup statistics for the given rows, adding to sums."""
+        # statistic_id -> metadata, and statistic_id -> hour -> value
+        metadata: dict[str, StatisticMetaData] = {}
+        values: dict[str, dict[int, float]] = defaultdict(lambda: defaultdict(float))
+        
+        for hour, system, talkgroup, calls, airtime in rows:
+            if not self.coordinator.in_view(system, talkgroup):
+                continue
+            for statistic_id, meta, value in self._series(system, talkgroup, calls, airtime):
+                metadata.setdefault(statistic_id, meta)
+                values[statistic_id][hour] += value
+        
+        for statistic_id, hours in values.items():
+            total = sums.get(statistic_id, 0)
+            statistics = []
+            for hour in sorted(hours):
+                total += hours[hour]
+                statistics.append(
+                    StatisticData(
+                        start=datetime.fromtimestamp(hour * 3600, tz=timezone.utc),
+                        state=hours[hour],
+                        sum=total,
+                    )
+                )
+            sums[statistic_id] = total
+            async_add_external_statistics(self.hass, metadata[statistic_id], statistics)
+    
+    def _series(self, system: int, talkgroup: int, calls: int, airtime: int):
+        """Yield (statistic_id, metadata, value) for one row."""
+        catalog = self.coordinator.catalog
+        system_info = catalog.get_system(system)
+        system_name = system_info['name'] if system_info else f"System {system}"
+        talkgroup_info = catalog.get_talkgroup(system, talkgroup)
+        talkgroup_name = talkgroup_info['name'] if talkgroup_info else f"TG {talkgroup}"
+        
+        for key, name in (
+            (f"system_{system}", system_name),
+            (f"talkgroup_{system}_{talkgroup}", talkgroup_name),
+        ):
+            yield (
+                f"{self._prefix}_{key}_calls",
+                self._metadata(f"{key}_calls", f"{self._name} {name} calls", None),
+                calls,
+            )
+            yield (
+                f"{self._prefix}_{key}_airtime",
+                self._metadata(
+                    f"{key}_airtime", f"{self._name} {name} airtime", UnitOfTime.SECONDS
+                ),
+                airtime,
+            )
+    
+    def _metadata(self, key: str, name: str, unit: str | None) -> StatisticMetaData:
+        """Return statistic metadata."""
+        return StatisticMetaData(
+            has_mean=False,
+            has_sum=True,
+            name=name,
+            source=DOMAIN,
+            statistic_id=f"{self._prefix}_{key}",
+            unit_of_measurement=unit,
+        )
@@ -0,0 +1,188 @@
+"""Continuous audio stream of calls for Rdio-Scanner."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Iterable, Optional, Set, Tuple
+
+from aiohttp import ClientConnectionError, hdrs, web
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+
+from .const import (
+    DOMAIN,
+    SIGNAL_NEW_CALLS,
+    STREAM_CHECK_INTERVAL,
+    STREAM_MAX_PENDING,
+    STREAM_PAGE_SIZE,
+)
+from .events import parse_talkgroup_selection, selection_filter
+
+_LOGGER = logging.getLogger(__name__)
+
+STREAM_URL = "/api/rdio_scanner/stream/{entry_id}/{talkgroups}"
+
+
+def stream_url(entry_id: str, talkgroups: str = "all") -> str:
+    """Return the stream URL for talkgroups ("100", "1:100" or "1:*"), or all."""
+    return STREAM_URL.format(entry_id=entry_id, talkgroups=talkgroups)
+
+
+class RdioScannerStreamView(HomeAssistantView):
+    """Serve calls as one continuous MP3 stream.
+    
+    Calls are sent back to back as they arrive, each read from its BLOB in
+    chunks with its ID3 tags stripped, so decoders see a single stream of
+    MP3 frames. Calls that aren't MP3 are skipped. With ?since=<call id>
+    the stream starts with the calls after that one.
+    """
+    
+    url = STREAM_URL
+    name = "api:rdio_scanner:stream"
+    requires_auth = True
+    
+    async def get(
+        self, request: web.Request, entry_id: str, talkgroups: str
+    ) -> web.StreamResponse:
+        """Stream calls until the client disconnects."""
+        hass = request.app["hass"]
+        coordinator = hass.data.get(DOMAIN, {}).get(entry_id)
+        if coordinator is None:
+            return web.Response(status=404, text="Stream not found")
+        
+        try:
+            systems, talkgroups = parse_talkgroup_selection(talkgroups)
+            since = int(request.query["since"]) if "since" in request.query else None
+        except ValueError:
+            return web.Response(status=400, text="Invalid talkgroups or since")
+        
+        feed = _CallFeed(systems, talkgroups)
+        # Subscribe first so calls committed while history streams are kept
+        unsub = async_dispatcher_connect(
+            hass, SIGNAL_NEW_CALLS.format(entry_id), feed.async_add_calls
+        )
+        
+        response = web.StreamResponse(
+            headers={
+                hdrs.CACHE_CONTROL: "no-cache, no-store",
+                hdrs.CONTENT_TYPE: "audio/mpeg",
+            }
+        )
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        
+        # History is narrowed in SQL where possible, and checked as it streams
+        history_filter = selection_filter(systems, talkgroups)
+        
+        try:
+            last_id = since
+            while last_id is not None:
+                calls = await coordinator.db.get_calls_after(
+                    last_id, limit=STREAM_PAGE_SIZE, **history_filter
+                )
+                for call in calls:
+                    if feed.matches(call) and coordinator.in_view(call['system'], call['talkgroup']):
+                        await _write_call(response, coordinator.db, call['id'])
+                    last_id = call['id']
+                if len(calls) < STREAM_PAGE_SIZE:
+                    break
+            
+            while hass.data.get(DOMAIN, {}).get(entry_id) is coordinator:
+                try:
+                    call = await asyncio.wait_for(feed.async_next(), STREAM_CHECK_INTERVAL)
+                except asyncio.TimeoutError:
+                    continue
+                if last_id is not None and call['id'] <= last_id:
+                    continue
+                await _write_call(response, coordinator.db, call['id'])
+                last_id = call['id']
+        except (ConnectionResetError, ClientConnectionError):
+            _LOGGER.debug("Call stream %s closed by the client", request.path)
+        except asyncio.CancelledError:
+            _LOGGER.debug("Call stream %s cancelled", request.path)
+            raise
+        finally:
+            unsub()
+        
+        return response
+
+
+class _CallFeed:
+    """New calls that pass a stream's filter, waiting to be sent.
+    
+    Holds at most STREAM_MAX_PENDING calls. A client that can't keep up
+    skips the oldest, so it stays close to live.
+    """
+    
+    def __init__(
+        self, systems: Set[int], talkgroups: Set[Tuple[Optional[int], int]]
+    ) -> None:
+        """Initialize the feed."""
+        self.systems = systems
+        self.talkgroups = talkgroups
+        self._pending: deque = deque(maxlen=STREAM_MAX_PENDING)
+        self._ready = asyncio.Event()
+    
+    def matches(self, call) -> bool:
+        """Return True if the call is on one of the stream's talkgroups."""
+        if not self.systems and not self.talkgroups:
+            return True
+        return (
+            call['system'] in self.systems
+            or (call['system'], call['talkgroup']) in self.talkgroups
+            or (None, call['talkgroup']) in self.talkgroups
+        )
+    
+    @callback
+    def async_add_calls(self, calls: Iterable[Any]) -> None:
+        """Queue new calls, oldest first."""
+        for call in calls:
+            if self.matches(call):
+                self._pending.append(call)
+        if self._pending:
+            self._ready.set()
+    
+    async def async_next(self):
+        """Return the next call, waiting for one if there is none."""
+        while not self._pending:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._pending.popleft()
+
+
+async def _write_call(response: web.StreamResponse, db, call_id: int) -> None:
+    """Write a call's MP3 frames to the stream."""
+    audio_info = await db.get_call_audio_info(call_id)
+    if audio_info is None:
+        return
+    
+    size = audio_info['size']
+    if audio_info['type'] not in ("audio/mpeg", "audio/mp3"):
+        _LOGGER.debug("Skipping call %s in stream: %s is not MP3", call_id, audio_info['type'])
+        return
+    
+    start, end = await _mp3_frames(db, call_id, size)
+    async for chunk in db.iter_call_audio(call_id, start, end, size=size):
+        await response.write(chunk)
+
+
+async def _mp3_frames(db, call_id: int, size: int) -> Tuple[int, int]:
+    """Return the byte range of an MP3 file between its ID3v2 and ID3v1 tags."""
+    start, end = 0, size
+    
+    head = await db.read_call_audio(call_id, 0, 10)
+    if len(head) == 10 and head[:3] == b"ID3":
+        # Tag size is a 28 bit "syncsafe" integer, 7 bits per byte
+        tag_size = 0
+        for byte in head[6:10]:
+            tag_size = tag_size << 7 | byte & 0x7F
+        # The footer flag adds another 10 bytes
+        start = min(10 + tag_size + (10 if head[5] & 0x10 else 0), size)
+    
+    if end - start >= 128 and await db.read_call_audio(call_id, end - 128, end - 125) == b"TAG":
+        end -= 128
+    
+    return start, end
+
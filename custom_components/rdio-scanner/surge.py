@@ -0,0 +1,358 @@
+"""Talkgroup surge detection for Rdio-Scanner."""
+from __future__ import annotations
+
+import logging
+import math
+import time
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_SURGE_MULTIPLE,
+    DEFAULT_SURGE_MULTIPLE,
+    DOMAIN,
+    EVENT_SURGE,
+    SURGE_BASELINE_DAYS,
+    SURGE_CHECK_INTERVAL,
+    SURGE_CLEAR_RATIO,
+    SURGE_MIN_AIRTIME,
+    SURGE_MIN_CALLS,
+    SURGE_MIN_DAYS,
+    SURGE_SAVE_DELAY,
+    SURGE_WINDOW,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+# Weight of the newest day in each hour's baseline
+ALPHA = 2 / (SURGE_BASELINE_DAYS + 1)
+WINDOW_MS = SURGE_WINDOW.total_seconds() * 1000
+# Decayed sums over the window, scaled to an hour
+PER_HOUR = 3600 * 1000 / WINDOW_MS
+
+
+def _local_hour(date_time: int) -> int:
+    """Return the hours since the epoch, in local time, of a call time in milliseconds."""
+    local = dt_util.as_local(dt_util.utc_from_timestamp(date_time / 1000))
+    return int(date_time / 1000 + local.utcoffset().total_seconds()) // 3600
+
+
+class TalkgroupActivity:
+    """Recent activity and hour-of-day baseline of one talkgroup."""
+    
+    __slots__ = (
+        "hour", "calls", "airtime", "hours", "recent_calls", "recent_airtime", "updated", "baseline",
+    )
+    
+    def __init__(self, hour: int, updated: int) -> None:
+        """Initialize with no history."""
+        # Local hour being counted, and its calls and airtime so far
+        self.hour = hour
+        self.calls = 0
+        self.airtime = 0.0
+        # Hours since the talkgroup was first seen
+        self.hours = 0
+        # Calls and airtime decayed over SURGE_WINDOW, as of updated (ms)
+        self.recent_calls = 0.0
+        self.recent_airtime = 0.0
+        self.updated = updated
+        # EWMA of calls per hour of the day, then of airtime per hour of the day
+        self.baseline = array("d", bytes(8 * 48))
+    
+    def add_call(self, date_time: int, hour: int, length: float) -> None:
+        """Count a call."""
+        self.advance(hour)
+        self.decay(date_time)
+        self.calls += 1
+        self.airtime += length
+        self.recent_calls += 1
+        self.recent_airtime += length
+    
+    def advance(self, hour: int) -> None:
+        """Fold the finished hours into the baseline, hours without calls as zero."""
+        if hour <= self.hour:
+            return
+        
+        bucket = self.hour % 24
+        self.baseline[bucket] += ALPHA * (self.calls - self.baseline[bucket])
+        self.baseline[24 + bucket] += ALPHA * (self.airtime - self.baseline[24 + bucket])
+        
+        # Each hour of the day skipped n times decays by (1 - ALPHA) ** n
+        skipped = hour - self.hour - 1
+        for offset in range(min(skipped, 24)):
+            bucket = (self.hour + 1 + offset) % 24
+            decay = (1 - ALPHA) ** ((skipped - offset + 23) // 24)
+            self.baseline[bucket] *= decay
+            self.baseline[24 + bucket] *= decay
+        
+        self.hours += hour - self.hour
+        self.hour = hour
+        self.calls = 0
+        self.airtime = 0.0
+    
+    def decay(self, now: int) -> None:
+        """Decay the recent sums to a time in milliseconds."""
+        if now <= self.updated:
+            return
+        factor = math.exp((self.updated - now) / WINDOW_MS)
+        self.recent_calls *= factor
+        self.recent_airtime *= factor
+        self.updated = now
+    
+    def rates(self) -> Dict[str, Optional[float]]:
+        """Return the recent and usual calls and airtime per hour."""
+        days = self.hours / 24
+        bucket = self.hour % 24
+        # Baselines start at zero; scale up the days seen so far
+        weight = 1 - (1 - ALPHA) ** days if days >= 1 else 0
+        return {
+            "calls_per_hour": round(self.recent_calls * PER_HOUR, 1),
+            "airtime_per_hour": round(self.recent_airtime * PER_HOUR),
+            "baseline_calls_per_hour": (
+                round(self.baseline[bucket] / weight, 1) if weight else None
+            ),
+            "baseline_airtime_per_hour": (
+                round(self.baseline[24 + bucket] / weight) if weight else None
+            ),
+        }
+    
+    def ratio(self) -> Optional[float]:
+        """Return how many times busier than usual the talkgroup is, once its baseline is usable."""
+        if self.hours < SURGE_MIN_DAYS * 24:
+            return None
+        
+        rates = self.rates()
+        return max(
+            rates["calls_per_hour"] / max(rates["baseline_calls_per_hour"], 1),
+            rates["airtime_per_hour"] / max(rates["baseline_airtime_per_hour"], SURGE_MIN_AIRTIME),
+        )
+    
+    def save(self) -> List[Any]:
+        """Return the state as JSON serializable data."""
+        return [
+            self.hour, self.calls, round(self.airtime, 1), self.hours,
+            round(self.recent_calls, 3), round(self.recent_airtime, 1), self.updated,
+            [round(value, 3) for value in self.baseline],
+        ]
+    
+    @classmethod
+    def load(cls, data: List[Any]) -> TalkgroupActivity:
+        """Return the state saved by save()."""
+        hour, calls, airtime, hours, recent_calls, recent_airtime, updated, baseline = data
+        activity = cls(hour, updated)
+        activity.calls = calls
+        activity.airtime = airtime
+        activity.hours = hours
+        activity.recent_calls = recent_calls
+        activity.recent_airtime = recent_airtime
+        activity.baseline = array("d", baseline)
+        return activity
+
+
+class SurgeDetector:
+    """Flag talkgroups that are much busier than usual for the time of day.
+    
+    Each talkgroup keeps an EWMA of its calls and airtime for every hour of
+    the day, learned from new calls as they arrive, and sums of its recent
+    calls and airtime that decay over SURGE_WINDOW. A talkgroup surges when
+    either recent rate reaches the configured multiple of its baseline for
+    the current hour, and clears below SURGE_CLEAR_RATIO of that. History is
+    never rescanned: baselines are learned from the first start and used
+    after SURGE_MIN_DAYS, and are saved between restarts.
+    """
+    
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        coordinator,
+        on_change: Callable[[Set[Tuple[int, int]]], None],
+    ) -> None:
+        """Initialize the detector.
+        
+        on_change is called with the (system, talkgroup) keys that started
+        or stopped surging.
+        """
+        self.hass = hass
+        self.entry = entry
+        self.coordinator = coordinator
+        self._on_change = on_change
+        self._multiple = entry.options.get(CONF_SURGE_MULTIPLE, DEFAULT_SURGE_MULTIPLE)
+        self._talkgroups: Dict[Tuple[int, int], TalkgroupActivity] = {}
+        # Surging talkgroups -> ratio when the surge started
+        self._surging: Dict[Tuple[int, int], float] = {}
+        # (dateTime, id) of the newest call counted
+        self._last_seen: Optional[Tuple[int, int]] = None
+        self._unsub_check: Optional[CALLBACK_TYPE] = None
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.surge.{entry.entry_id}")
+        self._save_scheduled = False
+    
+    @property
+    def talkgroups(self) -> List[Tuple[int, int]]:
+        """Return the (system, talkgroup) keys that are surging."""
+        return list(self._surging)
+    
+    def is_surging(self, key: Tuple[int, int]) -> bool:
+        """Return True if the talkgroup is surging."""
+        return key in self._surging
+    
+    def activity(self, key: Tuple[int, int]) -> Dict[str, Any]:
+        """Return a talkgroup's recent and usual rates."""
+        activity = self._talkgroups.get(key)
+        if activity is None:
+            return {}
+        activity.decay(int(time.time() * 1000))
+        ratio = activity.ratio()
+        return {**activity.rates(), "ratio": None if ratio is None else round(ratio, 2)}
+    
+    async def async_load(self) -> None:
+        """Load the baselines saved by the last run."""
+        data = await self._store.async_load()
+        if not data:
+            return
+        
+        try:
+            self._last_seen = tuple(data["last_seen"]) if data["last_seen"] else None
+            self._talkgroups = {
+                (system_id, talkgroup_id): TalkgroupActivity.load(saved)
+                for system_id, talkgroup_id, saved in data["talkgroups"]
+            }
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring invalid surge baselines: %s", err)
+            self._last_seen = None
+            self._talkgroups = {}
+    
+    async def async_save(self) -> None:
+        """Save the baselines now."""
+        await self._store.async_save(self._data())
+    
+    @callback
+    def async_add_calls(self, calls: Iterable[Any]) -> None:
+        """Count new calls, oldest first, and check their talkgroups for surges.
+        
+        Calls already counted before a restart are skipped.
+        """
+        touched = set()
+        for call in calls:
+            mark = (call['dateTime'], call['id'])
+            if self._last_seen is not None and mark <= self._last_seen:
+                continue
+            self._last_seen = mark
+            
+            key = (call['system'], call['talkgroup'])
+            hour = _local_hour(call['dateTime'])
+            activity = self._talkgroups.get(key)
+            if activity is None:
+                activity = self._talkgroups[key] = TalkgroupActivity(hour, call['dateTime'])
+            activity.add_call(call['dateTime'], hour, call['call_length'] or 0)
+            touched.add(key)
+        
+        if touched:
+            self._check(touched)
+            self._async_schedule_save()
+    
+    @callback
+    def async_stop(self) -> None:
+        """Cancel the surge check."""
+        if self._unsub_check:
+            self._unsub_check()
+            self._unsub_check = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return what the detector tracks."""
+        return {
+            "talkgroups": len(self._talkgroups),
+            "learning": sum(
+                activity.hours < SURGE_MIN_DAYS * 24 for activity in self._talkgroups.values()
+            ),
+            "surging": len(self._surging),
+            "multiple": self._multiple,
+        }
+    
+    @callback
+    def _async_check_surging(self, _now=None) -> None:
+        """Clear surges that have died down; no calls arrive to do it."""
+        self._check(set(self._surging))
+    
+    def _check(self, keys: Set[Tuple[int, int]]) -> None:
+        """Start or clear surges on talkgroups, firing an event for each change."""
+        now = int(time.time() * 1000)
+        hour = _local_hour(now)
+        changed = set()
+        for key in keys:
+            activity = self._talkgroups[key]
+            activity.advance(hour)
+            activity.decay(now)
+            ratio = activity.ratio()
+            if ratio is None:
+                continue
+            
+            if key in self._surging:
+                if ratio < self._multiple * SURGE_CLEAR_RATIO:
+                    del self._surging[key]
+                    changed.add(key)
+                    self._fire(key, activity, ratio, False)
+            elif ratio >= self._multiple and activity.recent_calls >= SURGE_MIN_CALLS:
+                self._surging[key] = ratio
+                changed.add(key)
+                self._fire(key, activity, ratio, True)
+        
+        if self._surging and self._unsub_check is None:
+            self._unsub_check = async_track_time_interval(
+                self.hass, self._async_check_surging, SURGE_CHECK_INTERVAL
+            )
+        elif not self._surging:
+            self.async_stop()
+        
+        if changed:
+            self._on_change(changed)
+    
+    def _fire(self, key: Tuple[int, int], activity: TalkgroupActivity, ratio: float, surging: bool) -> None:
+        """Fire an event for a surge starting or ending."""
+        system_id, talkgroup_id = key
+        system = self.coordinator.catalog.get_system(system_id)
+        talkgroup = self.coordinator.catalog.get_talkgroup(system_id, talkgroup_id)
+        _LOGGER.debug(
+            "Talkgroup %s:%s %s surging at %.1f times its baseline",
+            system_id, talkgroup_id, "started" if surging else "stopped", ratio,
+        )
+        self.hass.bus.async_fire(
+            EVENT_SURGE,
+            {
+                "entry_id": self.entry.entry_id,
+                "system": system_id,
+                "system_label": system['name'] if system else None,
+                "talkgroup": talkgroup_id,
+                "talkgroup_label": talkgroup['name'] if talkgroup else None,
+                "talkgroup_tag": talkgroup['tag'] if talkgroup else None,
+                "surging": surging,
+                "ratio": round(ratio, 2),
+                **activity.rates(),
+            },
+        )
+    
+    @callback
+    def _async_schedule_save(self) -> None:
+        """Save the baselines within SURGE_SAVE_DELAY, without postponing a pending save."""
+        if not self._save_scheduled:
+            self._save_scheduled = True
+            self._store.async_delay_save(self._data, SURGE_SAVE_DELAY)
+    
+    def _data(self) -> Dict[str, Any]:
+        """Return the baselines to save."""
+        self._save_scheduled = False
+        return {
+            "last_seen": list(self._last_seen) if self._last_seen else None,
+            "talkgroups": [
+                [system_id, talkgroup_id, activity.save()]
+                for (system_id, talkgroup_id), activity in self._talkgroups.items()
+            ],
+        }
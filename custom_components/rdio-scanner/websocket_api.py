@@ -0,0 +1,243 @@
+"""WebSocket API for Rdio-Scanner."""
+from __future__ import annotations
+
+import logging
+import time
+from collections import OrderedDict, deque
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import async_call_later
+
+from .audio_handler import audio_url
+from .const import (
+    DATA_WEBSOCKET,
+    DOMAIN,
+    SIGNAL_NEW_CALLS,
+    WS_FLUSH_INTERVAL,
+    WS_MAX_PENDING,
+    WS_RECENT_CALLS,
+    WS_REPLAY_LIMIT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def setup_websocket_api(hass: HomeAssistant) -> None:
+    """Register the WebSocket commands once for all config entries."""
+    if hass.data.get(DATA_WEBSOCKET):
+        return
+    
+    websocket_api.async_register_command(hass, websocket_subscribe_calls)
+    hass.data[DATA_WEBSOCKET] = True
+
+
+def call_message(entry_id: str, call) -> Dict[str, Any]:
+    """Return a call as sent to WebSocket clients."""
+    return {
+        **call.as_dict(),
+        "entry_id": entry_id,
+        "audio_url": audio_url(entry_id, call['id']),
+    }
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "rdio_scanner/subscribe_calls",
+        vol.Optional("entry_id"): str,
+        vol.Optional("systems"): [vol.Coerce(int)],
+        vol.Optional("talkgroups"): [vol.Coerce(int)],
+        vol.Optional("since_id"): vol.Coerce(int),
+    }
+)
+@websocket_api.async_response
+async def websocket_subscribe_calls(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict
+) -> None:
+    """Push new calls to the client, after replaying those since since_id."""
+    since_id = msg.get("since_id")
+    if since_id is not None and "entry_id" not in msg:
+        # Call ids are only ordered within one database
+        connection.send_error(
+            msg["id"], websocket_api.ERR_INVALID_FORMAT, "since_id requires entry_id"
+        )
+        return
+    
+    coordinators = hass.data.get(DOMAIN, {})
+    if entry_id := msg.get("entry_id"):
+        if entry_id not in coordinators:
+            connection.send_error(
+                msg["id"], websocket_api.ERR_NOT_FOUND, f"Config entry {entry_id} not found"
+            )
+            return
+        coordinators = {entry_id: coordinators[entry_id]}
+    
+    subscription = CallSubscription(
+        hass,
+        connection,
+        msg["id"],
+        msg.get("systems"),
+        msg.get("talkgroups"),
+        paused=since_id is not None,
+    )
+    # Subscribe before replaying so nothing committed meanwhile is missed
+    unsubs = [
+        async_dispatcher_connect(
+            hass,
+            SIGNAL_NEW_CALLS.format(entry_id),
+            partial(subscription.async_add_calls, entry_id, coordinator.backend.path),
+        )
+        for entry_id, coordinator in coordinators.items()
+    ]
+    
+    @callback
+    def async_unsubscribe() -> None:
+        for unsub in unsubs:
+            unsub()
+        subscription.async_stop()
+    
+    # Registered before the replay so a connection closed meanwhile unsubscribes
+    connection.subscriptions[msg["id"]] = async_unsubscribe
+    if since_id is None:
+        connection.send_result(msg["id"])
+        return
+    
+    try:
+        calls = await coordinators[entry_id].db.get_calls_after(
+            since_id,
+            limit=WS_REPLAY_LIMIT + 1,
+            systems=msg.get("systems"),
+            talkgroups=msg.get("talkgroups"),
+            selection=coordinators[entry_id].view,
+        )
+    except Exception as err:
+        if connection.subscriptions.pop(msg["id"], None):
+            async_unsubscribe()
+            _LOGGER.error("Error replaying calls: %s", err)
+            connection.send_error(msg["id"], websocket_api.ERR_UNKNOWN_ERROR, str(err))
+        return
+    
+    if connection.subscriptions.get(msg["id"]) is not async_unsubscribe:
+        # Closed or unsubscribed during the replay
+        return
+    
+    connection.send_result(msg["id"])
+    calls.sort(key=lambda call: (call['dateTime'], call['id']))
+    replay = calls[:WS_REPLAY_LIMIT]
+    connection.send_message(
+        websocket_api.event_message(
+            msg["id"],
+            {
+                "calls": [call_message(entry_id, call) for call in replay],
+                "replay": True,
+                "more": len(calls) > WS_REPLAY_LIMIT,
+            },
+        )
+    )
+    subscription.async_resume(
+        {entry_id: max(call['id'] for call in replay)} if replay else {}
+    )
+
+
+class CallSubscription:
+    """New calls for one WebSocket subscriber, filtered and batched.
+    
+    Calls are sent at most every WS_FLUSH_INTERVAL as one message. A client
+    that can't keep up has its oldest calls dropped, with the number dropped
+    in the next message, rather than growing the connection's queue. Entries
+    on the same database deliver the same calls, so each is sent once.
+    """
+    
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        connection: websocket_api.ActiveConnection,
+        msg_id: int,
+        systems: Optional[List[int]],
+        talkgroups: Optional[List[int]],
+        paused: bool = False,
+    ) -> None:
+        """Initialize the subscription."""
+        self.hass = hass
+        self.connection = connection
+        self.msg_id = msg_id
+        self._systems = set(systems or ())
+        self._talkgroups = set(talkgroups or ())
+        # Held while history is replayed
+        self._paused = paused
+        # (entry id, call), oldest first
+        self._pending: deque = deque(maxlen=WS_MAX_PENDING)
+        # (database path, call id) of the latest calls queued, oldest first
+        self._recent: OrderedDict = OrderedDict()
+        self._dropped = 0
+        self._last_flush = 0.0
+        self._unsub_timer: Optional[CALLBACK_TYPE] = None
+    
+    @callback
+    def async_add_calls(self, entry_id: str, db_path: str, calls: Iterable[Any]) -> None:
+        """Queue new calls that pass the filters and weren't queued from another entry."""
+        for call in calls:
+            if self._systems and call['system'] not in self._systems:
+                continue
+            if self._talkgroups and call['talkgroup'] not in self._talkgroups:
+                continue
+            key = (db_path, call['id'])
+            if key in self._recent:
+                continue
+            self._recent[key] = None
+            if len(self._recent) > WS_RECENT_CALLS:
+                self._recent.popitem(last=False)
+            if len(self._pending) == WS_MAX_PENDING:
+                self._dropped += 1
+            self._pending.append((entry_id, call))
+        
+        self._schedule_flush()
+    
+    @callback
+    def async_resume(self, replayed: Dict[str, int]) -> None:
+        """Start sending, skipping calls already sent by the replay."""
+        self._pending = deque(
+            (
+                (entry_id, call)
+                for entry_id, call in self._pending
+                if call['id'] > replayed.get(entry_id, -1)
+            ),
+            maxlen=WS_MAX_PENDING,
+        )
+        self._paused = False
+        self._schedule_flush()
+    
+    @callback
+    def async_stop(self) -> None:
+        """Stop sending."""
+        if self._unsub_timer:
+            self._unsub_timer()
+            self._unsub_timer = None
+        self._pending.clear()
+    
+    def _schedule_flush(self) -> None:
+        """Send pending calls as soon as the flush interval allows."""
+        if self._paused or self._unsub_timer or not self._pending:
+            return
+        
+        delay = max(self._last_flush + WS_FLUSH_INTERVAL - time.monotonic(), 0)
+        self._unsub_timer = async_call_later(self.hass, delay, self._async_flush)
+    
+    @callback
+    def _async_flush(self, _now) -> None:
+        """Send pending calls as one message."""
+        self._unsub_timer = None
+        self._last_flush = time.monotonic()
+        message = {
+            "calls": [call_message(entry_id, call) for entry_id, call in self._pending]
+        }
+        if self._dropped:
+            message["dropped"] = self._dropped
+        self._pending.clear()
+        self._dropped = 0
+        self.connection.send_message(websocket_api.event_message(self.msg_id, message))